@@ -0,0 +1,119 @@
+import hashlib
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from cache import page_cache
+from loaders import usuarios
+from models import db, Experiencia, Educacion, Curso, Proyecto
+
+
+# -------------------------------
+# API JSON de solo lectura: /api/v1/<recurso>
+# - paginación por cursor de id (keyset): ?after=<id>&limit=<n>
+# - filas de un solo perfil: ?usuario=<username>
+# - campos a elección: ?fields=titulo,periodo
+# - ETag: con la cache de páginas en disco (PAGE_CACHE_BACKEND=disco) se
+#   ata a la versión de contenido, compartida por todos los workers, y un
+#   cliente que hace polling recibe 304 sin que se consulte la base; con la
+#   cache en memoria cada worker tiene su propia versión, así que el ETag
+#   sale del JSON de la respuesta (se consulta, pero no se reenvía)
+# -------------------------------
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+RECURSOS = {
+    'experiencias': Experiencia,
+    'educacion': Educacion,
+    'cursos': Curso,
+    'proyectos': Proyecto,
+}
+LIMITE_DEFAULT = 20
+LIMITE_MAX = 100
+
+
+def _columnas(modelo):
+    return {c.key: c for c in modelo.__table__.columns}
+
+
+def _serializar(valor):
+    return valor.isoformat() if hasattr(valor, 'isoformat') else valor
+
+
+def _etag():
+    """ETag por versión de contenido, o None si la versión no es la misma en todos los workers."""
+    if not page_cache.compartida:
+        return None
+    base = f'{page_cache.version}|{request.full_path}'
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def _entero(nombre, default):
+    valor = request.args.get(nombre)
+    if valor is None:
+        return default
+    try:
+        return int(valor)
+    except ValueError:
+        abort(400, description=f'"{nombre}" tiene que ser un entero')
+
+
+@api.route('/<recurso>')
+def listar(recurso):
+    modelo = RECURSOS.get(recurso)
+    if modelo is None:
+        abort(404)
+
+    etag = _etag()
+    if etag and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    columnas = _columnas(modelo)
+    campos = request.args.get('fields')
+    if campos:
+        nombres = [n.strip() for n in campos.split(',') if n.strip()]
+        desconocidos = [n for n in nombres if n not in columnas]
+        if desconocidos:
+            abort(400, description=f'campos desconocidos: {", ".join(desconocidos)}')
+        if 'id' not in nombres:
+            nombres.insert(0, 'id')
+    else:
+        nombres = list(columnas)
+
+    after = _entero('after', 0)
+    limit = max(1, min(_entero('limit', LIMITE_DEFAULT), LIMITE_MAX))
+
+    # solo se leen las columnas pedidas; se trae una fila de más para saber
+    # si hay otra página sin hacer un COUNT
+    consulta = db.session.query(*[columnas[n] for n in nombres]).filter(modelo.id > after)
+    username = request.args.get('usuario')
+    if username:
+        usuario_id = usuarios.id_de(username)
+        if usuario_id is None:
+            abort(404)
+        # (usuario_id, id) está indexado: el cursor sigue siendo un rango
+        consulta = consulta.filter(modelo.usuario_id == usuario_id)
+    filas = (
+        consulta
+        .order_by(modelo.id)
+        .limit(limit + 1)
+        .all()
+    )
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+
+    response = jsonify({
+        'data': [{n: _serializar(getattr(f, n)) for n in nombres} for f in filas],
+        'next_cursor': filas[-1].id if hay_mas else None,
+    })
+    response.cache_control.no_cache = True
+    if etag:
+        response.set_etag(etag)
+        return response
+    response.add_etag()  # sha1 del cuerpo
+    return response.make_conditional(request)
+
+
+@api.errorhandler(400)
+def _error_400(e):
+    return jsonify({'error': e.description}), 400
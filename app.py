@@ -1,32 +1,87 @@
 import os
+import click
 from flask import (
-    Flask, render_template, redirect, url_for,
-    request, flash, session, send_from_directory
+    Flask, Blueprint, render_template, redirect, url_for,
+    request, flash, session, abort, current_app
 )
-from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
-from werkzeug.utils import secure_filename
+from flask_migrate import Migrate, upgrade
 from functools import wraps
+from markupsafe import Markup
+from flask_wtf.csrf import generate_csrf
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from forms import (LoginForm, ProfileEditForm,DeleteExperienciaForm,
     AddExperienciaForm,EditExperienciaForm,EducacionForm, 
-    EditarEducacionForm,EliminarEducacionForm,CursoForm,
+    EliminarEducacionForm,CursoForm,
     EditarCursoForm,EliminarCursoForm,ProyectoForm
     )
 from models import db, Usuario, Experiencia, Educacion, Curso,Proyecto
 from config import Config
+from cache import page_cache, grupo_perfil
+from loaders import cargar_perfil, usuarios
+from images import image_pipeline
+from storage import blob_store
+from flask_login import current_user, logout_user
+import auth
+from auth import usuario_actual, iniciar_sesion
+from passwords import verificador, login_throttle, Saturado
+from api import api
+from subidas import subidas, subidas_parciales
+from lote import lote
+from limpieza import limpieza_uploads
+from replicas import replicas
+from compresion import respuestas_html
+from cv import cv_pipeline
+from freeze import freezer
+from assets import asset_pipeline
+from metrics import metrics
+from http_cache import enviar_archivo, huella
+from search import buscar as buscar_en_indice, reindexar_todo
 
 
 # ---------------------
 # Configuración inicial
 # ---------------------
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
-bcrypt = Bcrypt(app)
-
-# Crear carpeta de uploads si no existe
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+bcrypt = Bcrypt()
+migrate = Migrate()
+# rutas del sitio; cli_group=None deja sus comandos como "flask <comando>"
+web = Blueprint('web', __name__, cli_group=None)
+
+
+def create_app(config=Config):
+    """Arma la aplicación sin tocar la base ni el disco.
+
+    Crear tablas y el usuario inicial es un paso aparte (``flask init-db``),
+    así cada worker arranca rápido y siempre igual. Ver wsgi.py.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    if app.config.get('PROXY_FIX_X_FOR'):
+        # request.remote_addr pasa a ser la IP del cliente (throttling de login)
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    db.init_app(app)
+    replicas.init_app(app)
+    bcrypt.init_app(app)
+    migrate.init_app(app, db)
+    page_cache.init_app(app)
+    image_pipeline.init_app(app)
+    blob_store.init_app(app)
+    auth.init_app(app)
+    verificador.init_app(app, bcrypt)
+    login_throttle.init_app(app)
+    app.register_blueprint(web)
+    app.register_blueprint(api)
+    subidas_parciales.init_app(app)
+    app.register_blueprint(subidas)
+    app.register_blueprint(lote)
+    limpieza_uploads.init_app(app)
+    cv_pipeline.init_app(app)
+    freezer.init_app(app)
+    asset_pipeline.init_app(app)
+    respuestas_html.init_app(app)
+    metrics.init_app(app)
+    return app
 
 
 # ---------------------
@@ -35,148 +90,373 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user' not in session:
+        # current_user sale de la cache de identidad (ver auth.py)
+        if not current_user.is_authenticated:
             flash('Debes iniciar sesión para acceder a esa página.', 'warning')
-            return redirect(url_for('login'))
+            return redirect(url_for('web.login'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+def propio_o_404(modelo, objeto_id):
+    """La fila ``objeto_id`` de ``modelo`` si es del usuario logueado; si no, 404."""
+    return modelo.query.filter_by(id=objeto_id, usuario_id=current_user.id).first_or_404()
+
+
+def volver_al_perfil():
+    return redirect(url_for('web.perfil', username=current_user.username))
+
+
 # ---------------------
-# Inicialización automática
+# Inicialización (una vez por despliegue, no por worker)
 # ---------------------
-def inicializar_app():
-    """Crea tablas y usuario inicial si no existen."""
-    app.app_context().push()  # activa contexto de Flask
-    db.create_all()
+def inicializar_db(username="daer", password="123456"):
+    """Aplica las migraciones y crea el usuario inicial si no existe."""
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    upgrade()  # aplica las migraciones pendientes (migrations/)
     # si no existe el usuario principal, lo crea
-    usuario_existente = Usuario.query.filter_by(username="daer").first()
+    usuario_existente = Usuario.query.filter_by(username=username).first()
     if not usuario_existente:
-        hashed_pw = bcrypt.generate_password_hash("123456").decode("utf-8")
+        hashed_pw = bcrypt.generate_password_hash(password).decode("utf-8")
         user = Usuario(
-            username="daer",
+            username=username,
             password=hashed_pw,
             nombre_publico="Daer Oriana Berenice",
             profile_image="daer.png"
         )
         db.session.add(user)
         db.session.commit()
-        print("✅ Usuario inicial creado: daer / 123456")
+        print(f"✅ Usuario inicial creado: {username}")
+
+
+@web.cli.command('init-db')
+@click.option('--usuario', default='daer', show_default=True, help='usuario inicial')
+@click.option('--password', envvar='ADMIN_PASSWORD', default='123456',
+              help='contraseña del usuario inicial (o ADMIN_PASSWORD)')
+def init_db(usuario, password):
+    """Aplica las migraciones y crea el usuario inicial si no existe."""
+    inicializar_db(usuario, password)
+
+
+@web.cli.command('generar-variantes')
+def generar_variantes():
+    """Genera las variantes responsive de las imágenes ya subidas."""
+    from images import EXTENSIONES_IMAGEN, VARIANTES_DIR
+    raiz = current_app.config['UPLOAD_FOLDER']
+    for carpeta, subcarpetas, archivos in os.walk(raiz):
+        if carpeta == raiz and VARIANTES_DIR in subcarpetas:
+            subcarpetas.remove(VARIANTES_DIR)
+        for nombre in sorted(archivos):
+            if os.path.splitext(nombre)[1].lower() in EXTENSIONES_IMAGEN:
+                ruta = os.path.relpath(os.path.join(carpeta, nombre), raiz).replace(os.sep, '/')
+                image_pipeline.generar(ruta)
+                print(f"🖼️  {ruta}")
+    page_cache.invalidar(todo=True)
+
+
+@web.cli.command('assets-build')
+def assets_build():
+    """Genera static/dist con assets con hash, .gz/.br y manifest.json."""
+    manifest = asset_pipeline.build()
+    print(f"📦 {len(manifest)} assets en {asset_pipeline.dist}")
+
+
+@web.cli.command('freeze')
+def freeze():
+    """Exporta el portfolio público como sitio estático (FREEZE_DIR)."""
+    stats = freezer.exportar()
+    print(f"🧊 {freezer.destino}: {stats['escritos']} archivos escritos, {stats['sin_cambios']} sin cambios")
+
+
+@web.cli.command('generar-cv')
+def generar_cv():
+    """Genera (o confirma al día) el CV en PDF de cada usuario."""
+    for usuario in Usuario.query.order_by(Usuario.id):
+        path = cv_pipeline.generar(usuario.id)
+        print(f"📄 {usuario.username}: {path}")
+
+
+@web.cli.command('reindexar-busqueda')
+def reindexar_busqueda():
+    """Reconstruye el índice de /buscar desde cero."""
+    total = reindexar_todo()
+    print(f"🔎 {total} entidades indexadas")
+
+
+@web.cli.command('migrar-uploads')
+def migrar_uploads():
+    """Pasa los archivos con nombre legacy al almacenamiento por contenido."""
+    from storage import COLUMNAS_ARCHIVO, hash_de_ruta
+    for modelo, columna in COLUMNAS_ARCHIVO.items():
+        for obj in modelo.query.all():
+            ruta = getattr(obj, columna)
+            if not ruta or hash_de_ruta(ruta):
+                continue
+            path = os.path.join(current_app.config['UPLOAD_FOLDER'], ruta)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                nueva = blob_store.guardar_stream(f, os.path.splitext(ruta)[1])
+            setattr(obj, columna, nueva)
+            print(f"📦 {modelo.__name__}.{columna}: {ruta} -> {nueva}")
+    db.session.commit()
+
+@web.cli.command('replicas')
+def estado_replicas():
+    """Muestra el retraso y la salud de cada réplica de lectura."""
+    if not replicas.nombres:
+        print("Sin réplicas (DATABASE_REPLICA_URLS vacío): todo va a la primaria")
+        return
+    for estado in replicas.revisar().values():
+        if estado.error:
+            print(f"❌ {estado.nombre}: {estado.error}")
+        else:
+            marca = "✅" if estado.sana else "🐢"
+            print(f"{marca} {estado.nombre}: {estado.retraso:.1f} s de retraso (máximo {replicas.max_lag:g} s)")
+
+
+@web.cli.command('limpiar-uploads')
+@click.option('--simular', is_flag=True, help='solo informar, sin mover ni borrar')
+@click.option('--cada', type=float, help='repetir cada N segundos (proceso aparte, en vez de cron)')
+@click.option('--json', 'como_json', is_flag=True, help='informe en JSON')
+def limpiar_uploads(simular, cada, como_json):
+    """Pone en cuarentena los uploads huérfanos, borra los vencidos e informa el uso de disco."""
+    import json
+    import time
+    while True:
+        informe = limpieza_uploads.barrer(simular=simular)
+        if como_json:
+            print(json.dumps(informe.como_dict(), ensure_ascii=False))
+        else:
+            for tipo, uso in sorted(informe.uso.items()):
+                print(f"💾 {tipo:<12} {uso['archivos']:>6} archivos {uso['bytes'] / 1024 / 1024:>10.2f} MB")
+            print(f"🧹 {len(informe.en_cuarentena)} a cuarentena, {len(informe.borrados)} borrados, "
+                  f"{len(informe.restaurados)} restaurados, {informe.referencias_corregidas} contadores corregidos"
+                  + (" (simulado)" if simular else ""))
+        if not cada:
+            break
+        time.sleep(cada)
 
 # ---------------------
 # Rutas
 # ---------------------
 
-@app.route('/descargar-cv')
-def descargar_cv():
-    # Ajusta el nombre y la ubicación exacta de tu PDF
-    cv_path = os.path.join(app.root_path, 'static/uploads')
-    return send_from_directory(cv_path, 'CV_Daer_Oriana_Berenice.pdf', as_attachment=True)
-
-@app.route('/')
+# Las URLs de archivos llevan ?v=<hash del contenido>: si el archivo cambia,
+# cambia la URL, y la versión vieja puede cachearse para siempre.
+@web.app_url_defaults
+def agregar_huella(endpoint, values):
+    if 'v' in values:
+        return
+    # (el CV no: se genera desde la base y saber su hash costaría consultas
+    # en cada render; se sirve con ETag y revalidación)
+    if endpoint == 'web.uploads' and values.get('filename'):
+        v = huella(current_app.config['UPLOAD_FOLDER'], values['filename'])
+    else:
+        return
+    if v:
+        values['v'] = v
+
+
+@web.route('/descargar-cv')
+@web.route('/u/<username>/cv')
+def descargar_cv(username=None):
+    # el PDF se arma desde la base en segundo plano (ver cv.py); acá solo
+    # se sirve el último generado
+    username = username or current_app.config['PERFIL_PRINCIPAL']
+    path = cv_pipeline.archivo(username)
+    if path is None:
+        # usuario inexistente, o CV_GENERADO=0 y no subió ningún PDF
+        if usuarios.id_de(username) is None or not cv_pipeline.generado:
+            abort(404)
+        response = current_app.response_class('El CV se está generando, intenta de nuevo en unos segundos.',
+                                               status=503, mimetype='text/plain')
+        response.headers['Retry-After'] = '5'
+        return response
+    return enviar_archivo(os.path.dirname(path), os.path.basename(path), as_attachment=True,
+                          download_name=f'CV_{username}.pdf')
+
+@web.route('/')
 def index():
-    usuario = Usuario.query.filter_by(username="daer").first()
-    educacion = Educacion.query.filter_by(usuario_id=usuario.id).all()
-    cursos = Curso.query.filter_by(usuario_id=usuario.id).all()
-    educacion = Educacion.query.filter_by(usuario_id=usuario.id).all()
-    edit_form = EditExperienciaForm()
-    form=EducacionForm()
-    form_editar = EditarEducacionForm()
-    form_eliminar = EliminarEducacionForm()
-    experiencias = Experiencia.query.all()
-    add_form = AddExperienciaForm()
-    delete_forms = {exp.id: DeleteExperienciaForm() for exp in experiencias}
-    form_elim_curso= EliminarCursoForm()
-    form_modif_curso = EditarCursoForm()
-    form_curso=CursoForm()
-    proyectos= Proyecto.query.all()
-    form_proyect= ProyectoForm()
-    form_modif_proyect=ProyectoForm()
-    form_eliminar_proyecto=ProyectoForm()
-
-    return render_template('index.html', usuario=usuario , experiencias=experiencias,add_form=add_form,edit_form=edit_form,
-    delete_forms=delete_forms, form=form,form_eliminar=form_eliminar,
-    form_editar=form_editar,educacion=educacion,
-    cursos=cursos,form_elim_curso=form_elim_curso,
-    form_curso=form_curso,form_modif_curso=form_modif_curso,
-    form_proyect=form_proyect,proyectos=proyectos,
-    form_modif_proyect=form_modif_proyect,form_eliminar_proyecto=form_eliminar_proyecto
-    )
-
-
-@app.route('/login', methods=['GET', 'POST'])
+    return perfil(current_app.config['PERFIL_PRINCIPAL'])
+
+
+@web.route('/u/<username>')
+def perfil(username):
+    usuario_id = usuarios.id_de(username)
+    if usuario_id is None:
+        abort(404)
+    # Visitantes anónimos sin mensajes flash pendientes: la página es
+    # idéntica para todos, se sirve desde la cache sin tocar la base.
+    # Cada perfil tiene su versión: editar uno no invalida los demás.
+    if 'user' not in session and not session.get('_flashes'):
+        return respuestas_html.responder_cacheado(
+            ('perfil', usuario_id), lambda: render_perfil_para_cache(username), grupo=grupo_perfil(usuario_id))
+    # el resto se manda por partes: el <head> y la cabecera salen antes de
+    # que se rendericen experiencias, cursos y proyectos
+    return respuestas_html.responder(render_perfil(username, por_partes=True))
+
+
+MARCA_CSRF = '<!--csrf_token-->'
+
+
+def render_perfil_para_cache(username):
+    # lo que queda en la cache se lee de la primaria: una página (o sección)
+    # armada con una réplica atrasada se serviría hasta la próxima edición
+    if page_cache.enabled:
+        replicas.usar_primaria()
+    return render_perfil(username)
+
+
+def render_perfil(username, por_partes=False):
+    contexto = cargar_perfil(username)  # usuario, educacion, cursos, experiencias, proyectos
+    if contexto is None:
+        abort(404)
+    render = respuestas_html.render if por_partes else render_template
+    # Los formularios de edición solo los ve el dueño del perfil: para
+    # cualquier otro no se construye ninguno.
+    contexto['puede_editar'] = (current_user.is_authenticated
+                                and current_user.id == contexto['usuario'].id)
+    if not contexto['puede_editar']:
+        return render('index.html', **contexto)
+    contexto.update(formularios_admin())
+    # las secciones cacheadas llevan la marca: el token es de esta sesión
+    campo_csrf = f'<input name="csrf_token" type="hidden" value="{generate_csrf()}">'
+    html = render('index.html', **contexto)
+    if isinstance(html, str):
+        return html.replace(MARCA_CSRF, campo_csrf)
+    return (str(parte).replace(MARCA_CSRF, campo_csrf) for parte in html)
+
+
+def formularios_admin():
+    """Un formulario por tipo (no uno por fila) y un solo token CSRF.
+
+    Los formularios se construyen sin CSRF propio y el template pone
+    ``csrf_input`` en cada <form>: una marca que render_perfil reemplaza por
+    el token de la sesión, así las secciones cacheadas sirven a cualquier
+    admin. La validación en las rutas POST no cambia.
+    """
+    sin_csrf = {'csrf': False}
+    return {
+        'edit_form': EditExperienciaForm(meta=sin_csrf),
+        'delete_form': DeleteExperienciaForm(meta=sin_csrf),
+        'form_curso': CursoForm(meta=sin_csrf),
+        'form_modif_curso': EditarCursoForm(meta=sin_csrf),
+        'form_proyect': ProyectoForm(meta=sin_csrf),
+        'form_modif_proyect': ProyectoForm(meta=sin_csrf),
+        'csrf_input': Markup(MARCA_CSRF),
+    }
+
+
+@web.route('/buscar')
+@web.route('/u/<username>/buscar')
+def buscar(username=None):
+    # se busca dentro de un perfil: el principal o el de la URL
+    perfil = cargar_perfil(username or current_app.config['PERFIL_PRINCIPAL'])
+    if perfil is None:
+        abort(404)
+    usuario = perfil['usuario']
+    q = request.args.get('q', '').strip()
+    resultados = buscar_en_indice(q, usuario.id) if q else []
+    return render_template('buscar.html', q=q, resultados=resultados, usuario=usuario)
+
+
+@web.route('/login', methods=['GET', 'POST'])
 def login():
     form = LoginForm()
     if form.validate_on_submit():
+        # se rechaza antes de consultar la base o hashear
+        if not login_throttle.permitir(request.remote_addr, form.username.data):
+            flash('Demasiados intentos. Esperá un minuto e intentá de nuevo.', 'danger')
+            return render_template('login.html', form=form), 429
+
         usuario = Usuario.query.filter_by(username=form.username.data).first()
 
-        if usuario and usuario.check_password(bcrypt, form.password.data):
-            session['user'] = usuario.username
+        try:
+            if usuario is None:
+                # mismo costo que un usuario real: el tiempo de respuesta no
+                # dice qué usernames existen
+                valido = verificador.verificar_sin_usuario(form.password.data)
+            else:
+                valido = verificador.verificar(usuario.password, form.password.data)
+        except Saturado:
+            flash('El servidor está ocupado. Intentá de nuevo en unos segundos.', 'warning')
+            return render_template('login.html', form=form), 503
+
+        if valido:
+            # si cambió BCRYPT_LOG_ROUNDS, se re-hashea con el costo nuevo
+            if verificador.necesita_rehash(usuario.password):
+                try:
+                    usuario.password = verificador.generar_hash(form.password.data)
+                    usuario.save()
+                except Saturado:
+                    pass
+            iniciar_sesion(usuario)
+            session['user'] = usuario.username  # lo usan los templates
             flash('Inicio de sesión exitoso', 'success')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('web.dashboard'))
         else:
             flash('Usuario o contraseña incorrectos', 'danger')
 
     return render_template('login.html', form=form)
 
 
-@app.route('/logout')
+@web.route('/logout')
 def logout():
+    logout_user()
     session.pop('user', None)
     flash('Cerraste sesión correctamente.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('web.index'))
 
 
-@app.route('/dashboard', methods=['GET', 'POST'])
+@web.route('/dashboard', methods=['GET', 'POST'])
 @login_required
 def dashboard():
-    usuario = Usuario.query.filter_by(username=session['user']).first()
     form = ProfileEditForm()
 
     if form.validate_on_submit():
+        usuario = usuario_actual()
         usuario.nombre_publico = form.nombre_publico.data
 
         file = form.profile_image.data
         if file:
-            filename = secure_filename(file.filename)
-            _, ext = os.path.splitext(filename)
-            filename = f"{usuario.username}{ext}"
-            path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(path)
+            filename = blob_store.guardar(file)
             usuario.profile_image = filename
 
         usuario.save()
         flash('Perfil actualizado con éxito.', 'success')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('web.dashboard'))
 
     if request.method == 'GET':
-        form.nombre_publico.data = usuario.nombre_publico
+        form.nombre_publico.data = current_user.nombre_publico
 
-    return render_template('dashboard.html', usuario=usuario, form=form, )
+    return respuestas_html.responder(respuestas_html.render(
+        'dashboard.html', usuario=current_user, form=form, token_csrf=generate_csrf(),
+        cv_generado=cv_pipeline.generado))
 
 
-@app.route('/uploads/<filename>')
+@web.route('/uploads/<path:filename>')
 def uploads(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return enviar_archivo(current_app.config['UPLOAD_FOLDER'], filename)
 
 
-@app.route('/editar-acerca', methods=['POST'])
+@web.route('/editar-acerca', methods=['POST'])
 @login_required
 def editar_acerca():
-    usuario = Usuario.query.filter_by(username=session['user']).first()
+    usuario = usuario_actual()
     usuario.acerca_de_mi = request.form['acerca']
     usuario.save()
     flash("Sección actualizada", "success")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
 
-@app.route('/agregar_experiencia', methods=['POST'])
+@web.route('/agregar_experiencia', methods=['POST'])
 @login_required
 def agregar_experiencia():
     form = AddExperienciaForm()
     if form.validate_on_submit():
         nueva = Experiencia(
+            usuario_id=current_user.id,
             proyecto=form.proyecto.data,
             descripcion=form.descripcion.data,
             puesto=form.puesto.data,
@@ -185,11 +465,12 @@ def agregar_experiencia():
         )
         db.session.add(nueva)
         db.session.commit()
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
-@app.route('/modificar_experiencia/<int:exp_id>', methods=['POST'])
+@web.route('/modificar_experiencia/<int:exp_id>', methods=['POST'])
+@login_required
 def modificar_experiencia(exp_id):
-    exp = Experiencia.query.get_or_404(exp_id)
+    exp = propio_o_404(Experiencia, exp_id)
 
     exp.proyecto = request.form['proyecto']
     exp.puesto = request.form['puesto']
@@ -200,52 +481,49 @@ def modificar_experiencia(exp_id):
     db.session.commit()
     flash("Experiencia modificada correctamente", "success")
 
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
-@app.route('/eliminar_experiencia/<int:exp_id>', methods=['POST'])
+@web.route('/eliminar_experiencia/<int:exp_id>', methods=['POST'])
 @login_required
 def eliminar_experiencia(exp_id):
     form=DeleteExperienciaForm()
 
     if not form.validate_on_submit(): #confirma q el post viene dese el formulario propio del lugar
         flash('solicitud invalida',"danger")
-        return redirect(url_for('index'))
+        return volver_al_perfil()
     
     #busca experiencia
-    exp=Experiencia.query.get_or_404(exp_id) #si el id no existe, con el get on 404 se cortaria
+    exp=propio_o_404(Experiencia, exp_id) #si el id no existe, con el get on 404 se cortaria
 
     # Eliminar experienia
     db.session.delete(exp)
     db.session.commit()
     flash("Experiencia eliminada", "info")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
 
 #-----------EDUCACION ROUTES  ----------------
 
-@app.route("/agregar_educacion", methods=["POST"])
+@web.route("/agregar_educacion", methods=["POST"])
 @login_required
 def agregar_educacion():
     form = EducacionForm()
 
     if not form.validate_on_submit():
         flash("Error en el formulario de educación.", "danger")
-        return redirect(url_for("index"))
-
-    usuario = Usuario.query.filter_by(username=session['user']).first()
+        return volver_al_perfil()
 
     # Procesar archivo
     filename = None
     if form.logo.data:
         file = form.logo.data
-        filename = secure_filename(file.filename)
-        file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+        filename = blob_store.guardar(file)
 
     # Guardar en DB
     nueva = Educacion(
-        usuario_id=usuario.id,
+        usuario_id=current_user.id,
         titulo=form.titulo.data,
         institucion=form.institucion.data,
         periodo=form.periodo.data,
@@ -257,21 +535,22 @@ def agregar_educacion():
     db.session.commit()
 
     flash("Formación agregada correctamente.", "success")
-    return redirect(url_for("index"))
+    return volver_al_perfil()
 
-@app.route("/educacion/eliminar/<int:edu_id>", methods=["POST"])
+@web.route("/educacion/eliminar/<int:edu_id>", methods=["POST"])
+@login_required
 def eliminar_educacion(edu_id):
     form = EliminarEducacionForm()
     if form.validate_on_submit():
-        edu = Educacion.query.get_or_404(edu_id)
+        edu = propio_o_404(Educacion, edu_id)
         db.session.delete(edu)
         db.session.commit()
-    return redirect(url_for("index"))
+    return volver_al_perfil()
 
-@app.route('/modificar_educacion/<int:edu_id>', methods=['POST'])
+@web.route('/modificar_educacion/<int:edu_id>', methods=['POST'])
 @login_required
 def modificar_educacion(edu_id):
-    edu = Educacion.query.get_or_404(edu_id)
+    edu = propio_o_404(Educacion, edu_id)
 
     form = EducacionForm()
 
@@ -284,30 +563,27 @@ def modificar_educacion(edu_id):
         # Si sube un nuevo logo, lo reemplaza
         if form.logo.data:
             file = form.logo.data
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = blob_store.guardar(file)
             edu.logo = filename
 
         db.session.commit()
         flash("Formación modificada correctamente.", "success")
 
-    return redirect(url_for("index"))
+    return volver_al_perfil()
 
 
 #---------------CURSOS SECCIONNN------------------
-@app.route('/agregar_curso', methods=['POST'])
+@web.route('/agregar_curso', methods=['POST'])
 @login_required
 def agregar_curso():
     form_curso= CursoForm()
 
     if not form_curso.validate_on_submit():
         flash("Error en el formulario del curso.", "danger")
-        return redirect(url_for("dashboard"))
-
-    usuario = Usuario.query.filter_by(username=session['user']).first()
+        return redirect(url_for("web.dashboard"))
 
     nuevo = Curso(
-        usuario_id=usuario.id,
+        usuario_id=current_user.id,
         nombre=form_curso.nombre.data,
         institucion=form_curso.institucion.data,
         periodo=form_curso.periodo.data,
@@ -318,25 +594,25 @@ def agregar_curso():
     db.session.commit()
 
     flash("Curso agregado correctamente.", "success")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
-@app.route('/eliminar_curso/<int:curso_id>', methods=['POST'])
+@web.route('/eliminar_curso/<int:curso_id>', methods=['POST'])
 @login_required
 def eliminar_curso(curso_id):
     form_elim_curso = EliminarCursoForm()
     
     if form_elim_curso.validate_on_submit():
-        curso = Curso.query.get_or_404(curso_id)
+        curso = propio_o_404(Curso, curso_id)
         db.session.delete(curso)
         db.session.commit()
         flash("Curso eliminado.", "info")
 
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
-@app.route('/modificar_curso/<int:curso_id>', methods=['POST'])
+@web.route('/modificar_curso/<int:curso_id>', methods=['POST'])
 @login_required
 def modificar_curso(curso_id):
-    curso = Curso.query.get_or_404(curso_id)
+    curso = propio_o_404(Curso, curso_id)
     form_modif_curso = EditarCursoForm()
 
     if form_modif_curso.validate_on_submit():
@@ -347,12 +623,12 @@ def modificar_curso(curso_id):
         db.session.commit()
         flash("Curso modificado correctamente.", "success")
 
-    return redirect(url_for("index"))
+    return volver_al_perfil()
 
 
 # ------------------- Proyectos -------------------
 #
-@app.route('/agregar_proyecto', methods=['POST'])
+@web.route('/agregar_proyecto', methods=['POST'])
 @login_required
 def agregar_proyecto():
     form_proyect= ProyectoForm()
@@ -360,11 +636,11 @@ def agregar_proyecto():
         imagen_filename = None
         if form_proyect.imagen.data:
             file = form_proyect.imagen.data
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = blob_store.guardar(file)
             imagen_filename = filename
 
         nuevo = Proyecto(
+            usuario_id=current_user.id,
             titulo=form_proyect.titulo.data,
             descripcion=form_proyect.descripcion.data,
             fecha=form_proyect.fecha.data,
@@ -374,13 +650,13 @@ def agregar_proyecto():
         db.session.add(nuevo)
         db.session.commit()
         flash("Proyecto agregado correctamente.", "success")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
-@app.route('/modificar_proyecto/<int:proy_id>', methods=['POST'])
+@web.route('/modificar_proyecto/<int:proy_id>', methods=['POST'])
 @login_required
 def modificar_proyecto(proy_id):
-    proyecto = Proyecto.query.get_or_404(proy_id)
+    proyecto = propio_o_404(Proyecto, proy_id)
     form_modif_proyect = ProyectoForm()
     if form_modif_proyect.validate_on_submit():
         proyecto.titulo = form_modif_proyect.titulo.data
@@ -390,28 +666,29 @@ def modificar_proyecto(proy_id):
 
         if form_modif_proyect.imagen.data:
             file = form_modif_proyect.imagen.data
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = blob_store.guardar(file)
             proyecto.imagen = filename
 
         db.session.commit()
         flash("Proyecto modificado correctamente.", "success")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
-@app.route('/eliminar_proyecto/<int:proy_id>', methods=['POST'])
+@web.route('/eliminar_proyecto/<int:proy_id>', methods=['POST'])
 @login_required
 def eliminar_proyecto(proy_id):
-    proyecto = Proyecto.query.get_or_404(proy_id)
+    proyecto = propio_o_404(Proyecto, proy_id)
     db.session.delete(proyecto)
     db.session.commit()
     flash("Proyecto eliminado.", "info")
-    return redirect(url_for('index'))
+    return volver_al_perfil()
 
 
 # ---------------------
 # Main
 # ---------------------
 if __name__ == '__main__':
-    inicializar_app()  # crea tablas y usuario único
+    app = create_app()
+    with app.app_context():
+        inicializar_db()  # crea tablas y usuario único
     app.run(debug=True)
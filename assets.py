@@ -0,0 +1,126 @@
+import os
+import json
+import shutil
+import hashlib
+import mimetypes
+import tempfile
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from compresion import precomprimir
+from http_cache import UN_ANIO
+
+
+# -------------------------------
+# Pipeline de assets estáticos
+# `flask assets-build` copia cada archivo de static/ a static/dist/ con el
+# hash en el nombre, genera sus .gz/.br y un manifest.json. Después,
+# url_for('static', filename='css/style.css') apunta a la copia con hash,
+# que se sirve comprimida según Accept-Encoding y cacheada por un año.
+# -------------------------------
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+# carpetas de static/ que no son assets del sitio (uploads de usuarios)
+EXCLUIDOS = {DIST_DIR, os.path.join('uploads', 'blobs'), os.path.join('uploads', 'variantes')}
+EXTENSIONES_COMPRIMIBLES = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico'}
+
+
+class AssetPipeline:
+    def __init__(self, app=None):
+        self.static_folder = None
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.cargar_manifest()
+        app.extensions['assets'] = self
+        app.url_defaults(self._url_con_hash)
+        # el endpoint 'static' sigue existiendo; solo cambia cómo responde
+        app.view_functions['static'] = self.servir
+
+    @property
+    def dist(self):
+        return os.path.join(self.static_folder, DIST_DIR)
+
+    def cargar_manifest(self):
+        try:
+            with open(os.path.join(self.dist, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.manifest = {}
+
+    # ---- build ----
+    def build(self):
+        """Genera static/dist y el manifest. Devuelve el manifest nuevo."""
+        manifest = {}
+        for carpeta, subcarpetas, archivos in os.walk(self.static_folder):
+            relativa = os.path.relpath(carpeta, self.static_folder)
+            subcarpetas[:] = [d for d in subcarpetas
+                              if os.path.normpath(os.path.join(relativa, d)) not in EXCLUIDOS]
+            for nombre in archivos:
+                origen = os.path.join(carpeta, nombre)
+                clave = os.path.normpath(os.path.join(relativa, nombre)).replace(os.sep, '/')
+                manifest[clave] = self._copiar(origen, clave)
+
+        os.makedirs(self.dist, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.dist)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(self.dist, MANIFEST))
+        self.manifest = manifest
+        return manifest
+
+    def _copiar(self, origen, clave):
+        with open(origen, 'rb') as f:
+            datos = f.read()
+        stem, ext = os.path.splitext(clave)
+        destino_rel = f'{stem}.{hashlib.sha256(datos).hexdigest()[:12]}{ext}'
+        destino = os.path.join(self.dist, destino_rel)
+        if not os.path.exists(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            shutil.copyfile(origen, destino)
+            if ext.lower() in EXTENSIONES_COMPRIMIBLES:
+                # solo se guardan si realmente achican el archivo
+                for sufijo, comprimido in precomprimir(datos).items():
+                    if len(comprimido) < len(datos):
+                        with open(destino + sufijo, 'wb') as f:
+                            f.write(comprimido)
+        return f'{DIST_DIR}/{destino_rel}'
+
+    # ---- url_for ----
+    def _url_con_hash(self, endpoint, values):
+        if endpoint == 'static' and self.manifest:
+            con_hash = self.manifest.get(values.get('filename'))
+            if con_hash:
+                values['filename'] = con_hash
+
+    # ---- servir ----
+    def servir(self, filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return current_app.send_static_file(filename)
+
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        encoding = None
+        for nombre, ext in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[nombre] and os.path.isfile(path + ext):
+                encoding, path = nombre, path + ext
+                break
+
+        # el nombre lleva el hash: el contenido bajo esta URL no cambia nunca
+        response = send_file(path, mimetype=mimetype, conditional=True, max_age=UN_ANIO)
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+        return response
+
+
+asset_pipeline = AssetPipeline()
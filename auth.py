@@ -0,0 +1,99 @@
+import time
+import threading
+
+from flask_login import LoginManager, UserMixin, current_user, login_user
+from sqlalchemy import event
+
+from models import db, Usuario
+
+
+# -------------------------------
+# Identidad de la sesión (Flask-Login)
+# El user_loader no devuelve el objeto ORM sino una "foto" liviana del
+# usuario, cacheada entre requests con un TTL corto. Flask-Login además la
+# guarda por request en g, así que resolver quién está logueado no cuesta
+# ninguna consulta mientras la entrada esté vigente.
+# -------------------------------
+login_manager = LoginManager()
+login_manager.login_view = 'web.login'
+login_manager.login_message = 'Debes iniciar sesión para acceder a esa página.'
+login_manager.login_message_category = 'warning'
+
+
+class UsuarioSesion(UserMixin):
+    """Datos mínimos del usuario logueado (inmutable, segura entre hilos)."""
+
+    def __init__(self, usuario):
+        self.id = usuario.id
+        self.username = usuario.username
+        self.nombre_publico = usuario.nombre_publico
+        self.profile_image = usuario.profile_image
+
+
+class IdentityCache:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entrada = self._datos.get(user_id)
+        if entrada is None:
+            return None
+        vence, identidad = entrada
+        if vence < time.monotonic():
+            self.invalidar(user_id)
+            return None
+        return identidad
+
+    def set(self, user_id, identidad):
+        with self._lock:
+            self._datos[user_id] = (time.monotonic() + self.ttl, identidad)
+
+    def invalidar(self, user_id):
+        with self._lock:
+            self._datos.pop(user_id, None)
+
+
+identity_cache = IdentityCache()
+
+
+def iniciar_sesion(usuario):
+    """``login_user`` con la identidad liviana (y ya cacheada)."""
+    identidad = UsuarioSesion(usuario)
+    identity_cache.set(usuario.id, identidad)
+    return login_user(identidad)
+
+
+def init_app(app):
+    login_manager.init_app(app)
+    identity_cache.ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+
+
+@login_manager.user_loader
+def cargar_identidad(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    identidad = identity_cache.get(user_id)
+    if identidad is not None:
+        return identidad
+    usuario = db.session.get(Usuario, user_id)
+    if usuario is None:
+        return None
+    identidad = UsuarioSesion(usuario)
+    identity_cache.set(user_id, identidad)
+    return identidad
+
+
+def usuario_actual():
+    """``Usuario`` ORM del usuario logueado (una consulta por PK)."""
+    return db.session.get(Usuario, current_user.id)
+
+
+# Al guardar o borrar un usuario su foto cacheada queda vieja
+@event.listens_for(Usuario, 'after_update', propagate=True)
+@event.listens_for(Usuario, 'after_delete', propagate=True)
+def _invalidar_identidad(mapper, connection, target):
+    identity_cache.invalidar(target.id)
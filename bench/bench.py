@@ -0,0 +1,408 @@
+"""Benchmark reproducible de las rutas calientes.
+
+Levanta la app contra un SQLite descartable, siembra usuario, experiencia,
+educacion, curso y proyecto con N filas por escala y mide throughput y
+latencia (p50/p90/p99) de index(), login(), /uploads y las rutas de
+escritura, con el test client de Flask y con un servidor WSGI real.
+
+Uso:
+    python bench/bench.py                       # escalas 10 y 1000
+    python bench/bench.py --escalas 10,1000,100000 --requests 100
+    python bench/compare.py bench/results/A.json bench/results/B.json
+
+Cada escala corre en un proceso aparte (Config se lee al importar config.py).
+El resultado queda en bench/results/<fecha>-<commit>.json.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTADOS = os.path.join(RAIZ, 'bench', 'results')
+IMAGEN = os.path.join(RAIZ, 'static', 'uploads', 'daer.png')
+PASSWORD = '123456'
+
+
+# -------------------------------
+# Estadísticas
+# -------------------------------
+def percentil(ordenados, p):
+    """Percentil por rango más cercano (sin interpolar)."""
+    if not ordenados:
+        return None
+    k = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[k]
+
+
+def resumir(latencias, total, errores):
+    ordenados = sorted(latencias)
+    return {
+        'requests': len(latencias),
+        'errores': errores,
+        'segundos': round(total, 4),
+        'rps': round(len(latencias) / total, 2) if total else None,
+        'p50_ms': round(percentil(ordenados, 50) * 1000, 3),
+        'p90_ms': round(percentil(ordenados, 90) * 1000, 3),
+        'p99_ms': round(percentil(ordenados, 99) * 1000, 3),
+        'media_ms': round(sum(ordenados) / len(ordenados) * 1000, 3),
+    }
+
+
+# -------------------------------
+# Datos de prueba
+# -------------------------------
+def sembrar(escala, password_hash):
+    """Inserta `escala` filas en cada tabla (bulk, sin pasar por el ORM)."""
+    from sqlalchemy import insert
+    from models import db, Usuario, Experiencia, Educacion, Curso, Proyecto
+
+    db.session.execute(insert(Usuario), [
+        {'username': 'daer' if i == 0 else f'usuario{i}', 'password': password_hash,
+         'nombre_publico': f'Usuario {i}', 'profile_image': 'daer.png'}
+        for i in range(escala)
+    ])
+    daer_id = db.session.execute(db.select(Usuario.id).filter_by(username='daer')).scalar_one()
+    db.session.execute(insert(Experiencia), [
+        {'usuario_id': daer_id, 'proyecto': f'Proyecto {i}', 'descripcion': 'Descripción ' * 8,
+         'puesto': 'Desarrolladora', 'periodo': '2023 - 2024', 'logros': 'Logros ' * 8}
+        for i in range(escala)
+    ])
+    db.session.execute(insert(Educacion), [
+        {'usuario_id': daer_id, 'titulo': f'Título {i}', 'institucion': 'ITR',
+         'periodo': '2020 - 2023', 'estado': 'Completo', 'logo': 'daer.png'}
+        for i in range(escala)
+    ])
+    db.session.execute(insert(Curso), [
+        {'usuario_id': daer_id, 'nombre': f'Curso {i}', 'institucion': 'Plataforma',
+         'periodo': '2024', 'certificacion_url': 'https://example.com/cert'}
+        for i in range(escala)
+    ])
+    db.session.execute(insert(Proyecto), [
+        {'usuario_id': daer_id, 'titulo': f'Proyecto {i}', 'descripcion': 'Un proyecto', 'fecha': '2024',
+         'github_url': 'https://github.com/ejemplo/proyecto', 'imagen': 'daer.png'}
+        for i in range(escala)
+    ])
+    db.session.commit()
+    return daer_id
+
+
+def crear_para_borrar(modelo, cantidad, daer_id):
+    """Filas extra (fuera de la medición) que consumen los escenarios eliminar_*."""
+    from sqlalchemy import insert
+    from models import db, Experiencia, Educacion, Curso
+
+    valores = {
+        Experiencia: {'usuario_id': daer_id, 'proyecto': 'x', 'descripcion': 'x',
+                      'puesto': 'x', 'periodo': 'x', 'logros': 'x'},
+        Educacion: {'usuario_id': daer_id, 'titulo': 'x', 'institucion': 'x'},
+        Curso: {'usuario_id': daer_id, 'nombre': 'x', 'institucion': 'x'},
+    }.get(modelo, {'usuario_id': daer_id, 'titulo': 'x', 'github_url': 'x'})
+    ids = db.session.execute(
+        insert(modelo).returning(modelo.id), [dict(valores) for _ in range(cantidad)]
+    ).scalars().all()
+    db.session.commit()
+    return list(ids)
+
+
+# -------------------------------
+# Escenarios
+# -------------------------------
+class Escenario:
+    def __init__(self, nombre, metodo, ruta, datos=None, admin=False, archivo=None, borra=None):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta            # str o función(id) -> str
+        self.datos = datos or {}
+        self.admin = admin
+        self.archivo = archivo      # nombre del campo de archivo (multipart)
+        self.borra = borra          # modelo cuyas filas se consumen
+
+
+def escenarios():
+    from models import Experiencia, Educacion, Curso, Proyecto
+
+    experiencia = {'proyecto': 'Bench', 'descripcion': 'Medición', 'puesto': 'Dev',
+                   'periodo': '2024', 'logros': 'Ninguno'}
+    educacion = {'titulo': 'Bench', 'institucion': 'ITR', 'periodo': '2024', 'estado': 'En curso'}
+    curso = {'nombre': 'Bench', 'institucion': 'ITR', 'periodo': '2024', 'certificacion_url': ''}
+    proyecto = {'titulo': 'Bench', 'descripcion': 'Medición', 'fecha': '2024',
+                'github_url': 'https://github.com/ejemplo/bench'}
+    return [
+        Escenario('index_anonimo', 'GET', '/'),
+        Escenario('index_admin', 'GET', '/', admin=True),
+        Escenario('login', 'POST', '/login', {'username': 'daer', 'password': PASSWORD}),
+        Escenario('uploads', 'GET', '/uploads/daer.png'),
+        Escenario('dashboard', 'GET', '/dashboard', admin=True),
+        Escenario('dashboard_post', 'POST', '/dashboard', {'nombre_publico': 'Daer'},
+                  admin=True, archivo='profile_image'),
+        Escenario('editar_acerca', 'POST', '/editar-acerca', {'acerca': 'Texto de prueba'}, admin=True),
+        Escenario('agregar_experiencia', 'POST', '/agregar_experiencia', experiencia, admin=True),
+        Escenario('modificar_experiencia', 'POST', '/modificar_experiencia/1', experiencia, admin=True),
+        Escenario('eliminar_experiencia', 'POST', lambda i: f'/eliminar_experiencia/{i}',
+                  admin=True, borra=Experiencia),
+        Escenario('agregar_educacion', 'POST', '/agregar_educacion', educacion, admin=True, archivo='logo'),
+        Escenario('modificar_educacion', 'POST', '/modificar_educacion/1', educacion, admin=True),
+        Escenario('eliminar_educacion', 'POST', lambda i: f'/educacion/eliminar/{i}',
+                  admin=True, borra=Educacion),
+        Escenario('agregar_curso', 'POST', '/agregar_curso', curso, admin=True),
+        Escenario('modificar_curso', 'POST', '/modificar_curso/1', curso, admin=True),
+        Escenario('eliminar_curso', 'POST', lambda i: f'/eliminar_curso/{i}', admin=True, borra=Curso),
+        Escenario('agregar_proyecto', 'POST', '/agregar_proyecto', proyecto, admin=True, archivo='imagen'),
+        Escenario('modificar_proyecto', 'POST', '/modificar_proyecto/1', proyecto, admin=True),
+        Escenario('eliminar_proyecto', 'POST', lambda i: f'/eliminar_proyecto/{i}',
+                  admin=True, borra=Proyecto),
+    ]
+
+
+# -------------------------------
+# Clientes
+# -------------------------------
+class ClienteFlask:
+    """Test client de Flask: mide la app sin red ni servidor."""
+
+    nombre = 'test_client'
+
+    def __init__(self, app, imagen):
+        self.app = app
+        self.imagen = imagen
+        self.anonimo = app.test_client()
+        self.admin = app.test_client()
+        self.admin.post('/login', data={'username': 'daer', 'password': PASSWORD})
+
+    def pedir(self, escenario, ruta):
+        cliente = self.admin if escenario.admin else self.anonimo
+        datos = dict(escenario.datos)
+        if escenario.archivo:
+            datos[escenario.archivo] = (io.BytesIO(self.imagen), 'bench.png')
+        respuesta = cliente.open(ruta, method=escenario.metodo, data=datos)
+        respuesta.close()
+        return respuesta.status_code
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # se mide solo la ruta, no la página a la que redirige
+
+
+def _multipart(datos, campo, contenido):
+    limite = f'bench{os.urandom(8).hex()}'
+    partes = []
+    for k, v in datos.items():
+        partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode())
+    partes.append(
+        f'--{limite}\r\nContent-Disposition: form-data; name="{campo}"; filename="bench.png"\r\n'
+        f'Content-Type: image/png\r\n\r\n'.encode() + contenido + b'\r\n'
+    )
+    partes.append(f'--{limite}--\r\n'.encode())
+    return b''.join(partes), f'multipart/form-data; boundary={limite}'
+
+
+class ClienteWSGI:
+    """Servidor WSGI real (werkzeug, con hilos) y requests HTTP por socket."""
+
+    nombre = 'wsgi'
+
+    def __init__(self, app, imagen):
+        from werkzeug.serving import make_server
+        self.imagen = imagen
+        self.servidor = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base = f'http://127.0.0.1:{self.servidor.server_port}'
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.anonimo = urllib.request.build_opener(_SinRedirecciones())
+        self.admin = urllib.request.build_opener(
+            _SinRedirecciones(), urllib.request.HTTPCookieProcessor(CookieJar()))
+        self._abrir(self.admin, 'POST', '/login', *self._form({'username': 'daer', 'password': PASSWORD}))
+
+    def cerrar(self):
+        self.servidor.shutdown()
+
+    @staticmethod
+    def _form(datos):
+        return urllib.parse.urlencode(datos).encode(), 'application/x-www-form-urlencoded'
+
+    def _abrir(self, opener, metodo, ruta, cuerpo=None, tipo=None):
+        pedido = urllib.request.Request(self.base + ruta, data=cuerpo, method=metodo)
+        if tipo:
+            pedido.add_header('Content-Type', tipo)
+        try:
+            with opener.open(pedido, timeout=60) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def pedir(self, escenario, ruta):
+        opener = self.admin if escenario.admin else self.anonimo
+        cuerpo = tipo = None
+        if escenario.metodo == 'POST':
+            if escenario.archivo:
+                cuerpo, tipo = _multipart(escenario.datos, escenario.archivo, self.imagen)
+            else:
+                cuerpo, tipo = self._form(escenario.datos)
+        return self._abrir(opener, escenario.metodo, ruta, cuerpo, tipo)
+
+
+# -------------------------------
+# Ejecución de una escala (proceso hijo)
+# -------------------------------
+def medir(cliente, escenario, rutas, concurrencia):
+    latencias = []
+    errores = 0
+    lock = threading.Lock()
+
+    def uno(ruta):
+        nonlocal errores
+        inicio = time.perf_counter()
+        status = cliente.pedir(escenario, ruta)
+        duracion = time.perf_counter() - inicio
+        with lock:
+            latencias.append(duracion)
+            if status >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    if concurrencia > 1:
+        with ThreadPoolExecutor(concurrencia) as pool:
+            list(pool.map(uno, rutas))
+    else:
+        for ruta in rutas:
+            uno(ruta)
+    return resumir(latencias, time.perf_counter() - inicio, errores)
+
+
+def correr_escala(args):
+    directorio = tempfile.mkdtemp(prefix='portfolio-bench-')
+    uploads = os.path.join(directorio, 'uploads')
+    os.makedirs(uploads)
+    shutil.copy(IMAGEN, os.path.join(uploads, 'daer.png'))
+    os.environ.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.join(directorio, 'bench.db'),
+        'UPLOAD_FOLDER': uploads,
+        'PAGE_CACHE_DIR': os.path.join(directorio, 'page_cache'),
+        'BCRYPT_LOG_ROUNDS': str(args.bcrypt_rounds),
+        'FREEZE_AUTO': '0',
+        # el throttle de login cortaría el escenario con 429
+        'LOGIN_IP_BURST': '1000000000', 'LOGIN_IP_PER_MINUTE': '1000000000',
+        'LOGIN_USER_BURST': '1000000000', 'LOGIN_USER_PER_MINUTE': '1000000000',
+    })
+    sys.path.insert(0, RAIZ)
+    try:
+        from flask_migrate import upgrade
+        from app import create_app, bcrypt
+        from models import db
+
+        app = create_app()
+        app.config['WTF_CSRF_ENABLED'] = False
+        with app.app_context():
+            upgrade(directory=os.path.join(RAIZ, 'migrations'))
+            password_hash = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+            t0 = time.perf_counter()
+            daer_id = sembrar(args.escala, password_hash)
+            siembra = time.perf_counter() - t0
+
+        with open(IMAGEN, 'rb') as f:
+            imagen = f.read()
+
+        resultados = []
+        clientes = [ClienteFlask(app, imagen), ClienteWSGI(app, imagen)]
+        try:
+            for cliente in clientes:
+                concurrencia = args.concurrencia if cliente.nombre == 'wsgi' else 1
+                for escenario in escenarios():
+                    if args.solo and escenario.nombre not in args.solo:
+                        continue
+                    n, cal = args.requests, args.calentamiento
+                    if escenario.borra is not None:
+                        with app.app_context():
+                            ids = crear_para_borrar(escenario.borra, cal + n, daer_id)
+                        rutas = [escenario.ruta(i) for i in ids]
+                    else:
+                        rutas = [escenario.ruta] * (cal + n)
+                    for ruta in rutas[:cal]:
+                        cliente.pedir(escenario, ruta)
+                    rutas = rutas[cal:]
+                    if not rutas:
+                        continue
+                    r = medir(cliente, escenario, rutas, concurrencia)
+                    r.update(escala=args.escala, cliente=cliente.nombre,
+                             escenario=escenario.nombre, concurrencia=concurrencia)
+                    resultados.append(r)
+                    print(f"  {args.escala:>7} {cliente.nombre:<12} {escenario.nombre:<22} "
+                          f"{r['rps']:>9} req/s  p50 {r['p50_ms']:>8} ms  p99 {r['p99_ms']:>8} ms"
+                          f"{'  errores: %d' % r['errores'] if r['errores'] else ''}",
+                          file=sys.stderr, flush=True)
+        finally:
+            clientes[1].cerrar()
+        json.dump({'escala': args.escala, 'siembra_segundos': round(siembra, 3),
+                   'resultados': resultados}, sys.stdout)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# -------------------------------
+# Orquestación
+# -------------------------------
+def _commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--escalas', default='10,1000', help='filas por tabla, separadas por coma')
+    parser.add_argument('--requests', type=int, default=200, help='requests medidos por escenario')
+    parser.add_argument('--calentamiento', type=int, default=5, help='requests previos no medidos')
+    parser.add_argument('--concurrencia', type=int, default=4, help='hilos cliente contra el servidor WSGI')
+    parser.add_argument('--bcrypt-rounds', type=int, default=12, help='costo de bcrypt (BCRYPT_LOG_ROUNDS)')
+    parser.add_argument('--solo', type=lambda s: set(s.split(',')), help='escenarios a correr')
+    parser.add_argument('--salida', help='archivo JSON (por defecto bench/results/<fecha>-<commit>.json)')
+    parser.add_argument('--escala', type=int, help=argparse.SUPPRESS)  # proceso hijo
+    args = parser.parse_args(argv)
+
+    if args.escala is not None:
+        correr_escala(args)
+        return 0
+
+    commit = _commit()
+    informe = {
+        'commit': commit,
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {k: (sorted(v) if isinstance(v, set) else v)
+                       for k, v in vars(args).items() if k not in ('escala', 'salida')},
+        'escalas': [],
+    }
+    for escala in (int(e) for e in args.escalas.split(',')):
+        print(f'Escala {escala}', file=sys.stderr, flush=True)
+        comando = [sys.executable, os.path.abspath(__file__), '--escala', str(escala)]
+        comando += [a for a in (argv if argv is not None else sys.argv[1:])]
+        salida = subprocess.run(comando, stdout=subprocess.PIPE, check=True, text=True).stdout
+        informe['escalas'].append(json.loads(salida))
+
+    destino = args.salida or os.path.join(RESULTADOS, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino, 'w') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f'📊 Resultados en {destino}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
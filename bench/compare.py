@@ -0,0 +1,75 @@
+"""Compara dos corridas de bench/bench.py.
+
+    python bench/compare.py base.json nuevo.json [--umbral 0.10] [--metrica p99_ms]
+
+Muestra la variación de rps, p50 y p99 por (escala, cliente, escenario).
+Sale con código 1 si alguna métrica empeora más que el umbral, para poder
+cortar un CI o un cambio de performance con números.
+"""
+import sys
+import json
+import argparse
+
+
+def _indexar(informe):
+    filas = {}
+    for escala in informe['escalas']:
+        for r in escala['resultados']:
+            filas[(r['escala'], r['cliente'], r['escenario'])] = r
+    return filas
+
+
+def _variacion(antes, despues):
+    if not antes:
+        return None
+    return (despues - antes) / antes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help='regresión máxima tolerada (0.10 = 10%%)')
+    parser.add_argument('--metrica', default='p99_ms', choices=('p50_ms', 'p90_ms', 'p99_ms', 'rps'),
+                        help='métrica que decide el código de salida')
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.nuevo) as f:
+        nuevo = json.load(f)
+    antes, despues = _indexar(base), _indexar(nuevo)
+
+    print(f"{base['commit']} -> {nuevo['commit']}")
+    print(f"{'escala':>7} {'cliente':<12} {'escenario':<22} {'rps':>9} {'p50':>9} {'p99':>9}")
+    regresiones = []
+    for clave in sorted(antes.keys() & despues.keys()):
+        a, d = antes[clave], despues[clave]
+        cambios = {m: _variacion(a[m], d[m]) for m in ('rps', 'p50_ms', 'p99_ms', args.metrica)}
+        celdas = ' '.join(f"{cambios[m] * 100:>+8.1f}%" if cambios[m] is not None else f"{'-':>9}"
+                          for m in ('rps', 'p50_ms', 'p99_ms'))
+        print(f'{clave[0]:>7} {clave[1]:<12} {clave[2]:<22} {celdas}')
+
+        cambio = cambios[args.metrica]
+        if cambio is None:
+            continue
+        # para rps, peor es menor; para latencias, peor es mayor
+        empeora = -cambio if args.metrica == 'rps' else cambio
+        if empeora > args.umbral:
+            regresiones.append((clave, cambio))
+
+    faltantes = antes.keys() - despues.keys()
+    if faltantes:
+        print(f'\n⚠️  {len(faltantes)} escenarios de la base no están en la corrida nueva')
+    if regresiones:
+        print(f'\n❌ {len(regresiones)} regresiones en {args.metrica} (umbral {args.umbral:.0%}):')
+        for (escala, cliente, escenario), cambio in regresiones:
+            print(f'   {escala} {cliente} {escenario}: {cambio * 100:+.1f}%')
+        return 1
+    print(f'\n✅ sin regresiones en {args.metrica} por encima de {args.umbral:.0%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
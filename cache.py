@@ -0,0 +1,370 @@
+import os
+import hashlib
+import tempfile
+import threading
+from itertools import chain
+from contextlib import contextmanager
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from markupsafe import Markup
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+# -------------------------------
+# Cache de páginas completas para visitantes anónimos.
+# La clave de cada entrada incluye la "versión de contenido": cualquier
+# commit que modifique filas la incrementa y deja obsoleto todo lo cacheado.
+#
+# Además hay "grupos" con su propio contador de versión:
+# - uno por perfil (la página /u/<username> de cada usuario), y
+# - uno por sección de cada perfil (experiencias, cursos, proyectos...),
+#   cacheada como fragmento: editar un curso solo obliga a re-renderizar la
+#   sección de cursos de ese perfil; los demás perfiles no se enteran.
+# El grupo TODO entra en todas las claves y descarta todo de una vez
+# (p. ej. cuando terminan de generarse las variantes de una imagen).
+# -------------------------------
+# tabla -> sección de index.html cuyo fragmento invalida
+SECCIONES = {
+    'experiencia': 'experiencias',
+    'educacion': 'educacion',
+    'curso': 'cursos',
+    'proyecto': 'proyectos',
+}
+TABLAS_USUARIO = {'usuario', 'admin_user'}
+TODO = 'todo'
+
+
+def grupo_perfil(usuario_id):
+    return f'perfil-{usuario_id}'
+
+
+def usuario_de_grupo(grupo):
+    """Inversa de grupo_perfil: el id del usuario, o None si es otro tipo de grupo."""
+    prefijo, _, usuario_id = (grupo or '').partition('-')
+    return int(usuario_id) if prefijo == 'perfil' and usuario_id.isdigit() else None
+
+
+def grupo_seccion(seccion, usuario_id):
+    return f'{seccion}-{usuario_id}'
+
+
+class MemoriaBackend:
+    """LRU en memoria del proceso (un worker)."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._datos = OrderedDict()
+        self._versiones = {}  # grupo -> contador (None = páginas)
+        # distingue este proceso: tras un reinicio el contador vuelve a 0 y
+        # una versión "3" vieja no debe confundirse con la nueva (ETags de la API)
+        self._token = os.urandom(4).hex()
+        self._lock = threading.Lock()
+
+    def get(self, key, grupo=None):
+        key = (grupo, key)
+        with self._lock:
+            valor = self._datos.get(key)
+            if valor is not None:
+                self._datos.move_to_end(key)
+            return valor
+
+    def set(self, key, valor, grupo=None):
+        key = (grupo, key)
+        with self._lock:
+            self._datos[key] = valor
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.max_entries:
+                self._datos.popitem(last=False)
+
+    def clear(self, grupo=None):
+        with self._lock:
+            for key in [k for k in self._datos if k[0] == grupo]:
+                del self._datos[key]
+
+    def vaciar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def get_version(self, grupo=None):
+        return f'{self._token}-{self._versiones.get(grupo, 0)}'
+
+    def bump_version(self, grupo=None):
+        with self._lock:
+            self._versiones[grupo] = self._versiones.get(grupo, 0) + 1
+        # las entradas viejas del grupo ya no se van a pedir: liberamos memoria
+        self.clear(grupo)
+        return self.get_version(grupo)
+
+
+class DiscoBackend:
+    """Cache compartida en disco para despliegues con varios workers.
+
+    La versión vive en un archivo dentro del mismo directorio, así un commit
+    en cualquier worker invalida la cache de todos. Delante del disco hay un
+    LRU en memoria para no leer el archivo en cada request.
+    """
+
+    VERSION_FILE = 'VERSION'
+    CANDADO = 'VERSION.lock'
+
+    def __init__(self, directorio, max_entries=128):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._memoria = MemoriaBackend(max_entries)
+        self._lock = threading.Lock()
+
+    def _path(self, key, grupo=None):
+        nombre = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f'{grupo or "pagina"}-{nombre}.cache')
+
+    def _version_path(self, grupo=None):
+        if grupo is None:
+            return os.path.join(self.directorio, self.VERSION_FILE)
+        return os.path.join(self.directorio, f'{self.VERSION_FILE}-{grupo}')
+
+    def _escribir_atomico(self, path, datos):
+        fd, tmp = tempfile.mkstemp(dir=self.directorio)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(datos)
+        os.replace(tmp, path)
+
+    def get(self, key, grupo=None):
+        valor = self._memoria.get(key, grupo)
+        if valor is not None:
+            return valor
+        try:
+            with open(self._path(key, grupo), 'rb') as f:
+                valor = f.read()
+        except FileNotFoundError:
+            return None
+        self._memoria.set(key, valor, grupo)
+        return valor
+
+    def set(self, key, valor, grupo=None):
+        self._escribir_atomico(self._path(key, grupo), valor)
+        self._memoria.set(key, valor, grupo)
+
+    def clear(self, grupo=None):
+        self._memoria.clear(grupo)
+        prefijo = f'{grupo or "pagina"}-'
+        for nombre in os.listdir(self.directorio):
+            if nombre.startswith(prefijo) and nombre.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                except FileNotFoundError:
+                    pass
+
+    def vaciar(self):
+        self._memoria.vaciar()
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                except FileNotFoundError:
+                    pass
+
+    def get_version(self, grupo=None):
+        try:
+            with open(self._version_path(grupo), 'r') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @contextmanager
+    def _bloqueado(self):
+        # leer-sumar-escribir la versión: entre hilos (lock) y entre workers (flock)
+        with self._lock, open(os.path.join(self.directorio, self.CANDADO), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def bump_version(self, grupo=None):
+        with self._bloqueado():
+            version = self.get_version(grupo) + 1
+            self._escribir_atomico(self._version_path(grupo), str(version).encode('ascii'))
+        self.clear(grupo)
+        return version
+
+
+class PageCache:
+    """Guarda HTML renderizado indexado por (clave, versión de contenido)."""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.enabled = False
+        self._render_locks = {}  # clave -> [lock, requests que lo usan]
+        self._locks_lock = threading.Lock()
+        self._callbacks = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        max_entries = app.config.get('PAGE_CACHE_MAX_ENTRIES', 128)
+        if app.config.get('PAGE_CACHE_BACKEND', 'memoria') == 'disco':
+            self.backend = DiscoBackend(app.config['PAGE_CACHE_DIR'], max_entries)
+        else:
+            self.backend = MemoriaBackend(max_entries)
+        app.extensions['page_cache'] = self
+        app.jinja_env.globals['fragmento'] = self.fragmento
+
+    @property
+    def version(self):
+        return self.backend.get_version()
+
+    @property
+    def compartida(self):
+        """True si la versión de contenido es la misma en todos los workers."""
+        return isinstance(self.backend, DiscoBackend)
+
+    def invalidar(self, grupos=(), todo=False):
+        """Incrementa la versión de contenido (se llama tras cada escritura).
+
+        ``grupos`` son los perfiles y secciones que también quedan obsoletos
+        (ver grupo_perfil/grupo_seccion); el resto se sigue sirviendo desde
+        la cache. ``todo=True`` descarta todo lo cacheado.
+        """
+        if self.backend is None:
+            return None
+        for grupo in grupos:
+            self.backend.bump_version(grupo)
+        if todo:
+            self.backend.bump_version(TODO)
+            self.backend.vaciar()
+        version = self.backend.bump_version()
+        for callback in self._callbacks:
+            callback(grupos)
+        return version
+
+    def al_invalidar(self, callback):
+        """Registra una función a llamar cada vez que cambia el contenido.
+
+        Recibe los grupos invalidados (vacío si no se sabe cuáles).
+        """
+        self._callbacks.append(callback)
+
+    @contextmanager
+    def _render_lock(self, key):
+        """Un render a la vez por clave; claves distintas se renderizan en paralelo."""
+        with self._locks_lock:
+            entrada = self._render_locks.setdefault(key, [threading.Lock(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entrada[1] -= 1
+                if not entrada[1]:
+                    del self._render_locks[key]
+
+    def _clave(self, key, grupo):
+        return (key, self.backend.get_version(grupo), self.backend.get_version(TODO))
+
+    def obtener_o_generar(self, key, generar, grupo=None):
+        """Devuelve el HTML cacheado o lo genera una sola vez.
+
+        Sin ``grupo`` la entrada vence con cualquier escritura; con
+        ``grupo=grupo_perfil(id)`` solo cuando cambia ese perfil.
+        El lock (por clave) evita que un pico de tráfico justo después de una
+        edición dispare N renders de la misma página (y N consultas a MySQL)
+        en paralelo, sin frenar los de otros perfiles.
+        """
+        if not self.enabled:
+            return generar()
+        return self.obtener_bytes(key, lambda: generar().encode('utf-8'), grupo).decode('utf-8')
+
+    def obtener_bytes(self, key, generar, grupo=None):
+        """Como ``obtener_o_generar`` para valores que ya son bytes (p. ej. HTML comprimido).
+
+        ``obtener_bytes(key, ...)`` y ``obtener_o_generar(key, ...)`` comparten
+        la entrada: son el mismo HTML en UTF-8.
+        """
+        if not self.enabled:
+            return generar()
+        key = self._clave(key, grupo)
+        valor = self.backend.get(key, grupo)
+        if valor is not None:
+            return valor
+        with self._render_lock(key):
+            valor = self.backend.get(key, grupo)
+            if valor is None:
+                valor = generar()
+                self.backend.set(key, valor, grupo)
+            return valor
+
+    def fragmento(self, seccion, usuario_id, admin, caller):
+        """Cache de una sección de un template.
+
+        Uso: ``{% call fragmento('cursos', usuario.id, puede_editar) %}...{% endcall %}``.
+        Hay una variante para visitantes y otra para el dueño del perfil;
+        las dos se descartan cuando cambia la versión de la sección.
+        """
+        if not self.enabled:
+            return caller()
+        grupo = grupo_seccion(seccion, usuario_id)
+        key = self._clave('admin' if admin else 'anonimo', grupo)
+        html = self.backend.get(key, grupo)
+        if html is None:
+            html = str(caller()).encode('utf-8')
+            self.backend.set(key, html, grupo)
+        return Markup(html.decode('utf-8'))
+
+
+page_cache = PageCache()
+
+
+# -------------------------------
+# Invalidación automática: cualquier commit que haya escrito filas
+# (rutas agregar_*/modificar_*/eliminar_*, BaseModel.save(), etc.)
+# incrementa la versión de contenido y la de los perfiles y secciones
+# tocados.
+# -------------------------------
+def _grupos_de(obj):
+    tabla = getattr(obj, '__tablename__', None)
+    if tabla in TABLAS_USUARIO:
+        return (grupo_perfil(obj.id),)
+    seccion = SECCIONES.get(tabla)
+    if seccion and obj.usuario_id is not None:
+        return (grupo_perfil(obj.usuario_id), grupo_seccion(seccion, obj.usuario_id))
+    return ()
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_cambios(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info['contenido_modificado'] = True
+        grupos = session.info.setdefault('grupos_modificados', set())
+        for obj in chain(session.new, session.dirty, session.deleted):
+            grupos.update(_grupos_de(obj))
+
+
+def marcar_modificado(session, tabla, usuario_id):
+    """Para escrituras en lote (``update()``/``delete()`` sobre la tabla), que
+    no pasan por el flush: invalida la sección de ``usuario_id`` al commitear."""
+    session.info['contenido_modificado'] = True
+    grupos = session.info.setdefault('grupos_modificados', set())
+    seccion = SECCIONES.get(tabla)
+    grupos.add(grupo_perfil(usuario_id))
+    if seccion:
+        grupos.add(grupo_seccion(seccion, usuario_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_tras_commit(session):
+    grupos = session.info.pop('grupos_modificados', ())
+    if session.info.pop('contenido_modificado', False):
+        page_cache.invalidar(grupos)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marca(session):
+    session.info.pop('contenido_modificado', None)
+    session.info.pop('grupos_modificados', None)
@@ -0,0 +1,180 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # sin brotli se negocia solo gzip (y se precomprime solo .gz)
+    brotli = None
+
+from flask import current_app, g, get_flashed_messages, render_template, request, stream_template
+from markupsafe import Markup
+
+from cache import page_cache
+
+
+# -------------------------------
+# HTML por partes y comprimido (index() / perfil() y dashboard())
+# El template se renderiza con stream_template y cada parte pasa por un
+# compresor incremental (br o gzip, según Accept-Encoding). En los puntos
+# que el template marca con {{ punto_de_envio() }} (fin del <header>, fin
+# de "Acerca de mí") se hace un flush: el navegador recibe el <head> y la
+# foto de perfil y empieza a bajar CSS e imágenes mientras se renderizan
+# experiencias, cursos y proyectos.
+# Los niveles son los de contenido dinámico (se comprime en cada request):
+# br 5 / gzip 6 comprimen casi como los máximos en una fracción del tiempo.
+# Las páginas de la cache se guardan también ya comprimidas (ver
+# responder_cacheado): se comprimen una vez por versión, no por request.
+# -------------------------------
+MARCA_ENVIO = '<!--envio-->'
+TAMANIO_BUFFER = 16 * 1024  # sin compresión, se junta hasta esto antes de escribir
+
+
+class _Identidad:
+    """Mismo protocolo que los compresores, sin comprimir: solo agrupa escrituras."""
+
+    def __init__(self):
+        self._partes = []
+        self._tamanio = 0
+
+    def process(self, datos):
+        self._partes.append(datos)
+        self._tamanio += len(datos)
+        return self.flush() if self._tamanio >= TAMANIO_BUFFER else b''
+
+    def flush(self):
+        datos = b''.join(self._partes)
+        self._partes, self._tamanio = [], 0
+        return datos
+
+    finish = flush
+
+
+class _Gzip:
+    def __init__(self, nivel):
+        # wbits=31: formato gzip (no zlib crudo)
+        self._z = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def process(self, datos):
+        return self._z.compress(datos)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class RespuestasHTML:
+    def __init__(self, app=None):
+        self.por_partes = True
+        self.comprimir = True
+        self.nivel_gzip = 6
+        self.calidad_br = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.por_partes = app.config.get('HTML_STREAMING', self.por_partes)
+        self.comprimir = app.config.get('HTML_COMPRESSION', self.comprimir)
+        self.nivel_gzip = app.config.get('HTML_GZIP_LEVEL', self.nivel_gzip)
+        self.calidad_br = app.config.get('HTML_BROTLI_QUALITY', self.calidad_br)
+        app.extensions['respuestas_html'] = self
+        app.jinja_env.globals['punto_de_envio'] = punto_de_envio
+
+    def _codificacion(self):
+        if not self.comprimir:
+            return None
+        ofrecidas = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(ofrecidas)
+
+    def _compresor(self, codificacion):
+        if codificacion == 'br':
+            return brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.calidad_br)
+        if codificacion == 'gzip':
+            return _Gzip(self.nivel_gzip)
+        return _Identidad()
+
+    def _codificar(self, partes, compresor):
+        for parte in partes:
+            for i, segmento in enumerate(parte.split(MARCA_ENVIO)):
+                if i:
+                    datos = compresor.flush()
+                    if datos:
+                        yield datos
+                datos = compresor.process(segmento.encode('utf-8'))
+                if datos:
+                    yield datos
+        datos = compresor.finish()
+        if datos:
+            yield datos
+
+    def render(self, template, **contexto):
+        """Como ``render_template`` pero devuelve las partes a medida que salen.
+
+        Todo lo que toca la sesión tiene que pasar antes de la primera parte:
+        la cookie sale con los headers.
+        """
+        if not self.por_partes:
+            return render_template(template, **contexto)
+        get_flashed_messages(with_categories=True)  # los saca de la sesión ya
+        g.html_por_partes = True
+        return stream_template(template, **contexto)
+
+    def _comprimir(self, datos, codificacion):
+        compresor = self._compresor(codificacion)
+        return compresor.process(datos) + compresor.finish()
+
+    def responder(self, contenido, status=200):
+        """Response para ``contenido`` (str o partes de ``render``), comprimido si el cliente acepta."""
+        codificacion = self._codificacion()
+        if isinstance(contenido, str):
+            # ya está completo: un solo bloque con Content-Length
+            cuerpo = self._comprimir(contenido.encode('utf-8'), codificacion)
+        else:
+            cuerpo = self._codificar(contenido, self._compresor(codificacion))
+        return self._response(cuerpo, codificacion, status)
+
+    def responder_cacheado(self, key, generar, grupo=None, status=200):
+        """Como ``responder(page_cache.obtener_o_generar(key, generar, grupo))``, pero
+        el HTML comprimido también queda en la cache (una entrada por codificación,
+        con la misma versión que la página): un acierto no vuelve a comprimir.
+        """
+        codificacion = self._codificacion()
+
+        def html():
+            return page_cache.obtener_bytes(key, lambda: generar().encode('utf-8'), grupo)
+
+        if codificacion is None:
+            cuerpo = html()
+        else:
+            cuerpo = page_cache.obtener_bytes((key, codificacion),
+                                              lambda: self._comprimir(html(), codificacion), grupo)
+        return self._response(cuerpo, codificacion, status)
+
+    def _response(self, cuerpo, codificacion, status):
+        response = current_app.response_class(cuerpo, status=status, mimetype='text/html')
+        if codificacion:
+            response.headers['Content-Encoding'] = codificacion
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def punto_de_envio():
+    """Marca dónde conviene mandar lo renderizado hasta ahí (solo en respuestas por partes)."""
+    return Markup(MARCA_ENVIO) if g.get('html_por_partes') else ''
+
+
+respuestas_html = RespuestasHTML()
+
+
+def precomprimir(datos):
+    """{'.gz': ..., '.br': ...} de ``datos`` al máximo nivel (el .br solo si hay brotli).
+
+    Para archivos que se comprimen una vez y se sirven muchas (assets,
+    sitio estático). mtime=0: el .gz es reproducible y no cambia si el
+    contenido no cambió.
+    """
+    versiones = {'.gz': gzip.compress(datos, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versiones['.br'] = brotli.compress(datos, quality=11)
+    return versiones
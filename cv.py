@@ -0,0 +1,221 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sqlalchemy import select
+
+from cache import page_cache, usuario_de_grupo
+from cv_pdf import VERSION_PLANTILLA, escribir_cv
+from loaders import usuarios
+from models import db, Usuario, Experiencia, Educacion, Curso, Proyecto
+from storage import ruta_cv
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# CV en PDF generado desde la base (/descargar-cv)
+# El PDF se guarda en CV_DIR/<usuario_id>/<hash>.pdf, donde el hash es el
+# de las filas que lo componen: si los datos no cambiaron, el archivo ya
+# está. Cada commit que toca un perfil encola la regeneración en un hilo
+# que lee las filas y manda el render a un proceso aparte (el PDF no
+# compite por el GIL con los requests). La descarga no consulta la base:
+# sirve el último PDF generado (el más nuevo de la carpeta del usuario),
+# aunque justo haya una regeneración en curso.
+# -------------------------------
+# sección -> (modelo, columnas que aparecen en el CV)
+SECCIONES = {
+    'experiencias': (Experiencia, ('puesto', 'proyecto', 'periodo', 'descripcion', 'logros')),
+    'educacion': (Educacion, ('titulo', 'institucion', 'periodo', 'estado')),
+    'cursos': (Curso, ('nombre', 'institucion', 'periodo', 'certificacion_url')),
+    'proyectos': (Proyecto, ('titulo', 'fecha', 'descripcion', 'github_url')),
+}
+COLUMNAS_USUARIO = ('nombre_publico', 'acerca_de_mi')
+
+
+def datos_cv(usuario_id):
+    """Lo que va en el CV, como dicts (se manda al proceso que lo renderiza)."""
+    usuario = db.session.get(Usuario, usuario_id)
+    if usuario is None:
+        return None
+    datos = {'usuario': {c: getattr(usuario, c) for c in COLUMNAS_USUARIO}}
+    for seccion, (modelo, columnas) in SECCIONES.items():
+        filas = db.session.execute(
+            select(*(getattr(modelo, c) for c in columnas))
+            .where(modelo.usuario_id == usuario_id).order_by(modelo.id)
+        ).mappings()
+        datos[seccion] = [dict(fila) for fila in filas]
+    return datos
+
+
+def hash_datos(datos):
+    contenido = json.dumps({'plantilla': VERSION_PLANTILLA, **datos}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class CVPipeline:
+    def __init__(self, app=None):
+        self.app = None
+        self.coordinador = None
+        self._proceso = None
+        self._pid = None
+        self._sin_procesos = False  # el pool no pudo arrancar: se genera en el hilo
+        self._pendientes = set()    # usuarios con una regeneración encolada
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.generado = app.config.get('CV_GENERADO', True)
+        self.directorio = app.config['CV_DIR']
+        self.workers = app.config.get('CV_WORKERS', 1)
+        self.conservar = app.config.get('CV_KEEP', 3)
+        self._sin_procesos = self.workers <= 0
+        self.coordinador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cv')
+        app.extensions['cv'] = self
+        if self.generado:
+            page_cache.al_invalidar(self._tras_invalidar)
+
+    def _carpeta(self, usuario_id):
+        return os.path.join(self.directorio, str(usuario_id))
+
+    def _pool(self):
+        # se crea en el primer uso de cada proceso: un pool heredado por
+        # fork (gunicorn con preload_app) compartiría sus colas con el master
+        if self._proceso is None or self._pid != os.getpid():
+            self._proceso = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            self._pid = os.getpid()
+        return self._proceso
+
+    # ---- generación ----
+    def _render(self, datos, path):
+        if not self._sin_procesos:
+            try:
+                return self._pool().submit(escribir_cv, datos, path).result()
+            except BrokenProcessPool:
+                # p. ej. la app arrancada desde un script sin el guard
+                # "if __name__ == '__main__'": con spawn los procesos no arrancan
+                logger.warning('Sin procesos para el CV: se genera en el hilo de la app', exc_info=True)
+                self._sin_procesos = True
+        return escribir_cv(datos, path)
+
+    def generar(self, usuario_id):
+        """Path del PDF con los datos actuales de ``usuario_id`` (lo genera si falta).
+
+        Lee la base y puede tardar: se usa desde el hilo de regeneración,
+        ``flask generar-cv`` y el sitio estático, nunca desde un request.
+        Devuelve None si el usuario no existe.
+        """
+        datos = datos_cv(usuario_id)
+        if datos is None:
+            return None
+        path = os.path.join(self._carpeta(usuario_id), f'{hash_datos(datos)}.pdf')
+        if os.path.isfile(path):
+            os.utime(path)  # vuelve a ser el último (datos que volvieron a un estado anterior)
+            return path
+        return self._render(datos, path)
+
+    def ultimo(self, usuario_id):
+        """El PDF generado más recientemente para ``usuario_id``, o None."""
+        fechas = {}
+        try:
+            with os.scandir(self._carpeta(usuario_id)) as entradas:
+                for entrada in entradas:
+                    if entrada.name.endswith('.pdf'):
+                        try:
+                            fechas[entrada.path] = entrada.stat().st_mtime
+                        except FileNotFoundError:
+                            continue  # lo acaba de podar otra regeneración
+        except FileNotFoundError:
+            return None
+        return max(fechas, key=fechas.get) if fechas else None
+
+    def archivo(self, username, al_dia=False):
+        """Path del CV de ``username`` para servir, o None.
+
+        Sin ``al_dia`` no consulta la base: el último PDF generado; si el
+        usuario todavía no tiene ninguno, se encola y se devuelve None. Con
+        ``al_dia`` se genera con los datos actuales (para el sitio estático).
+        """
+        usuario_id = usuarios.id_de(username)
+        if usuario_id is None:
+            return None
+        if not self.generado:
+            return self._subido(username, usuario_id)
+        if al_dia:
+            return self.generar(usuario_id)
+        path = self.ultimo(usuario_id)
+        if path is None:
+            self.encolar(usuario_id)
+        return path
+
+    def _subido(self, username, usuario_id):
+        """CV_GENERADO=0: el PDF que subió el usuario (destino "cv" de /subidas)."""
+        config = self.app.config
+        rutas = [ruta_cv(usuario_id)]
+        if username == config['PERFIL_PRINCIPAL']:
+            rutas.append(config['CV_FILENAME'])  # el de antes de los CV por usuario
+        for ruta in rutas:
+            path = os.path.join(config['UPLOAD_FOLDER'], ruta)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    # ---- regeneración tras cada edición ----
+    def _tras_invalidar(self, grupos):
+        for grupo in grupos:
+            usuario_id = usuario_de_grupo(grupo)
+            if usuario_id is not None:
+                self.encolar(usuario_id)
+
+    def encolar(self, usuario_id):
+        """Programa la regeneración sin bloquear; varias ediciones seguidas se agrupan."""
+        with self._lock:
+            if usuario_id in self._pendientes:
+                return None
+            self._pendientes.add(usuario_id)
+        return self.coordinador.submit(self._regenerar_seguro, usuario_id)
+
+    def _regenerar_seguro(self, usuario_id):
+        # se saca antes de leer: una edición que llegue mientras tanto vuelve a encolar
+        with self._lock:
+            self._pendientes.discard(usuario_id)
+        try:
+            with self.app.app_context():
+                path = self.generar(usuario_id)
+        except Exception:
+            logger.exception('No se pudo generar el CV del usuario %s', usuario_id)
+            return None
+        if path:
+            self._podar(os.path.dirname(path), path)
+        return path
+
+    def _podar(self, carpeta, actual):
+        """Deja los ``conservar`` PDFs más nuevos del usuario (siempre el actual)."""
+        try:
+            nombres = [n for n in os.listdir(carpeta) if n.endswith('.pdf')]
+        except FileNotFoundError:
+            return
+        fechas = {}
+        for nombre in nombres:
+            path = os.path.join(carpeta, nombre)
+            try:
+                fechas[path] = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+        for path in sorted(fechas, key=fechas.get, reverse=True)[self.conservar:]:
+            if path != actual:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+cv_pipeline = CVPipeline()
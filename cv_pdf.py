@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+from fpdf import FPDF, XPos, YPos
+
+
+# -------------------------------
+# PDF del CV a partir de los datos de la base (ver cv.py)
+# Con fpdf2 y las fuentes estándar Helvetica y Helvetica-Bold (no se
+# embeben, todo visor las trae) en cp1252, que cubre los acentos, la ñ,
+# los signos ¿¡ y las comillas y rayas tipográficas. Corre en un proceso
+# aparte y no importa Flask ni la base.
+# -------------------------------
+# cambiarla regenera todos los CV aunque los datos no cambien
+VERSION_PLANTILLA = 2
+
+MARGEN = 20  # mm
+GRIS = 100
+CODIFICACION = 'windows-1252'
+
+
+def _texto(texto):
+    # lo que no entra en cp1252 (emojis, otros alfabetos) sale como "?"
+    return texto.encode(CODIFICACION, errors='replace').decode(CODIFICACION)
+
+
+class DocumentoCV(FPDF):
+    """Páginas A4 con texto que fluye de arriba hacia abajo."""
+
+    def __init__(self, titulo=''):
+        super().__init__(format='A4')
+        self.core_fonts_encoding = CODIFICACION
+        self.set_margins(MARGEN, MARGEN)
+        self.set_auto_page_break(True, margin=MARGEN)
+        self.set_title(_texto(titulo))
+        self.set_producer('portfolio')
+        self.add_page()
+
+    def texto(self, texto, tamanio=10, negrita=False, gris=False, despues=0):
+        if not texto:
+            return
+        self.set_font('Helvetica', 'B' if negrita else '', tamanio)
+        self.set_text_color(GRIS if gris else 0)
+        # interlineado de 1.35 veces el tamaño (pt -> mm)
+        self.multi_cell(0, tamanio * 0.476, _texto(texto), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.ln(despues)
+
+    def titulo_seccion(self, texto):
+        if self.will_page_break(14):
+            self.add_page()  # que el título no quede solo al pie de la página
+        self.ln(3)
+        self.texto(texto, tamanio=13, negrita=True, despues=1)
+        self.set_line_width(0.2)
+        self.line(self.l_margin, self.get_y(), self.w - self.r_margin, self.get_y())
+        self.ln(2)
+
+
+def _unir(*partes):
+    return ' · '.join(p for p in partes if p)
+
+
+def componer_cv(datos):
+    """PDF (bytes) del CV a partir de ``datos`` (ver cv.datos_cv)."""
+    usuario = datos['usuario']
+    doc = DocumentoCV(titulo=f'CV - {usuario["nombre_publico"] or ""}')
+    doc.texto(usuario['nombre_publico'], tamanio=22, negrita=True, despues=1.5)
+    if usuario['acerca_de_mi']:
+        doc.texto(usuario['acerca_de_mi'], despues=1.5)
+
+    if datos['experiencias']:
+        doc.titulo_seccion('Experiencia laboral')
+        for exp in datos['experiencias']:
+            doc.texto(_unir(exp['puesto'], exp['proyecto']), tamanio=11, negrita=True)
+            doc.texto(exp['periodo'], tamanio=9, gris=True, despues=0.7)
+            doc.texto(exp['descripcion'])
+            if exp['logros']:
+                doc.texto(f'Logros: {exp["logros"]}')
+            doc.ln(3)
+
+    if datos['educacion']:
+        doc.titulo_seccion('Educación')
+        for edu in datos['educacion']:
+            doc.texto(edu['titulo'], tamanio=11, negrita=True)
+            doc.texto(_unir(edu['institucion'], edu['periodo'], edu['estado']), gris=True, despues=3)
+
+    if datos['cursos']:
+        doc.titulo_seccion('Cursos')
+        for curso in datos['cursos']:
+            doc.texto(curso['nombre'], tamanio=11, negrita=True)
+            doc.texto(_unir(curso['institucion'], curso['periodo']), gris=True)
+            if curso['certificacion_url']:
+                doc.texto(curso['certificacion_url'], tamanio=9)
+            doc.ln(3)
+
+    if datos['proyectos']:
+        doc.titulo_seccion('Proyectos')
+        for proyecto in datos['proyectos']:
+            doc.texto(_unir(proyecto['titulo'], proyecto['fecha']), tamanio=11, negrita=True)
+            if proyecto['descripcion']:
+                doc.texto(proyecto['descripcion'])
+            if proyecto['github_url']:
+                doc.texto(proyecto['github_url'], tamanio=9, gris=True)
+            doc.ln(3)
+    return bytes(doc.output())
+
+
+def escribir_cv(datos, destino):
+    """Genera el PDF y lo deja en ``destino`` de forma atómica. Corre en el proceso del pool."""
+    pdf = componer_cv(datos)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return destino
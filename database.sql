@@ -1,3 +1,6 @@
+-- Esquema de referencia. La fuente de verdad son los modelos (models.py)
+-- y las migraciones (migrations/): preferí `flask db upgrade`.
+
 CREATE DATABASE IF NOT EXISTS portfolio_db;
 USE portfolio_db;
 
@@ -7,10 +10,16 @@ CREATE TABLE IF NOT EXISTS usuario (
     password VARCHAR(200) NOT NULL,
     nombre_publico VARCHAR(120),
     profile_image VARCHAR(255),
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP ,
-    acerca_de_mi TEXT not null
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    acerca_de_mi TEXT
+);
+
+CREATE TABLE IF NOT EXISTS admin_user (
+    id INT PRIMARY KEY,
+    FOREIGN KEY (id) REFERENCES usuario(id)
 );
-CREATE tabLE IF NOT EXISTS persona (
+
+CREATE TABLE IF NOT EXISTS persona (
     id INT AUTO_INCREMENT PRIMARY KEY,
     nombre_completo VARCHAR(150) NOT NULL,
     contacto_email VARCHAR(150) NOT NULL,
@@ -26,8 +35,11 @@ CREATE TABLE IF NOT EXISTS experiencia (
     periodo VARCHAR(120) NOT NULL,
     logros TEXT NOT NULL,
     usuario_id INT,
-    FOREIGN KEY (usuario_id) REFERENCES usuario(id) ON DELETE CASCADE
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_experiencia_usuario_id_id (usuario_id, id),
+    FOREIGN KEY (usuario_id) REFERENCES usuario(id)
 );
+
 CREATE TABLE IF NOT EXISTS educacion (
     id INT AUTO_INCREMENT PRIMARY KEY,
     usuario_id INT NOT NULL,
@@ -36,23 +48,48 @@ CREATE TABLE IF NOT EXISTS educacion (
     logo VARCHAR(255),
     periodo VARCHAR(150),
     estado VARCHAR(100),  -- "En curso", "Finalizado", etc.
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_educacion_usuario_id_id (usuario_id, id),
     FOREIGN KEY (usuario_id) REFERENCES usuario(id)
 );
 
-CREATE TABLE IF NOT EXISTS cursos (
+CREATE TABLE IF NOT EXISTS curso (
     id INT AUTO_INCREMENT PRIMARY KEY,
     usuario_id INT NOT NULL,
     nombre VARCHAR(200) NOT NULL,
     institucion VARCHAR(200) NOT NULL,
-    periodo VARCHAR(150)
+    periodo VARCHAR(150),
+    certificacion_url VARCHAR(255),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_curso_usuario_id_id (usuario_id, id),
     FOREIGN KEY (usuario_id) REFERENCES usuario(id)
 );
 
-CREATE TABLE IF NOT EXISTS proyectos (
+CREATE TABLE IF NOT EXISTS proyecto (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    titulo VARCHAR(200) NOT NULL,
-    descripcion TEXT,
+    titulo VARCHAR(150) NOT NULL,
+    descripcion VARCHAR(300),
     fecha VARCHAR(50),
-    github_url VARCHAR(255),
-    imagen VARCHAR(255)  -- aquí guardamos el nombre del archivo subido
+    github_url VARCHAR(200),
+    imagen VARCHAR(255),  -- ruta del archivo subido (ver tabla archivo)
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usuario_id INT,
+    INDEX ix_proyecto_usuario_id_id (usuario_id, id),
+    CONSTRAINT fk_proyecto_usuario_id_usuario FOREIGN KEY (usuario_id) REFERENCES usuario(id)
+);
+
+-- blobs subidos, deduplicados por hash (storage.py)
+CREATE TABLE IF NOT EXISTS archivo (
+    hash VARCHAR(64) PRIMARY KEY,
+    ruta VARCHAR(255) NOT NULL UNIQUE,
+    tamanio BIGINT NOT NULL,
+    referencias INT NOT NULL,
+    created_at DATETIME
+);
+
+-- latido para medir el retraso de las réplicas de lectura (replicas.py)
+CREATE TABLE IF NOT EXISTS latido (
+    id INT PRIMARY KEY,
+    momento_ms BIGINT NOT NULL
 );
+INSERT IGNORE INTO latido (id, momento_ms) VALUES (1, 0);
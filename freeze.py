@@ -0,0 +1,180 @@
+import os
+import re
+import shutil
+import logging
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+from assets import asset_pipeline
+from cache import page_cache
+from compresion import precomprimir
+from cv import cv_pipeline
+from http_cache import hash_archivo
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Exportación estática ("freeze") del portfolio público
+# Renderiza index() como visitante anónimo, copia los archivos que la página
+# referencia con nombres que incluyen su hash (assets/<nombre>.<hash><ext>),
+# reescribe las URLs y deja al lado de cada archivo su .gz/.br para que
+# nginx los sirva con gzip_static/brotli_static. Flask queda para el admin.
+# -------------------------------
+EXTENSIONES_COMPRIMIBLES = {'.html', '.css', '.js', '.svg', '.json', '.txt'}
+URL_RE = re.compile(r'''(?P<attr>(?:src|href|srcset)=")(?P<valor>[^"]+)"''')
+CV_RE = re.compile(r'^/u/([^/]+)/cv$')
+
+
+def _dentro_de(path, carpeta):
+    """True si ``path`` está dentro de ``carpeta`` (comparando rutas absolutas, no texto)."""
+    path, carpeta = os.path.abspath(path), os.path.abspath(carpeta)
+    return path != carpeta and os.path.commonpath([path, carpeta]) == carpeta
+
+
+def _escribir_si_cambio(path, datos):
+    """Escribe atómicamente; devuelve False si el contenido ya era igual."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == datos:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(datos)
+    os.chmod(tmp, 0o644)  # mkstemp crea 0600 y nginx no podría leerlo
+    os.replace(tmp, path)
+    return True
+
+
+def _comprimir(path, datos):
+    for sufijo, comprimido in precomprimir(datos).items():
+        _escribir_si_cambio(path + sufijo, comprimido)
+
+
+class Freezer:
+    def __init__(self, app=None):
+        self.app = None
+        self.destino = None
+        self._timer = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.destino = app.config['FREEZE_DIR']
+        self.demora = app.config.get('FREEZE_DEBOUNCE', 2.0)
+        app.extensions['freezer'] = self
+        if app.config.get('FREEZE_AUTO'):
+            page_cache.al_invalidar(self.programar)
+
+    # ---- re-export incremental tras escrituras ----
+    def programar(self, grupos=()):
+        """Agenda una exportación; varias ediciones seguidas se agrupan en una."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.demora, self._exportar_seguro)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _exportar_seguro(self):
+        try:
+            self.exportar()
+        except Exception:
+            logger.exception('Falló la exportación estática')
+
+    # ---- exportación ----
+    def _resolver(self, url):
+        """Archivo local para una URL de /static o /uploads (o None)."""
+        partes = urlsplit(url)
+        if partes.netloc:
+            return None
+        ruta = partes.path
+        if ruta.startswith('/static/'):
+            base, relativa = self.app.static_folder, ruta[len('/static/'):]
+        elif ruta.startswith('/uploads/'):
+            base, relativa = self.app.config['UPLOAD_FOLDER'], ruta[len('/uploads/'):]
+        elif ruta == '/descargar-cv' or CV_RE.match(ruta):
+            # el CV se genera desde la base: su path cambia con los datos
+            m = CV_RE.match(ruta)
+            with self.app.app_context():
+                return cv_pipeline.archivo(m.group(1) if m else self.app.config['PERFIL_PRINCIPAL'],
+                                           al_dia=True)
+        else:
+            return None
+        path = os.path.normpath(os.path.join(base, relativa))
+        if not _dentro_de(path, base) or not os.path.isfile(path):
+            return None
+        return path
+
+    def _exportar_asset(self, path, stats):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        if _dentro_de(path, asset_pipeline.dist):
+            nombre = stem + ext  # ya viene con hash del pipeline de assets
+        else:
+            nombre = f'{stem}.{hash_archivo(path)[:12]}{ext}'
+        salida = os.path.join(self.destino, 'assets', nombre)
+        # el nombre incluye el hash: si ya existe, es idéntico
+        if not os.path.exists(salida):
+            os.makedirs(os.path.dirname(salida), exist_ok=True)
+            shutil.copyfile(path, salida + '.tmp')
+            os.replace(salida + '.tmp', salida)
+            if ext.lower() in EXTENSIONES_COMPRIMIBLES:
+                with open(salida, 'rb') as f:
+                    _comprimir(salida, f.read())
+            stats['escritos'] += 1
+        else:
+            stats['sin_cambios'] += 1
+        return f'/assets/{nombre}'
+
+    def _reescribir(self, html, stats):
+        mapeo = {}
+
+        def nueva_url(url):
+            url = url.strip()
+            if url not in mapeo:
+                path = self._resolver(url)
+                mapeo[url] = self._exportar_asset(path, stats) if path else url
+            return mapeo[url]
+
+        def reemplazar(m):
+            valor = m.group('valor')
+            if m.group('attr') == 'srcset=':
+                candidatos = []
+                for candidato in valor.split(','):
+                    partes = candidato.strip().split(' ', 1)
+                    partes[0] = nueva_url(partes[0])
+                    candidatos.append(' '.join(partes))
+                valor = ', '.join(candidatos)
+            else:
+                valor = nueva_url(valor)
+            return f'{m.group("attr")}{valor}"'
+
+        return URL_RE.sub(reemplazar, html)
+
+    def exportar(self):
+        """Genera/actualiza el sitio estático. Devuelve contadores."""
+        stats = {'escritos': 0, 'sin_cambios': 0}
+        with self.app.test_client() as cliente:
+            respuesta = cliente.get('/')
+        if respuesta.status_code != 200:
+            raise RuntimeError(f'index() devolvió {respuesta.status_code}')
+
+        # los assets primero: el HTML nuevo nunca apunta a algo que no existe
+        html = self._reescribir(respuesta.get_data(as_text=True), stats)
+        datos = html.encode('utf-8')
+        destino_html = os.path.join(self.destino, 'index.html')
+        if _escribir_si_cambio(destino_html, datos):
+            _comprimir(destino_html, datos)
+            stats['escritos'] += 1
+        else:
+            stats['sin_cambios'] += 1
+        return stats
+
+
+freezer = Freezer()
@@ -0,0 +1,27 @@
+import os
+import multiprocessing
+
+# -------------------------------
+# Gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+# La app se carga una vez en el master (preload_app) y los workers nacen
+# por fork ya con todo importado: arrancar o reiniciar uno es casi gratis.
+# -------------------------------
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+preload_app = True
+# reciclar workers de a poco evita que crezcan sin límite y, con preload,
+# el reemplazo no vuelve a importar nada
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def post_fork(server, worker):
+    # las conexiones del pool no se comparten entre procesos: si el master
+    # llegó a abrir alguna, cada worker empieza con un pool vacío
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,65 @@
+import os
+import hashlib
+import threading
+
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+
+# -------------------------------
+# Envío de archivos con cache HTTP
+# - ETag = hash del contenido (no depende del mtime ni del servidor)
+# - Last-Modified, 304 y Range (lo resuelve send_file con conditional=True)
+# - Si la URL trae ?v=<huella> y coincide con el contenido actual, el
+#   archivo no puede cambiar bajo esa URL: Cache-Control immutable por un año.
+# -------------------------------
+UN_ANIO = 365 * 24 * 3600
+LARGO_HUELLA = 12
+
+_hashes = {}
+_lock = threading.Lock()
+
+
+def hash_archivo(path):
+    """SHA-256 del archivo, recalculado solo si cambió su mtime o tamaño."""
+    st = os.stat(path)
+    clave = (st.st_mtime_ns, st.st_size)
+    cacheado = _hashes.get(path)
+    if cacheado and cacheado[0] == clave:
+        return cacheado[1]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(64 * 1024), b''):
+            sha.update(bloque)
+    digest = sha.hexdigest()
+    with _lock:
+        _hashes[path] = (clave, digest)
+    return digest
+
+
+def huella(directorio, filename):
+    """Versión corta del hash para usar en URLs, o None si no existe."""
+    path = safe_join(directorio, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return hash_archivo(path)[:LARGO_HUELLA]
+
+
+def enviar_archivo(directorio, filename, **kwargs):
+    """Reemplazo de ``send_from_directory`` con ETag por contenido y política de cache."""
+    path = safe_join(directorio, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    digest = hash_archivo(path)
+    # la huella pedida tiene que coincidir: si no, un cliente podría fijar
+    # para siempre contenido viejo bajo una URL "nueva"
+    inmutable = request.args.get('v') == digest[:LARGO_HUELLA]
+
+    # sin huella: no-cache + ETag, el navegador revalida y recibe un 304
+    response = send_file(path, etag=digest, conditional=True,
+                         max_age=UN_ANIO if inmutable else None, **kwargs)
+    if inmutable:
+        response.cache_control.immutable = True
+    return response
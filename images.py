@@ -0,0 +1,177 @@
+import os
+import json
+import logging
+import tempfile
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él se sirven los originales
+    Image = None
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from cache import page_cache
+from storage import columna_archivo
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Variantes de imágenes subidas
+# Por cada upload se generan copias redimensionadas (WebP + fallback JPEG/PNG)
+# en UPLOAD_FOLDER/variantes/ y un .json que las describe. Los templates
+# arman el srcset a partir de ese .json (ver templates/_imagenes.html).
+# -------------------------------
+VARIANTES_DIR = 'variantes'
+EXTENSIONES_IMAGEN = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+
+class ImagePipeline:
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.upload_folder = None
+        self.anchos = ()
+        self.calidad = 80
+        self._cache_registros = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        self.anchos = tuple(sorted(app.config.get('IMAGE_VARIANT_WIDTHS', (60, 120, 280, 560))))
+        self.calidad = app.config.get('IMAGE_VARIANT_QUALITY', 80)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('IMAGE_WORKERS', 2),
+            thread_name_prefix='variantes'
+        )
+        app.extensions['image_pipeline'] = self
+        app.jinja_env.globals['variantes'] = self.registro
+
+    @property
+    def directorio(self):
+        return os.path.join(self.upload_folder, VARIANTES_DIR)
+
+    def _registro_path(self, filename):
+        return os.path.join(self.directorio, filename + '.json')
+
+    # ---- encolado ----
+    def encolar(self, filename):
+        """Programa la generación de variantes sin bloquear el request."""
+        if Image is None or not filename or self.executor is None:
+            return None
+        if os.path.splitext(filename)[1].lower() not in EXTENSIONES_IMAGEN:
+            return None
+        if self.registro(filename) is not None:
+            return None  # blob deduplicado: las variantes ya existen
+        return self.executor.submit(self._procesar_seguro, filename)
+
+    def _procesar_seguro(self, filename):
+        try:
+            registro = self.generar(filename)
+            # el HTML cacheado (páginas y secciones) todavía apunta al
+            # original; los callbacks de invalidar usan la app (CV, freeze)
+            with self.app.app_context():
+                page_cache.invalidar(todo=True)
+        except Exception:
+            logger.exception('No se pudieron generar variantes de %s', filename)
+            return None
+        return registro
+
+    # ---- trabajo pesado ----
+    def generar(self, filename):
+        """Genera las variantes de ``filename`` y escribe su registro."""
+        origen = os.path.join(self.upload_folder, filename)
+        # los blobs viven en subcarpetas (blobs/ab/...): se replican acá
+        os.makedirs(os.path.dirname(self._registro_path(filename)), exist_ok=True)
+        stem = os.path.splitext(filename)[0]
+
+        with Image.open(origen) as img:
+            img = ImageOps.exif_transpose(img)
+            ancho_original = img.width
+            tiene_alfa = img.mode in ('RGBA', 'LA') or 'transparency' in img.info
+            ext_fallback = '.png' if tiene_alfa else '.jpg'
+            img = img.convert('RGBA' if tiene_alfa else 'RGB')
+
+            # nunca agrandamos: los anchos menores al original y, si el
+            # original es más chico que el bucket mayor, una copia re-encodeada
+            # a su tamaño real
+            anchos = [a for a in self.anchos if a < ancho_original]
+            if ancho_original <= self.anchos[-1]:
+                anchos.append(ancho_original)
+
+            registro = {'original': filename, 'ancho': ancho_original, 'webp': [], 'fallback': []}
+            for ancho in anchos:
+                alto = max(1, round(img.height * ancho / ancho_original))
+                copia = img.resize((ancho, alto), Image.LANCZOS)
+
+                nombre_webp = f'{stem}-{ancho}w.webp'
+                copia.save(os.path.join(self.directorio, nombre_webp), 'WEBP', quality=self.calidad, method=4)
+                registro['webp'].append({'ancho': ancho, 'archivo': f'{VARIANTES_DIR}/{nombre_webp}'})
+
+                nombre_fb = f'{stem}-{ancho}w{ext_fallback}'
+                if tiene_alfa:
+                    copia.save(os.path.join(self.directorio, nombre_fb), 'PNG', optimize=True)
+                else:
+                    copia.save(os.path.join(self.directorio, nombre_fb), 'JPEG',
+                               quality=self.calidad, optimize=True, progressive=True)
+                registro['fallback'].append({'ancho': ancho, 'archivo': f'{VARIANTES_DIR}/{nombre_fb}'})
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self._registro_path(filename)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(registro, f)
+        os.replace(tmp, self._registro_path(filename))
+        self._cache_registros.pop(filename, None)
+        return registro
+
+    # ---- lectura desde templates ----
+    def registro(self, filename):
+        """Devuelve el registro de variantes de ``filename`` o None."""
+        if not filename or self.upload_folder is None:
+            return None
+        path = self._registro_path(filename)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        cacheado = self._cache_registros.get(filename)
+        if cacheado and cacheado[0] == mtime:
+            return cacheado[1]
+        with open(path) as f:
+            registro = json.load(f)
+        self._cache_registros[filename] = (mtime, registro)
+        return registro
+
+
+image_pipeline = ImagePipeline()
+
+
+# -------------------------------
+# Encolado tras el commit: las columnas de imagen que cambiaron en una
+# transacción generan variantes recién cuando la fila quedó guardada (si el
+# commit falla no se trabaja de más, y las variantes no se adelantan a la
+# invalidación de la cache que hace ese mismo commit).
+# -------------------------------
+@event.listens_for(Session, 'after_flush')
+def _anotar_imagenes(session, flush_context):
+    for obj in chain(session.new, session.dirty):
+        columna = columna_archivo(obj)
+        if columna:
+            nuevas = [ruta for ruta in inspect(obj).attrs[columna].history.added if ruta]
+            if nuevas:
+                session.info.setdefault('imagenes_nuevas', set()).update(nuevas)
+
+
+@event.listens_for(Session, 'after_commit')
+def _encolar_tras_commit(session):
+    for ruta in session.info.pop('imagenes_nuevas', ()):
+        image_pipeline.encolar(ruta)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_imagenes(session):
+    session.info.pop('imagenes_nuevas', None)
@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from sqlalchemy import delete, func, literal, select, union_all
+
+from images import VARIANTES_DIR
+from models import db, Archivo, Usuario
+from storage import COLUMNAS_ARCHIVO, hash_de_ruta, mover, ruta_cv
+
+
+# -------------------------------
+# Limpieza de uploads huérfanos (flask limpiar-uploads)
+# Una pasada recorre UPLOAD_FOLDER una vez y lo compara con todas las
+# columnas de imagen (una sola consulta UNION ALL) y con los archivos que
+# los templates usan por nombre (p. ej. uploads/linkedinn.png en base.html).
+# Lo que no usa nadie y tiene más de UPLOAD_ORPHAN_MIN_AGE se mueve a
+# UPLOAD_QUARANTINE_DIR; lo que lleva más de UPLOAD_GRACE_SECONDS en
+# cuarentena se borra. Si algo en cuarentena vuelve a estar referenciado
+# (una fila restaurada de un backup, por ejemplo), vuelve a su lugar.
+# -------------------------------
+CANDADO = '.limpieza.lock'
+# referencias literales en templates y CSS: uploads/<ruta> o imagen('<ruta>', ...)
+REFERENCIA_RE = re.compile(r"""uploads/([\w.\-/]+)|imagen\(\s*['"]([\w.\-/]+)['"]""")
+
+
+class Informe:
+    def __init__(self):
+        self.uso = defaultdict(lambda: {'archivos': 0, 'bytes': 0})  # tipo -> totales
+        self.en_cuarentena = []   # movidos en esta pasada
+        self.restaurados = []
+        self.borrados = []
+        self.referencias_corregidas = 0
+
+    def sumar(self, tipo, tamanio):
+        self.uso[tipo]['archivos'] += 1
+        self.uso[tipo]['bytes'] += tamanio
+
+    def como_dict(self):
+        return {
+            'uso': dict(self.uso),
+            'en_cuarentena': self.en_cuarentena,
+            'restaurados': self.restaurados,
+            'borrados': self.borrados,
+            'referencias_corregidas': self.referencias_corregidas,
+        }
+
+
+class LimpiezaUploads:
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['limpieza_uploads'] = self
+
+    @property
+    def raiz(self):
+        return self.app.config['UPLOAD_FOLDER']
+
+    @property
+    def cuarentena(self):
+        return self.app.config['UPLOAD_QUARANTINE_DIR']
+
+    # ---- qué está en uso ----
+    def _referencias_db(self):
+        """{ruta: {tipo: cantidad}} de todas las columnas de imagen, en una consulta."""
+        selects = []
+        for modelo, columna in COLUMNAS_ARCHIVO.items():
+            col = getattr(modelo, columna)
+            selects.append(
+                select(col.label('ruta'), literal(modelo.__tablename__).label('tipo'),
+                       func.count().label('cantidad'))
+                .where(col.isnot(None)).group_by(col)
+            )
+        referencias = defaultdict(dict)
+        for ruta, tipo, cantidad in db.session.execute(union_all(*selects)):
+            referencias[ruta][tipo] = cantidad
+        # el default de la columna lo reciben las filas nuevas aunque hoy no lo use ninguna
+        for modelo, columna in COLUMNAS_ARCHIVO.items():
+            default = getattr(modelo, columna).default
+            if default is not None and isinstance(default.arg, str):
+                referencias[default.arg].setdefault(modelo.__tablename__, 0)
+        # el CV que subió cada usuario (CV_GENERADO=0)
+        for usuario_id in db.session.scalars(select(Usuario.id)):
+            referencias[ruta_cv(usuario_id)]['cv'] = 1
+        return referencias
+
+    def _referencias_estaticas(self):
+        """Rutas dentro de uploads que los templates o el CSS usan por nombre."""
+        rutas = {self.app.config['CV_FILENAME']}
+        carpetas = [os.path.join(self.app.root_path, self.app.template_folder), self.app.static_folder]
+        for carpeta in carpetas:
+            for actual, subcarpetas, archivos in os.walk(carpeta):
+                if os.path.abspath(actual) == os.path.abspath(self.raiz):
+                    subcarpetas[:] = []  # los uploads no referencian uploads
+                    continue
+                for nombre in archivos:
+                    if os.path.splitext(nombre)[1] not in ('.html', '.css', '.js'):
+                        continue
+                    with open(os.path.join(actual, nombre), encoding='utf-8', errors='ignore') as f:
+                        for m in REFERENCIA_RE.finditer(f.read()):
+                            rutas.add(m.group(1) or m.group(2))
+        return rutas
+
+    def _variantes_de(self, ruta):
+        """Registro de variantes de ``ruta`` y los archivos que lista."""
+        registro = f'{VARIANTES_DIR}/{ruta}.json'
+        # puede estar en cuarentena si el original estuvo huérfano un tiempo
+        for carpeta in (self.raiz, self.cuarentena):
+            try:
+                with open(os.path.join(carpeta, registro)) as f:
+                    datos = json.load(f)
+            except (OSError, ValueError):
+                continue
+            return [registro] + [v['archivo'] for v in datos.get('webp', []) + datos.get('fallback', [])]
+        return []
+
+    # ---- recorrido del disco ----
+    def _archivos(self, carpeta):
+        """{ruta relativa: (tamaño, mtime)} de todo lo que hay bajo ``carpeta``."""
+        encontrados = {}
+        for actual, _, archivos in os.walk(carpeta):
+            for nombre in archivos:
+                if nombre == CANDADO:
+                    continue
+                path = os.path.join(actual, nombre)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                ruta = os.path.relpath(path, carpeta).replace(os.sep, '/')
+                encontrados[ruta] = (st.st_size, st.st_mtime)
+        return encontrados
+
+    @staticmethod
+    def _podar(base, path):
+        """Borra las carpetas que quedaron vacías entre ``path`` y ``base`` (sin incluirla)."""
+        carpeta = os.path.dirname(path)
+        while os.path.abspath(carpeta) != os.path.abspath(base):
+            try:
+                os.rmdir(carpeta)
+            except OSError:
+                return  # no está vacía
+            carpeta = os.path.dirname(carpeta)
+
+    @contextmanager
+    def _candado(self):
+        # dos limpiezas a la vez (cron solapado) moverían los mismos archivos
+        os.makedirs(self.cuarentena, exist_ok=True)
+        with open(os.path.join(self.cuarentena, CANDADO), 'w') as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise RuntimeError('ya hay otra limpieza en curso')
+            yield
+
+    # ---- pasada ----
+    def barrer(self, simular=False):
+        """Una pasada completa. Con ``simular`` solo informa, no mueve ni borra."""
+        config = self.app.config
+        ahora = time.time()
+        informe = Informe()
+
+        with self._candado():
+            referencias = self._referencias_db()
+            estaticas = self._referencias_estaticas()
+            vivas = set(referencias) | estaticas
+            for ruta in list(vivas):
+                vivas.update(self._variantes_de(ruta))
+
+            # 1) en cuarentena: restaurar lo que volvió a usarse, borrar lo vencido
+            for ruta, (tamanio, desde) in self._archivos(self.cuarentena).items():
+                origen = os.path.join(self.cuarentena, ruta)
+                if ruta in vivas:
+                    informe.restaurados.append(ruta)
+                    if not simular:
+                        destino = os.path.join(self.raiz, ruta)
+                        os.makedirs(os.path.dirname(destino), exist_ok=True)
+                        mover(origen, destino)
+                        self._podar(self.cuarentena, origen)
+                elif ahora - desde > config['UPLOAD_GRACE_SECONDS']:
+                    informe.borrados.append(ruta)
+                    if not simular:
+                        os.remove(origen)
+                        self._podar(self.cuarentena, origen)
+                else:
+                    informe.sumar('cuarentena', tamanio)
+
+            # 2) uploads: contabilizar por tipo y poner en cuarentena lo huérfano
+            for ruta, (tamanio, mtime) in self._archivos(self.raiz).items():
+                if ruta in referencias:
+                    for tipo in referencias[ruta]:
+                        informe.sumar(tipo, tamanio)
+                elif ruta.startswith(VARIANTES_DIR + '/') and ruta in vivas:
+                    informe.sumar('variantes', tamanio)
+                elif ruta in vivas:
+                    informe.sumar('estaticos', tamanio)
+                elif ahora - mtime < config['UPLOAD_ORPHAN_MIN_AGE'] or not self._sigue_huerfano(ruta, ahora):
+                    # recién subido (p. ej. por /subidas, antes de que /lote lo use)
+                    informe.sumar('recientes', tamanio)
+                else:
+                    informe.en_cuarentena.append(ruta)
+                    if not simular:
+                        destino = os.path.join(self.cuarentena, ruta)
+                        os.makedirs(os.path.dirname(destino), exist_ok=True)
+                        mover(os.path.join(self.raiz, ruta), destino)
+                        self._podar(self.raiz, os.path.join(self.raiz, ruta))
+                        os.utime(destino)  # el mtime marca desde cuándo está en cuarentena
+
+            if not simular:
+                self._conciliar(informe)
+        return informe
+
+    def _sigue_huerfano(self, ruta, ahora):
+        """Segunda mirada justo antes de mover ``ruta`` a cuarentena.
+
+        Las referencias se leyeron al principio de la pasada: un upload que
+        reusó el blob después (BlobStore._archivar le actualiza el mtime) o
+        una fila que empezó a usarlo no tienen que perderlo.
+        """
+        try:
+            if ahora - os.path.getmtime(os.path.join(self.raiz, ruta)) < self.app.config['UPLOAD_ORPHAN_MIN_AGE']:
+                return False
+        except FileNotFoundError:
+            return False
+        digest = hash_de_ruta(ruta)
+        if digest is None:
+            return True
+        # conexión aparte: la transacción de la pasada no ve lo commiteado después
+        with db.engine.connect() as conn:
+            referencias = conn.scalar(select(Archivo.referencias).where(Archivo.hash == digest))
+        return not referencias
+
+    def _conciliar(self, informe):
+        """Ajusta la tabla ``archivo`` a lo que dicen las columnas.
+
+        En una transacción nueva: primero se bloquean las filas (FOR UPDATE) y
+        recién después se cuentan las referencias. Una edición que cambia una
+        imagen ajusta su fila de ``archivo`` antes que la columna, así que
+        espera a que esto termine; los conteos que se escriben son los de
+        ahora y no los del principio de la pasada.
+        """
+        db.session.commit()  # cierra la transacción de lectura de la pasada
+        archivos = db.session.scalars(select(Archivo).with_for_update()).all()
+        esperadas = {hash_de_ruta(ruta): sum(tipos.values())
+                     for ruta, tipos in self._referencias_db().items() if hash_de_ruta(ruta)}
+        for archivo in archivos:
+            cantidad = esperadas.get(archivo.hash, 0)
+            if archivo.referencias != cantidad:
+                informe.referencias_corregidas += 1
+                archivo.referencias = cantidad
+        borrados = [h for h in map(hash_de_ruta, informe.borrados) if h]
+        if borrados:
+            db.session.execute(delete(Archivo).where(Archivo.hash.in_(borrados), Archivo.referencias == 0))
+        db.session.commit()
+
+
+limpieza_uploads = LimpiezaUploads()
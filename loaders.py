@@ -0,0 +1,158 @@
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from models import db, Usuario, Experiencia, Educacion, Curso, Proyecto
+
+
+# -------------------------------
+# Contador de consultas SQL
+# Sirve para medir (y fijar en tests) cuántos round trips hace una vista.
+# -------------------------------
+_local = threading.local()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _contar_consulta(conn, cursor, statement, parameters, context, executemany):
+    contador = getattr(_local, 'contador', None)
+    if contador is not None:
+        contador.count += 1
+        contador.statements.append(statement)
+
+
+class QueryCounter:
+    """Acumula las consultas ejecutadas en el hilo actual."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@contextmanager
+def contar_consultas():
+    """Uso: ``with contar_consultas() as qc: ...; assert qc.count <= 5``."""
+    anterior = getattr(_local, 'contador', None)
+    contador = QueryCounter()
+    _local.contador = contador
+    try:
+        yield contador
+    finally:
+        _local.contador = anterior
+
+
+# -------------------------------
+# Cargador del perfil completo
+# Sin relationship() + selectinload en Usuario: para un solo usuario,
+# selectinload hace igual una consulta por relación (usuario + 4), y las
+# haría siempre. Con una consulta diferida por sección el costo es el
+# mismo en el peor caso, y las secciones que el template sirve desde la
+# cache de fragmentos no consultan nada (una visita del dueño con todo
+# cacheado son 2 consultas). Tampoco quedan relaciones que un template
+# pueda recorrer por accidente con una consulta fuera del presupuesto.
+# -------------------------------
+class SeccionDiferida(Sequence):
+    """Lista cuya consulta se ejecuta recién la primera vez que se usa.
+
+    Si el template sirve la sección desde la cache de fragmentos
+    (ver cache.PageCache.fragmento) la consulta no llega a hacerse.
+    """
+
+    def __init__(self, consulta):
+        self._consulta = consulta
+        self._filas = None
+
+    @property
+    def filas(self):
+        if self._filas is None:
+            self._filas = self._consulta()
+        return self._filas
+
+    def __getitem__(self, i):
+        return self.filas[i]
+
+    def __len__(self):
+        return len(self.filas)
+
+
+class CacheUsuarios:
+    """username -> id, para resolver /u/<username> sin consultar la base.
+
+    Los ids no cambian; si cambia o se borra un username, los eventos de
+    abajo lo sacan de la cache (y cargar_perfil verifica igual que coincida,
+    por si el cambio se hizo desde otro proceso).
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def id_de(self, username):
+        with self._lock:
+            usuario_id = self._ids.get(username)
+            if usuario_id is not None:
+                self._ids.move_to_end(username)
+                return usuario_id
+        usuario_id = db.session.execute(
+            select(Usuario.id).filter_by(username=username)
+        ).scalar_one_or_none()
+        if usuario_id is not None:
+            with self._lock:
+                self._ids[username] = usuario_id
+                while len(self._ids) > self.max_entries:
+                    self._ids.popitem(last=False)
+        return usuario_id
+
+    def olvidar(self, username):
+        with self._lock:
+            self._ids.pop(username, None)
+
+
+usuarios = CacheUsuarios()
+
+
+@event.listens_for(Usuario, 'after_update', propagate=True)
+def _username_modificado(mapper, connection, target):
+    for anterior in db.inspect(target).attrs.username.history.deleted:
+        usuarios.olvidar(anterior)
+
+
+@event.listens_for(Usuario, 'after_delete', propagate=True)
+def _usuario_borrado(mapper, connection, target):
+    usuarios.olvidar(target.username)
+
+
+def _filas_de(modelo, usuario_id):
+    # usa el índice (usuario_id, id): solo se leen las filas de este perfil
+    return modelo.query.filter_by(usuario_id=usuario_id).order_by(modelo.id).all()
+
+
+def cargar_perfil(username):
+    """Trae el usuario y todas las secciones de su portfolio.
+
+    Cantidad fija de consultas sin importar cuántas filas o perfiles haya:
+    usuario (por PK, con el id resuelto desde la cache) y, como mucho, una
+    por sección, solo para las secciones que realmente se renderizan. El
+    presupuesto es de 6 consultas (id del usuario, usuario y 4 secciones)
+    y lo fija tests/test_loaders.py.
+    Devuelve None si el usuario no existe.
+    """
+    usuario_id = usuarios.id_de(username)
+    if usuario_id is None:
+        return None
+    usuario = db.session.get(Usuario, usuario_id)
+    if usuario is None or usuario.username != username:
+        usuarios.olvidar(username)
+        return None
+
+    return {
+        'usuario': usuario,
+        'educacion': SeccionDiferida(lambda: _filas_de(Educacion, usuario_id)),
+        'cursos': SeccionDiferida(lambda: _filas_de(Curso, usuario_id)),
+        'experiencias': SeccionDiferida(lambda: _filas_de(Experiencia, usuario_id)),
+        'proyectos': SeccionDiferida(lambda: _filas_de(Proyecto, usuario_id)),
+    }
@@ -0,0 +1,257 @@
+from collections import defaultdict
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from flask_wtf.csrf import validate_csrf
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import MultiDict
+from wtforms import ValidationError
+
+from cache import marcar_modificado
+from forms import (AddExperienciaForm, EditExperienciaForm, EducacionForm,
+                   CursoForm, EditarCursoForm, ProyectoForm)
+from models import db, Experiencia, Educacion, Curso, Proyecto
+from search import actualizar_en_lote
+from storage import COLUMNAS_ARCHIVO, ajustar_referencias, blob_store, hash_de_ruta
+
+
+# -------------------------------
+# Ediciones en lote: POST /lote
+# {"operaciones": [
+#     {"op": "crear", "recurso": "cursos", "datos": {"nombre": ..., ...}},
+#     {"op": "modificar", "recurso": "experiencias", "id": 3, "datos": {"puesto": ...}},
+#     {"op": "eliminar", "recurso": "proyectos", "id": 7}
+# ]}
+# Cada operación se valida con el mismo formulario que su ruta individual;
+# si alguna falla no se aplica ninguna (400 con los errores por índice).
+# Si todas validan, se aplican en una transacción con una sentencia por
+# recurso y tipo de operación. Esas sentencias no pasan por el flush, así
+# que la cache, el índice de búsqueda y los contadores de archivos se
+# actualizan acá a mano.
+# -------------------------------
+lote = Blueprint('lote', __name__)
+
+# recurso -> (modelo, formulario para crear, formulario para modificar)
+RECURSOS = {
+    'experiencias': (Experiencia, AddExperienciaForm, EditExperienciaForm),
+    'educacion': (Educacion, EducacionForm, EducacionForm),
+    'cursos': (Curso, CursoForm, EditarCursoForm),
+    'proyectos': (Proyecto, ProyectoForm, ProyectoForm),
+}
+OPERACIONES = ('crear', 'modificar', 'eliminar')
+MAX_OPERACIONES = 200
+
+
+class LoteInvalido(Exception):
+    def __init__(self, status, errores):
+        super().__init__(errores)
+        self.status = status
+        self.errores = errores
+
+
+def _columnas(modelo, form):
+    """Campos del formulario que se guardan tal cual en una columna del modelo."""
+    columnas = modelo.__table__.columns
+    return [nombre for nombre in form._fields
+            if nombre in columnas and nombre != COLUMNAS_ARCHIVO.get(modelo)]
+
+
+def _validar_archivo(ruta):
+    # los archivos no viajan en el JSON: se suben antes por /subidas
+    # (destino "imagen") y acá llega la ruta que devolvió
+    digest = hash_de_ruta(ruta) if isinstance(ruta, str) else None
+    if digest is None or blob_store.buscar(digest) != ruta:
+        return ['no es un archivo subido (ver /subidas)']
+    return None
+
+
+class Plan:
+    """Operaciones validadas, agrupadas por recurso y tipo."""
+
+    def __init__(self, usuario_id):
+        self.usuario_id = usuario_id
+        self.crear = defaultdict(list)       # modelo -> [(indice, valores)]
+        self.modificar = defaultdict(list)   # modelo -> [(indice, fila actual, cambios)]
+        self.eliminar = defaultdict(list)    # modelo -> [(indice, fila actual)]
+
+
+def planificar(operaciones, usuario_id):
+    """Valida todas las operaciones sin escribir nada. Devuelve un ``Plan``."""
+    if not isinstance(operaciones, list) or not operaciones:
+        raise LoteInvalido(400, [{'error': '"operaciones" tiene que ser una lista no vacía'}])
+    if len(operaciones) > MAX_OPERACIONES:
+        raise LoteInvalido(413, [{'error': f'hasta {MAX_OPERACIONES} operaciones por lote'}])
+
+    errores = []
+    pendientes = []  # (indice, op, recurso, id, datos) con forma correcta
+    vistos = set()
+    for indice, operacion in enumerate(operaciones):
+        if not isinstance(operacion, dict):
+            errores.append({'indice': indice, 'error': 'cada operación es un objeto'})
+            continue
+        op, recurso = operacion.get('op'), operacion.get('recurso')
+        objeto_id, datos = operacion.get('id'), operacion.get('datos') or {}
+        if op not in OPERACIONES:
+            errores.append({'indice': indice, 'error': f'"op" tiene que ser {", ".join(OPERACIONES)}'})
+        elif recurso not in RECURSOS:
+            errores.append({'indice': indice, 'error': f'recurso desconocido: {recurso}'})
+        elif op != 'crear' and not isinstance(objeto_id, int):
+            errores.append({'indice': indice, 'error': '"id" tiene que ser un entero'})
+        elif op != 'crear' and (recurso, objeto_id) in vistos:
+            errores.append({'indice': indice, 'error': 'la misma fila aparece en dos operaciones'})
+        elif not isinstance(datos, dict):
+            errores.append({'indice': indice, 'error': '"datos" tiene que ser un objeto'})
+        else:
+            vistos.add((recurso, objeto_id))
+            pendientes.append((indice, op, recurso, objeto_id, datos))
+
+    # filas actuales de lo que se modifica o elimina: una consulta por
+    # recurso, filtrada por dueño (una fila ajena es igual que una inexistente)
+    ids = defaultdict(set)
+    for _, op, recurso, objeto_id, _ in pendientes:
+        if op != 'crear':
+            ids[recurso].add(objeto_id)
+    actuales = {}
+    for recurso, ids_recurso in ids.items():
+        modelo = RECURSOS[recurso][0]
+        for fila in db.session.execute(
+            select(modelo.__table__).where(modelo.id.in_(ids_recurso), modelo.usuario_id == usuario_id)
+        ).mappings():
+            actuales[(recurso, fila['id'])] = dict(fila)
+
+    plan = Plan(usuario_id)
+    for indice, op, recurso, objeto_id, datos in pendientes:
+        modelo, form_crear, form_modificar = RECURSOS[recurso]
+        actual = actuales.get((recurso, objeto_id))
+        if op != 'crear' and actual is None:
+            errores.append({'indice': indice, 'error': f'{recurso} {objeto_id} no existe'})
+            continue
+        if op == 'eliminar':
+            plan.eliminar[modelo].append((indice, actual))
+            continue
+
+        # al modificar, lo que no viene en "datos" conserva su valor actual
+        columna_archivo = COLUMNAS_ARCHIVO.get(modelo)
+        valores = {**(actual or {}), **datos}
+        valores.pop(columna_archivo, None)
+        form_cls = form_crear if op == 'crear' else form_modificar
+        form = form_cls(formdata=MultiDict({n: '' if v is None else str(v) for n, v in valores.items()}),
+                        meta={'csrf': False})
+        columnas = _columnas(modelo, form)
+        desconocidos = sorted(set(datos) - set(columnas) - {columna_archivo})
+        if desconocidos:
+            errores.append({'indice': indice, 'campos': {n: ['campo desconocido'] for n in desconocidos}})
+            continue
+
+        campos_con_error = {} if form.validate() else dict(form.errors)
+        if columna_archivo and datos.get(columna_archivo) is not None:
+            error_archivo = _validar_archivo(datos[columna_archivo])
+            if error_archivo:
+                campos_con_error[columna_archivo] = error_archivo
+        if campos_con_error:
+            errores.append({'indice': indice, 'campos': campos_con_error})
+            continue
+
+        cambios = {n: form[n].data for n in columnas if op == 'crear' or n in datos}
+        if columna_archivo and columna_archivo in datos:
+            cambios[columna_archivo] = datos[columna_archivo]
+        if op == 'crear':
+            plan.crear[modelo].append((indice, cambios))
+        else:
+            plan.modificar[modelo].append((indice, actual, cambios))
+
+    if errores:
+        raise LoteInvalido(400, sorted(errores, key=lambda e: e['indice']))
+    return plan
+
+
+def _insertar(modelo, filas):
+    """Inserta ``filas`` y devuelve sus ids en el mismo orden."""
+    dialecto = db.session.get_bind().dialect
+    if dialecto.insert_executemany_returning_sort_by_parameter_order:
+        return db.session.scalars(
+            insert(modelo).returning(modelo.id, sort_by_parameter_order=True), filas
+        ).all()
+    # sin RETURNING (MySQL): un INSERT por fila, igual dentro de la transacción
+    return [db.session.execute(insert(modelo).values(**f)).inserted_primary_key[0] for f in filas]
+
+
+def aplicar(plan):
+    """Ejecuta un ``Plan`` en una transacción. Devuelve un resultado por operación."""
+    resultados = {}
+    referencias = defaultdict(int)
+    tocados = set()
+    try:
+        recursos = {modelo: recurso for recurso, (modelo, _, _) in RECURSOS.items()}
+        for modelo, items in plan.eliminar.items():
+            ids = [actual['id'] for _, actual in items]
+            db.session.execute(
+                delete(modelo).where(modelo.id.in_(ids), modelo.usuario_id == plan.usuario_id),
+                execution_options={'synchronize_session': False},
+            )
+            actualizar_en_lote(db.session, modelo, borrados=ids)
+            columna_archivo = COLUMNAS_ARCHIVO.get(modelo)
+            for indice, actual in items:
+                if columna_archivo:
+                    referencias[actual[columna_archivo]] -= 1
+                resultados[indice] = {'op': 'eliminar', 'recurso': recursos[modelo], 'id': actual['id']}
+            tocados.add(modelo)
+
+        for modelo, items in plan.modificar.items():
+            filas = [{'id': actual['id'], **cambios} for _, actual, cambios in items if cambios]
+            if filas:
+                # UPDATE por clave primaria, en lote (executemany)
+                db.session.execute(update(modelo), filas,
+                                   execution_options={'synchronize_session': False})
+            actualizar_en_lote(db.session, modelo, filas=[{**actual, **cambios} for _, actual, cambios in items])
+            columna_archivo = COLUMNAS_ARCHIVO.get(modelo)
+            for indice, actual, cambios in items:
+                if columna_archivo in cambios and cambios[columna_archivo] != actual[columna_archivo]:
+                    referencias[actual[columna_archivo]] -= 1
+                    referencias[cambios[columna_archivo]] += 1
+                resultados[indice] = {'op': 'modificar', 'recurso': recursos[modelo], 'id': actual['id']}
+            tocados.add(modelo)
+
+        for modelo, items in plan.crear.items():
+            filas = [{'usuario_id': plan.usuario_id, **valores} for _, valores in items]
+            ids = _insertar(modelo, filas)
+            actualizar_en_lote(db.session, modelo, filas=[{**f, 'id': i} for f, i in zip(filas, ids)])
+            columna_archivo = COLUMNAS_ARCHIVO.get(modelo)
+            for (indice, valores), nuevo_id in zip(items, ids):
+                if columna_archivo:
+                    referencias[valores.get(columna_archivo)] += 1
+                resultados[indice] = {'op': 'crear', 'recurso': recursos[modelo], 'id': nuevo_id}
+            tocados.add(modelo)
+
+        ajustar_referencias(db.session, referencias)
+        for modelo in tocados:
+            marcar_modificado(db.session, modelo.__tablename__, plan.usuario_id)
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    return [resultados[i] for i in sorted(resultados)]
+
+
+# -------------------------------
+# Ruta
+# -------------------------------
+@lote.errorhandler(LoteInvalido)
+def _error(e):
+    return jsonify({'errores': e.errores}), e.status
+
+
+@lote.route('/lote', methods=['POST'])
+def aplicar_lote():
+    if not current_user.is_authenticated:
+        raise LoteInvalido(401, [{'error': 'hay que iniciar sesión'}])
+    if current_app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken'))
+        except ValidationError as e:
+            raise LoteInvalido(400, [{'error': str(e)}])
+
+    datos = request.get_json(silent=True) or {}
+    plan = planificar(datos.get('operaciones'), current_user.id)
+    resultados = aplicar(plan)
+    return jsonify({'resultados': resultados, 'total': len(resultados)})
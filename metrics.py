@@ -0,0 +1,342 @@
+import io
+import os
+import json
+import glob
+import hmac
+import time
+import random
+import pstats
+import logging
+import cProfile
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from flask import Response, abort, current_app, g, request, template_rendered, before_render_template
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Métricas en formato texto de Prometheus
+# Sin dependencias: histogramas y contadores con etiquetas, protegidos por
+# un lock. Se exponen en /metrics (con METRICS_TOKEN o la sesión del
+# PERFIL_PRINCIPAL).
+# Cada proceso cuenta lo suyo; con varios workers (gunicorn) METRICS_DIR
+# activa el modo multiproceso: cada worker deja una foto de sus series en
+# METRICS_DIR/<pid>-<id>.json (a lo sumo una vez por segundo) y /metrics
+# suma las de todos, también las de workers que ya terminaron (los
+# contadores no retroceden cuando gunicorn recicla un worker). El
+# directorio se vacía al desplegar, antes de arrancar gunicorn.
+# -------------------------------
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100)
+BUCKETS_BYTES = (1024, 10240, 102400, 524288, 1048576, 2097152, 5242880, 10485760)
+
+
+def _etiquetas(labels):
+    if not labels:
+        return ''
+    partes = []
+    for k, v in labels:
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{k}="{v}"')
+    return '{' + ','.join(partes) + '}'
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **labels):
+        clave = tuple(sorted(labels.items()))
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def copia(self):
+        with self._lock:
+            return {k: [list(v[0]), v[1], v[2]] for k, v in self._series.items()}
+
+    @staticmethod
+    def sumar(series, clave, serie):
+        actual = series.get(clave)
+        if actual is None:
+            series[clave] = [list(serie[0]), serie[1], serie[2]]
+            return
+        actual[0] = [a + b for a, b in zip(actual[0], serie[0])]
+        actual[1] += serie[1]
+        actual[2] += serie[2]
+
+    def exponer(self, series=None):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        if series is None:
+            series = self.copia()
+        for clave, (cuentas, suma, total) in sorted(series.items()):
+            for limite, cuenta in zip(self.buckets, cuentas):
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(clave + (("le", limite),))} {cuenta}')
+            lineas.append(f'{self.nombre}_bucket{_etiquetas(clave + (("le", "+Inf"),))} {total}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(clave)} {suma}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(clave)} {total}')
+        return lineas
+
+
+class Contador:
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, valor=1, **labels):
+        clave = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + valor
+
+    def copia(self):
+        with self._lock:
+            return dict(self._series)
+
+    @staticmethod
+    def sumar(series, clave, valor):
+        series[clave] = series.get(clave, 0) + valor
+
+    def exponer(self, series=None):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        if series is None:
+            series = self.copia()
+        for clave, valor in sorted(series.items()):
+            lineas.append(f'{self.nombre}{_etiquetas(clave)} {valor}')
+        return lineas
+
+
+request_seconds = Histograma('portfolio_request_seconds', 'Latencia por endpoint', BUCKETS_SEGUNDOS)
+requests_total = Contador('portfolio_requests_total', 'Requests por endpoint y status')
+sql_queries = Histograma('portfolio_sql_queries_per_request', 'Consultas SQL por request', BUCKETS_CONSULTAS)
+sql_seconds = Histograma('portfolio_sql_seconds_per_request', 'Tiempo en SQL por request', BUCKETS_SEGUNDOS)
+template_seconds = Histograma('portfolio_template_render_seconds', 'Render de templates Jinja', BUCKETS_SEGUNDOS)
+operation_seconds = Histograma('portfolio_operation_seconds', 'Operaciones costosas (bcrypt, uploads)', BUCKETS_SEGUNDOS)
+upload_bytes = Histograma('portfolio_upload_bytes', 'Tamaño de los archivos subidos', BUCKETS_BYTES)
+db_lecturas = Contador('portfolio_db_requests_total', 'Requests por base usada para leer (primaria o réplica)')
+
+REGISTRO = (request_seconds, requests_total, sql_queries, sql_seconds,
+            template_seconds, operation_seconds, upload_bytes, db_lecturas)
+
+
+def exponer(series=None):
+    """Texto de /metrics; ``series`` ({nombre: series}) reemplaza las de este proceso."""
+    lineas = []
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exponer(series[metrica.nombre] if series is not None else None))
+    return '\n'.join(lineas) + '\n'
+
+
+class Multiproceso:
+    """Fotos de las series de cada worker en un directorio compartido."""
+
+    def __init__(self, directorio, intervalo=1.0):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        os.makedirs(directorio, exist_ok=True)
+        self._archivo = None
+        self._pid = None
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self):
+        # nombre nuevo en cada proceso: un pid reutilizado no pisa la foto
+        # de un worker muerto (sus contadores siguen sumando)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._archivo = os.path.join(self.directorio, f'{self._pid}-{os.urandom(4).hex()}.json')
+        return self._archivo
+
+    def guardar(self, forzar=False):
+        ahora = time.monotonic()
+        if not forzar and ahora < self._proxima:
+            return
+        if not self._lock.acquire(blocking=forzar):
+            return  # otro hilo de este worker la está escribiendo
+        try:
+            self._proxima = ahora + self.intervalo
+            foto = {m.nombre: [[list(map(list, clave)), valor] for clave, valor in m.copia().items()]
+                    for m in REGISTRO}
+            fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(foto, f)
+            os.replace(tmp, self._path())
+        finally:
+            self._lock.release()
+
+    def juntar(self):
+        """Suma de las series de todos los workers, vivos o no."""
+        self.guardar(forzar=True)
+        series = {m.nombre: {} for m in REGISTRO}
+        metricas = {m.nombre: m for m in REGISTRO}
+        for path in glob.glob(os.path.join(self.directorio, '*.json')):
+            try:
+                with open(path) as f:
+                    foto = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nombre, filas in foto.items():
+                metrica = metricas.get(nombre)
+                if metrica is None:
+                    continue  # métrica que ya no existe (foto de una versión anterior)
+                for clave, valor in filas:
+                    metrica.sumar(series[nombre], tuple(map(tuple, clave)), valor)
+        return series
+
+
+@contextmanager
+def medir(operacion):
+    """``with medir('bcrypt'): ...`` registra la duración en operation_seconds."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        operation_seconds.observar(time.perf_counter() - inicio, op=operacion)
+
+
+# -------------------------------
+# SQL por request (eventos del engine, estado por hilo)
+# -------------------------------
+_local = threading.local()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_inicio', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info['metrics_inicio'].pop()
+    estado = getattr(_local, 'sql', None)
+    if estado is not None:
+        estado[0] += 1
+        estado[1] += time.perf_counter() - inicio
+
+
+@event.listens_for(Engine, 'handle_error')
+def _consulta_fallida(contexto):
+    # after_cursor_execute no corre si la consulta falla: se saca acá el inicio
+    if contexto.connection is None or contexto.execution_context is None:
+        return  # falló antes de ejecutar (conexión, compilación): no hubo inicio
+    pila = contexto.connection.info.get('metrics_inicio')
+    if pila:
+        pila.pop()
+
+
+# -------------------------------
+# Hooks de Flask
+# -------------------------------
+class Metrics:
+    def __init__(self, app=None):
+        self.token = None
+        self.multiproceso = None
+        self.umbral_lento = None
+        self.muestreo = 0.0
+        self._perfilando = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.token = app.config.get('METRICS_TOKEN')
+        if app.config.get('METRICS_DIR'):
+            self.multiproceso = Multiproceso(app.config['METRICS_DIR'])
+        self.umbral_lento = app.config.get('SLOW_REQUEST_SECONDS')
+        self.muestreo = app.config.get('SLOW_REQUEST_PROFILE_SAMPLE', 0.0)
+        app.before_request(self._inicio)
+        app.after_request(self._status)
+        app.teardown_request(self._fin)
+        template_rendered.connect(self._template_fin, app)
+        before_render_template.connect(self._template_inicio, app)
+        app.add_url_rule('/metrics', 'metrics', self.vista)
+        app.extensions['metrics'] = self
+
+    def _inicio(self):
+        g.metrics_inicio = time.perf_counter()
+        _local.sql = [0, 0.0]
+        g.metrics_perfil = None
+        # perfil muestreado: solo uno a la vez (cProfile no admite varios por proceso)
+        if self.umbral_lento and self.muestreo and random.random() < self.muestreo:
+            if self._perfilando.acquire(blocking=False):
+                g.metrics_perfil = cProfile.Profile()
+                g.metrics_perfil.enable()
+
+    def _status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _fin(self, exc):
+        inicio = g.pop('metrics_inicio', None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        endpoint = request.endpoint or 'desconocido'
+        # en una respuesta por partes el teardown llega con el GeneratorExit
+        # del cierre del generador, que no es un error
+        error = exc is not None and not isinstance(exc, GeneratorExit)
+        status = 500 if error else getattr(g, 'metrics_status', 200)
+
+        request_seconds.observar(duracion, endpoint=endpoint, method=request.method)
+        requests_total.incrementar(endpoint=endpoint, method=request.method, status=status)
+        consultas, tiempo_sql = getattr(_local, 'sql', None) or (0, 0.0)
+        _local.sql = None
+        sql_queries.observar(consultas, endpoint=endpoint)
+        sql_seconds.observar(tiempo_sql, endpoint=endpoint)
+
+        perfil = g.pop('metrics_perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            self._perfilando.release()
+
+        if self.umbral_lento and duracion >= self.umbral_lento:
+            mensaje = (f'Request lento: {request.method} {request.path} ({endpoint}) '
+                       f'{duracion * 1000:.0f} ms, {consultas} consultas SQL ({tiempo_sql * 1000:.0f} ms)')
+            if perfil is not None:
+                salida = io.StringIO()
+                pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(25)
+                mensaje += '\n' + salida.getvalue()
+            logger.warning(mensaje)
+
+        if self.multiproceso is not None:
+            self.multiproceso.guardar()
+
+    def _template_inicio(self, sender, template, context, **extra):
+        g.setdefault('metrics_templates', []).append(time.perf_counter())
+
+    def _template_fin(self, sender, template, context, **extra):
+        pila = g.get('metrics_templates')
+        if pila:
+            template_seconds.observar(time.perf_counter() - pila.pop(), template=template.name or '?')
+
+    def vista(self):
+        # no cualquier dueño de un perfil: el token o la sesión del perfil principal
+        autorizado = current_user.is_authenticated and \
+            current_user.username == current_app.config['PERFIL_PRINCIPAL']
+        if self.token:
+            # comparación en tiempo constante: el tiempo de respuesta no delata el token
+            recibido = request.headers.get('Authorization', '').encode('utf-8')
+            autorizado = autorizado or hmac.compare_digest(recibido, f'Bearer {self.token}'.encode('utf-8'))
+        if not autorizado:
+            abort(404)
+        series = self.multiproceso.juntar() if self.multiproceso is not None else None
+        return Response(exponer(series), mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics()
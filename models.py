@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
-db = SQLAlchemy()
+from replicas import SesionEnrutada
+
+# las lecturas públicas pueden ir a una réplica (ver replicas.py)
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
 
 # -------------------------------
 # POO: Herencia (Inheritance)
@@ -28,9 +31,17 @@ class Usuario(BaseModel):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)  # hashed password
     nombre_publico = db.Column(db.String(120), default='Tu Nombre')
-    profile_image = db.Column(db.String(255), default='default_profile.png')
+    # active_history en las columnas de archivo (ver storage.COLUMNAS_ARCHIVO):
+    # al asignarlas en una fila expirada (p. ej. después de un commit) se lee
+    # antes el valor anterior; sin él no queda en el historial y el contador
+    # de ese archivo nunca se descuenta
+    profile_image = db.column_property(db.Column(db.String(255), default='default_profile.png'),
+                                       active_history=True)
     acerca_de_mi = db.Column(db.Text, default="¡Hola! Soy desarrolladora web con enfoque en front-end.")
 
+    # Sin relaciones a las secciones: se cargan con loaders.cargar_perfil,
+    # una consulta por sección y nunca una por fila (el porqué, en loaders.py).
+
     def check_password(self, bcrypt, plain_password):
         """Envuelve la comprobación de contraseña para encapsular la lógica."""
         return bcrypt.check_password_hash(self.password, plain_password)
@@ -67,9 +78,19 @@ class Persona(db.Model):
 
 
 
-class Experiencia(db.Model):
+# -------------------------------
+# Secciones del portfolio
+# Heredan de BaseModel (id + created_at + save). Cada fila pertenece a un
+# usuario; el índice (usuario_id, id) resuelve "las filas de este perfil en
+# orden" sin recorrer las de los demás perfiles.
+# -------------------------------
+def _indice_por_usuario(tabla):
+    return (db.Index(f'ix_{tabla}_usuario_id_id', 'usuario_id', 'id'),)
+
+
+class Experiencia(BaseModel):
     __tablename__ = 'experiencia'
-    id = db.Column(db.Integer, primary_key=True)
+    __table_args__ = _indice_por_usuario('experiencia')
     proyecto = db.Column(db.String(200), nullable=False)
     descripcion = db.Column(db.Text, nullable=False)
     puesto = db.Column(db.String(200), nullable=False)
@@ -77,26 +98,77 @@ class Experiencia(db.Model):
     logros = db.Column(db.Text, nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'))
 
-class Educacion(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+class Educacion(BaseModel):
+    __tablename__ = 'educacion'
+    __table_args__ = _indice_por_usuario('educacion')
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
     titulo = db.Column(db.String(200), nullable=False)
     institucion = db.Column(db.String(200), nullable=False)
-    logo = db.Column(db.String(255))
+    logo = db.column_property(db.Column(db.String(255)), active_history=True)  # ver Usuario.profile_image
     periodo = db.Column(db.String(150))
     estado = db.Column(db.String(100))
 
-class Curso(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+class Curso(BaseModel):
+    __tablename__ = 'curso'
+    __table_args__ = _indice_por_usuario('curso')
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
     nombre = db.Column(db.String(200), nullable=False)
     institucion = db.Column(db.String(200), nullable=False)
     periodo = db.Column(db.String(150))
+    certificacion_url = db.Column(db.String(255))
 
-class Proyecto(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+class Proyecto(BaseModel):
+    __tablename__ = 'proyecto'
+    __table_args__ = _indice_por_usuario('proyecto')
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', name='fk_proyecto_usuario_id_usuario'))
     titulo = db.Column(db.String(150), nullable=False)
     descripcion = db.Column(db.String(300))
     fecha = db.Column(db.String(50))
     github_url = db.Column(db.String(200))
-    imagen = db.Column(db.String(255))
+    imagen = db.column_property(db.Column(db.String(255)), active_history=True)  # ver Usuario.profile_image
+
+
+# -------------------------------
+# Archivos subidos (almacenamiento por contenido, ver storage.py)
+# Cada blob se guarda una sola vez bajo su hash; "referencias" cuenta
+# cuántas columnas de imagen (Usuario.profile_image, Educacion.logo,
+# Proyecto.imagen) lo usan.
+# -------------------------------
+class Archivo(db.Model):
+    __tablename__ = 'archivo'
+    hash = db.Column(db.String(64), primary_key=True)
+    ruta = db.Column(db.String(255), nullable=False, unique=True)
+    tamanio = db.Column(db.BigInteger, nullable=False, default=0)
+    referencias = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------------------
+# Índice invertido de /buscar (ver search.py)
+# Una fila por (término, entidad) con el peso del término en esa entidad.
+# Se actualiza en el mismo flush que modifica la entidad.
+# -------------------------------
+class TerminoIndice(db.Model):
+    __tablename__ = 'termino_indice'
+    termino = db.Column(db.String(64), primary_key=True)
+    tipo = db.Column(db.String(20), primary_key=True)
+    objeto_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    usuario_id = db.Column(db.Integer, nullable=False)  # dueño de la entidad
+    peso = db.Column(db.Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        # para borrar los términos de una entidad sin recorrer todo el índice
+        db.Index('ix_termino_indice_objeto', 'tipo', 'objeto_id'),
+        # la búsqueda es siempre dentro de un perfil
+        db.Index('ix_termino_indice_usuario', 'usuario_id', 'termino'),
+    )
+
+
+# -------------------------------
+# Latido para medir el retraso de las réplicas (ver replicas.py)
+# Una sola fila; cada worker le pone la hora actual cada pocos segundos.
+# -------------------------------
+class Latido(db.Model):
+    __tablename__ = 'latido'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    momento_ms = db.Column(db.BigInteger, nullable=False, default=0)
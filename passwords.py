@@ -0,0 +1,161 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from metrics import medir
+
+
+# -------------------------------
+# Verificación de contraseñas acotada
+# bcrypt es caro a propósito. Para que una ráfaga de intentos de login no
+# ocupe todos los workers, las verificaciones corren en un pool chico con
+# una cola de tamaño fijo: si está llena se rechaza sin hashear nada.
+# -------------------------------
+class Saturado(Exception):
+    """El pool de verificación no acepta más trabajo en este momento."""
+
+
+class VerificadorPasswords:
+    def __init__(self, app=None, bcrypt=None):
+        self.bcrypt = bcrypt
+        self.executor = None
+        self._cupos = None
+        self.timeout = 5
+        self.rondas = 12
+        self._hash_falso = None
+        if app is not None:
+            self.init_app(app, bcrypt)
+
+    def init_app(self, app, bcrypt):
+        self.bcrypt = bcrypt
+        workers = app.config.get('BCRYPT_WORKERS', 2)
+        cola = app.config.get('BCRYPT_QUEUE_DEPTH', 8)
+        self.timeout = app.config.get('BCRYPT_TIMEOUT', 5)
+        self.rondas = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        # trabajos en ejecución + en espera
+        self._cupos = threading.BoundedSemaphore(workers + cola)
+        app.extensions['verificador_passwords'] = self
+
+    def _ejecutar(self, fn, *args):
+        if not self._cupos.acquire(blocking=False):
+            raise Saturado()
+        try:
+            futuro = self.executor.submit(fn, *args)
+        except BaseException:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            raise Saturado()
+
+    def _check(self, hashed, plain):
+        with medir('bcrypt_check'):
+            return self.bcrypt.check_password_hash(hashed, plain)
+
+    def _generar(self, plain):
+        with medir('bcrypt_hash'):
+            return self.bcrypt.generate_password_hash(plain)
+
+    def verificar(self, hashed, plain):
+        return self._ejecutar(self._check, hashed, plain)
+
+    def verificar_sin_usuario(self, plain):
+        """Hace el mismo trabajo que ``verificar`` contra un hash descartable. Siempre False."""
+        if self._hash_falso is None:
+            # se genera en el primer uso (con el costo configurado), no al arrancar
+            self._hash_falso = self._ejecutar(self._generar, os.urandom(16).hex())
+        self.verificar(self._hash_falso, plain)
+        return False
+
+    def generar_hash(self, plain):
+        return self._ejecutar(self._generar, plain).decode('utf-8')
+
+    def necesita_rehash(self, hashed):
+        """True si el hash se hizo con un costo distinto al configurado."""
+        try:
+            costo = int(hashed.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return True
+        return costo != self.rondas
+
+
+verificador = VerificadorPasswords()
+
+
+# -------------------------------
+# Throttling de login (token bucket)
+# Se chequea antes de tocar la base o bcrypt, así rechazar es barato.
+# Un bucket por IP (una IP probando muchos usuarios) y otro por usuario
+# (muchas IPs probando el mismo usuario). El de usuario tiene más ráfaga:
+# unos intentos ajenos no le bloquean el login al dueño.
+# -------------------------------
+class TokenBucket:
+    __slots__ = ('tokens', 'actualizado')
+
+    def __init__(self, capacidad):
+        self.tokens = capacidad
+        self.actualizado = time.monotonic()
+
+
+class Throttle:
+    MAX_CLAVES = 10000
+
+    def __init__(self, capacidad, por_minuto):
+        self.capacidad = capacidad
+        self.por_segundo = por_minuto / 60.0
+        self._buckets = OrderedDict()  # de menos a más recientemente usado
+        self._lock = threading.Lock()
+
+    def _recargar(self, bucket, ahora):
+        bucket.tokens = min(self.capacidad, bucket.tokens + (ahora - bucket.actualizado) * self.por_segundo)
+        bucket.actualizado = ahora
+
+    def permitir(self, clave):
+        ahora = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(clave)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_CLAVES:
+                    self._podar(ahora)
+                bucket = self._buckets[clave] = TokenBucket(self.capacidad)
+            else:
+                self._buckets.move_to_end(clave)
+            self._recargar(bucket, ahora)
+            if bucket.tokens < 1:
+                return False
+            bucket.tokens -= 1
+            return True
+
+    def _podar(self, ahora):
+        # los buckets llenos equivalen a "sin historial": se pueden borrar
+        for clave, bucket in list(self._buckets.items()):
+            self._recargar(bucket, ahora)
+            if bucket.tokens >= self.capacidad:
+                del self._buckets[clave]
+        # con muchas claves activas a la vez (IPs o usernames inventados) se
+        # descartan las usadas hace más tiempo: el tamaño queda acotado
+        while len(self._buckets) >= self.MAX_CLAVES:
+            self._buckets.popitem(last=False)
+
+
+class LoginThrottle:
+    def __init__(self):
+        self.por_ip = Throttle(10, 10)
+        self.por_usuario = Throttle(20, 10)
+
+    def init_app(self, app):
+        self.por_ip = Throttle(app.config.get('LOGIN_IP_BURST', 10),
+                               app.config.get('LOGIN_IP_PER_MINUTE', 10))
+        self.por_usuario = Throttle(app.config.get('LOGIN_USER_BURST', 20),
+                                    app.config.get('LOGIN_USER_PER_MINUTE', 10))
+
+    def permitir(self, ip, username):
+        return self.por_ip.permitir(ip) and self.por_usuario.permitir((username or '').lower())
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,234 @@
+import os
+import time
+import random
+import logging
+import threading
+
+from flask import current_app, g, has_request_context, request, session as cookie
+from flask_sqlalchemy.session import Session as SesionFlask
+from sqlalchemy import column, event, select, table, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from metrics import db_lecturas
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Réplicas de lectura (SQLALCHEMY_BINDS "replica_0", "replica_1", ...)
+# Los GET/HEAD de visitantes anónimos leen de una réplica; todo lo demás
+# (escrituras, admins logueados, CLI) va a la primaria. Después de un
+# commit con escrituras, ese navegador (cookie de sesión) y este proceso
+# leen de la primaria durante DB_READ_YOUR_WRITES_SECONDS: el redirect que
+# sigue a un POST ve lo que se acaba de guardar aunque la réplica venga
+# atrasada.
+#
+# Retraso: un hilo por proceso actualiza la fila de ``latido`` en la
+# primaria cada DB_REPLICA_CHECK_INTERVAL segundos (fuera de las
+# transacciones de los usuarios) y después lee el latido de cada réplica.
+# El retraso es "latido de la primaria - latido de la réplica": no depende
+# de que haya escrituras, así que tras un rato sin ediciones una réplica al
+# día sigue en 0 (la resolución es el intervalo). Una réplica con más de
+# DB_REPLICA_MAX_LAG segundos, o que no responde, queda afuera hasta la
+# próxima revisión. Los requests solo leen el último estado: una réplica
+# colgada traba al hilo, no a los usuarios.
+# -------------------------------
+PREFIJO = 'replica'
+CLAVE_PRIMARIA_HASTA = '_db_primaria_hasta'
+LATIDO = table('latido', column('id'), column('momento_ms'))
+METODOS_LECTURA = ('GET', 'HEAD')
+# revisiones sin completar tras las que el último estado ya no vale
+REVISIONES_VIGENTES = 3
+
+
+class EstadoReplica:
+    def __init__(self, nombre, retraso=None, error=None, max_lag=0):
+        self.nombre = nombre
+        self.retraso = retraso  # segundos (estimado); None si no respondió
+        self.error = error
+        self.sana = error is None and retraso is not None and retraso <= max_lag
+
+    def como_dict(self):
+        return {'nombre': self.nombre, 'retraso': self.retraso, 'sana': self.sana, 'error': self.error}
+
+
+class Replicas:
+    def __init__(self, app=None):
+        self.nombres = ()
+        self.max_lag = 5.0
+        self.intervalo = 2.0
+        self.ventana = 10.0
+        self.estados = {}
+        self.app = None
+        self._revisado = None  # time.monotonic() de la última revisión
+        self._pid = None       # proceso en el que corre el hilo de revisión
+        self._primaria_local_hasta = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        self.nombres = tuple(sorted(k for k in binds if k.startswith(PREFIJO)))
+        self.max_lag = app.config.get('DB_REPLICA_MAX_LAG', self.max_lag)
+        self.intervalo = app.config.get('DB_REPLICA_CHECK_INTERVAL', self.intervalo)
+        self.ventana = app.config.get('DB_READ_YOUR_WRITES_SECONDS', self.ventana)
+        app.extensions['replicas'] = self
+
+    # ---- salud y retraso ----
+    def latir(self):
+        """Actualiza el latido en la primaria (nunca lo hace retroceder)."""
+        ahora = int(time.time() * 1000)
+        with current_app.extensions['sqlalchemy'].engines[None].begin() as conn:
+            conn.execute(update(LATIDO).where(LATIDO.c.id == 1, LATIDO.c.momento_ms < ahora)
+                         .values(momento_ms=ahora))
+
+    def revisar(self):
+        """Lee el latido de la primaria y de cada réplica. Devuelve los estados."""
+        engines = current_app.extensions['sqlalchemy'].engines
+        try:
+            with engines[None].connect() as conn:
+                primaria = conn.scalar(select(LATIDO.c.momento_ms).where(LATIDO.c.id == 1)) or 0
+        except SQLAlchemyError as e:
+            # sin el latido de la primaria no se puede medir el retraso
+            estados = {n: EstadoReplica(n, error=f'primaria: {_error(e)}') for n in self.nombres}
+        else:
+            estados = {}
+            for nombre in self.nombres:
+                try:
+                    with engines[nombre].connect() as conn:
+                        latido = conn.scalar(select(LATIDO.c.momento_ms).where(LATIDO.c.id == 1))
+                except SQLAlchemyError as e:
+                    estados[nombre] = EstadoReplica(nombre, error=_error(e))
+                    continue
+                if latido is None:
+                    estados[nombre] = EstadoReplica(nombre, error='sin latido (¿faltan migraciones?)')
+                    continue
+                retraso = max(0, primaria - latido) / 1000
+                estados[nombre] = EstadoReplica(nombre, retraso=retraso, max_lag=self.max_lag)
+        self.estados = estados
+        self._revisado = time.monotonic()
+        return estados
+
+    def _iniciar(self):
+        # un hilo por proceso: tras un fork (gunicorn con preload_app) el
+        # hilo del master no existe en el worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._vigilar, name='replicas', daemon=True).start()
+
+    def _vigilar(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.latir()
+                    self.revisar()
+            except Exception:
+                logger.exception('No se pudo revisar el estado de las réplicas')
+            time.sleep(self.intervalo)
+
+    def _replica_sana(self):
+        self._iniciar()
+        if self._revisado is None or \
+                time.monotonic() - self._revisado > REVISIONES_VIGENTES * self.intervalo:
+            # todavía sin revisar, o el hilo quedó trabado con una réplica colgada
+            return None
+        sanas = [n for n, e in self.estados.items() if e.sana]
+        return random.choice(sanas) if sanas else None
+
+    # ---- a dónde va cada request ----
+    def _elegir(self):
+        if request.method not in METODOS_LECTURA or '_user_id' in cookie:
+            return None
+        if cookie.get(CLAVE_PRIMARIA_HASTA, 0) > time.time():
+            return None
+        if time.monotonic() < self._primaria_local_hasta:
+            # la cache de páginas de este proceso se regenera con lo recién escrito
+            return None
+        return self._replica_sana()
+
+    def para_leer(self):
+        """Engine de réplica para las lecturas de este request, o None (primaria).
+
+        Se decide una vez por request: todas sus lecturas ven el mismo estado.
+        """
+        if not self.nombres or not has_request_context():
+            return None
+        if 'db_replica' not in g:
+            g.db_replica = self._elegir()
+            db_lecturas.incrementar(destino=g.db_replica or 'primaria')
+        if g.db_replica is None:
+            return None
+        return current_app.extensions['sqlalchemy'].engines[g.db_replica]
+
+    def tras_escribir(self):
+        self._primaria_local_hasta = time.monotonic() + self.ventana
+        if has_request_context():
+            g.db_replica = None
+            cookie[CLAVE_PRIMARIA_HASTA] = time.time() + self.ventana
+
+    def usar_primaria(self):
+        """El resto de este request lee de la primaria.
+
+        Para lo que se guarda en la cache de páginas: una página armada con
+        una réplica atrasada se serviría hasta la próxima edición.
+        """
+        if has_request_context():
+            g.db_replica = None
+
+
+replicas = Replicas()
+
+
+def _error(e):
+    return str(getattr(e, 'orig', None) or e)
+
+
+def _es_escritura(clause):
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+
+class SesionEnrutada(SesionFlask):
+    """Sesión de Flask-SQLAlchemy que manda las lecturas a una réplica cuando se puede."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('escribio') \
+                and not _es_escritura(clause):
+            replica = replicas.para_leer()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# -------------------------------
+# Marcas de escritura
+# ``escribio`` manda a la primaria el resto de la transacción y, tras el
+# commit, abre la ventana de leer lo propio.
+# -------------------------------
+@event.listens_for(Session, 'after_flush')
+def _marcar_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info['escribio'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _marcar_dml(estado):
+    # insert()/update()/delete() en lote (lote.py) no pasan por el flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        estado.session.info['escribio'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _tras_commit(session):
+    if session.info.pop('escribio', False):
+        replicas.tras_escribir()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _tras_rollback(session):
+    session.info.pop('escribio', None)
@@ -0,0 +1,244 @@
+import re
+import math
+import unicodedata
+from collections import Counter, defaultdict
+
+from sqlalchemy import Float, case, cast, event, delete, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from cache import page_cache, grupo_perfil
+from models import db, Experiencia, Proyecto, Curso, TerminoIndice
+from replicas import replicas
+
+
+# -------------------------------
+# Búsqueda de texto completo (/buscar)
+# Índice invertido en la tabla termino_indice: por cada entidad se guardan
+# sus términos normalizados (sin tildes, en minúscula, sin plural) con un
+# peso según el campo y el usuario dueño (se busca dentro de un perfil).
+# Se actualiza en cada flush que crea, modifica o borra una entidad
+# indexada, así que buscar es una consulta por clave.
+# -------------------------------
+# campo -> peso (un término en el título pesa más que en la descripción)
+CAMPOS = {
+    Experiencia: {'proyecto': 3, 'puesto': 3, 'descripcion': 1, 'logros': 1},
+    Proyecto: {'titulo': 3, 'descripcion': 1},
+    Curso: {'nombre': 3, 'institucion': 1},
+}
+MODELOS = {modelo.__tablename__: modelo for modelo in CAMPOS}
+
+MAX_TERMINOS_CONSULTA = 10
+LARGO_TERMINO = 64
+K1 = 1.2  # saturación del peso (BM25): repetir un término rinde cada vez menos
+
+PALABRAS_VACIAS = frozenset('''
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun bajo bien cada
+como con contra cual cuando de del desde donde dos durante e el ella ellas ellos en
+entre era es esa esas ese eso esos esta estas este esto estos fue fueron ha hasta hay
+la las le les lo los mas me mi mis mucho muy ni no nos o otra otras otro otros para
+pero poco por porque que se ser si sin sobre su sus tambien tan te tiene todo todos
+tu un una uno unos y ya
+the and of to in for on with by at an is are
+'''.split())
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: "Programación" -> "programacion"."""
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _raiz(palabra):
+    # plural simple del español: "aplicaciones" y "aplicacion", "bases" y
+    # "base", "redes" y "red" quedan en la misma raíz
+    if not palabra.isalpha():
+        return palabra  # c++, c#, html5...
+    if len(palabra) > 4 and palabra.endswith('s'):
+        palabra = palabra[:-1]
+    if len(palabra) > 3 and palabra.endswith('e'):
+        palabra = palabra[:-1]
+    return palabra
+
+
+def tokens(texto):
+    """Términos indexables de un texto, en orden y con repeticiones."""
+    resultado = []
+    for palabra in TOKEN_RE.findall(normalizar(texto or '')):
+        if len(palabra) < 2 or palabra in PALABRAS_VACIAS:
+            continue
+        resultado.append(_raiz(palabra)[:LARGO_TERMINO])
+    return resultado
+
+
+def terminos_de(obj):
+    """{término: peso} de una entidad indexable."""
+    return _terminos(type(obj), lambda campo: getattr(obj, campo))
+
+
+def _terminos(modelo, valor):
+    pesos = Counter()
+    for campo, peso in CAMPOS[modelo].items():
+        for termino in tokens(valor(campo)):
+            pesos[termino] += peso
+    return pesos
+
+
+# -------------------------------
+# Mantenimiento incremental
+# -------------------------------
+def _filas(obj):
+    if obj.usuario_id is None:
+        return []  # sin dueño no aparece en ningún perfil (ni en su búsqueda)
+    tipo = obj.__tablename__
+    return [{'termino': t, 'tipo': tipo, 'objeto_id': obj.id, 'usuario_id': obj.usuario_id, 'peso': p}
+            for t, p in terminos_de(obj).items()]
+
+
+def _aplicar(conexion, borrar, filas):
+    for tipo, ids in borrar.items():
+        conexion.execute(
+            delete(TerminoIndice)
+            .where(TerminoIndice.tipo == tipo, TerminoIndice.objeto_id.in_(ids))
+        )
+    if filas:
+        conexion.execute(insert(TerminoIndice), filas)
+
+
+def _cambio_texto(obj):
+    estado = inspect(obj)
+    return any(estado.attrs[campo].history.has_changes() for campo in (*CAMPOS[type(obj)], 'usuario_id'))
+
+
+@event.listens_for(Session, 'after_flush')
+def _actualizar_indice(session, flush_context):
+    # después del flush las entidades nuevas ya tienen id; el historial de
+    # atributos todavía dice qué campos cambiaron
+    borrar = defaultdict(set)
+    nuevos = []
+    for obj in session.deleted:
+        if type(obj) in CAMPOS:
+            borrar[obj.__tablename__].add(obj.id)
+    for obj in session.dirty:
+        if type(obj) in CAMPOS and _cambio_texto(obj):
+            borrar[obj.__tablename__].add(obj.id)
+            nuevos.append(obj)
+    for obj in session.new:
+        if type(obj) in CAMPOS:
+            nuevos.append(obj)
+    if not borrar and not nuevos:
+        return
+
+    _aplicar(session.connection(), borrar, [fila for obj in nuevos for fila in _filas(obj)])
+
+
+def actualizar_en_lote(session, modelo, filas=(), borrados=()):
+    """Mantiene el índice para escrituras en lote (``insert``/``update``/``delete``
+    sobre la tabla), que no pasan por el flush y el listener no ve.
+
+    ``filas``: dicts con ``id``, ``usuario_id`` y los campos de texto de las
+    filas nuevas o modificadas; ``borrados``: ids de las filas eliminadas.
+    """
+    if modelo not in CAMPOS:
+        return
+    tipo = modelo.__tablename__
+    ids = set(borrados) | {f['id'] for f in filas}
+    nuevas = [{'termino': t, 'tipo': tipo, 'objeto_id': f['id'], 'usuario_id': f['usuario_id'], 'peso': p}
+              for f in filas if f['usuario_id'] is not None
+              for t, p in _terminos(modelo, f.get).items()]
+    _aplicar(session.connection(), {tipo: ids} if ids else {}, nuevas)
+
+
+def reindexar_todo(tamanio_lote=1000):
+    """Reconstruye el índice completo (contenido previo a la migración 0003)."""
+    db.session.execute(delete(TerminoIndice))
+    total = 0
+    for modelo in CAMPOS:
+        filas = []
+        for obj in db.session.scalars(select(modelo).execution_options(yield_per=tamanio_lote)):
+            filas.extend(_filas(obj))
+            total += 1
+            if len(filas) >= tamanio_lote:
+                db.session.execute(insert(TerminoIndice), filas)
+                filas = []
+        if filas:
+            db.session.execute(insert(TerminoIndice), filas)
+    db.session.commit()
+    return total
+
+
+# -------------------------------
+# Consulta
+# -------------------------------
+class Resultado:
+    def __init__(self, tipo, objeto, puntaje, coincidencias):
+        # coincidencias: cuántos términos distintos de la consulta contiene
+        self.tipo = tipo
+        self.objeto = objeto
+        self.puntaje = puntaje
+        self.coincidencias = coincidencias
+
+
+def _contar_documentos(usuario_id):
+    # se guarda en la cache: una réplica atrasada lo dejaría mal hasta la próxima edición
+    replicas.usar_primaria()
+    conteos = [select(func.count()).select_from(modelo).where(modelo.usuario_id == usuario_id)
+               .scalar_subquery() for modelo in CAMPOS]
+    return str(sum(db.session.execute(select(*conteos)).one()))
+
+
+def _cantidad_documentos(usuario_id):
+    # cambia solo cuando se edita el perfil: va en la cache con la versión
+    # de su grupo y no se recuenta en cada búsqueda
+    return int(page_cache.obtener_o_generar(
+        'documentos-busqueda', lambda: _contar_documentos(usuario_id), grupo=grupo_perfil(usuario_id)))
+
+
+def buscar(consulta, usuario_id, limite=20):
+    """Entidades de ``usuario_id`` que contienen los términos de ``consulta``,
+    mejor rankeadas primero.
+
+    Primero las que contienen más términos distintos de la consulta; a igual
+    cantidad, por puntaje BM25 (peso del término saturado, por su rareza).
+    La agregación la hace la base: a Python solo llegan ``limite`` filas.
+    """
+    terminos = list(dict.fromkeys(tokens(consulta)))[:MAX_TERMINOS_CONSULTA]
+    if not terminos:
+        return []
+
+    # en cuántas entidades aparece cada término (recorre solo el índice)
+    frecuencia = dict(db.session.execute(
+        select(TerminoIndice.termino, func.count())
+        .where(TerminoIndice.usuario_id == usuario_id, TerminoIndice.termino.in_(terminos))
+        .group_by(TerminoIndice.termino)
+    ).all())
+    if not frecuencia:
+        return []
+
+    documentos = max(_cantidad_documentos(usuario_id), 1)
+    idf = {t: math.log(1 + (documentos - df + 0.5) / (df + 0.5)) for t, df in frecuencia.items()}
+    peso = cast(TerminoIndice.peso, Float)
+    puntaje = func.sum(case(idf, value=TerminoIndice.termino, else_=0.0) * peso * (K1 + 1) / (peso + K1))
+    coincidencias = func.count()  # (termino, tipo, objeto_id) es la PK: un término cuenta una vez
+
+    mejores = db.session.execute(
+        select(TerminoIndice.tipo, TerminoIndice.objeto_id,
+               coincidencias.label('coincidencias'), puntaje.label('puntaje'))
+        .where(TerminoIndice.usuario_id == usuario_id, TerminoIndice.termino.in_(list(frecuencia)))
+        .group_by(TerminoIndice.tipo, TerminoIndice.objeto_id)
+        .order_by(coincidencias.desc(), puntaje.desc())
+        .limit(limite)
+    ).all()
+
+    # una consulta por tipo para traer las entidades
+    ids_por_tipo = defaultdict(list)
+    for fila in mejores:
+        ids_por_tipo[fila.tipo].append(fila.objeto_id)
+    objetos = {}
+    for tipo, ids in ids_por_tipo.items():
+        modelo = MODELOS[tipo]
+        for obj in db.session.scalars(select(modelo).where(modelo.id.in_(ids))):
+            objetos[(tipo, obj.id)] = obj
+
+    return [Resultado(f.tipo, objetos[(f.tipo, f.objeto_id)], round(f.puntaje, 3), f.coincidencias)
+            for f in mejores if (f.tipo, f.objeto_id) in objetos]
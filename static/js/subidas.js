@@ -0,0 +1,83 @@
+// Subidas por partes (ver subidas.py): cada <input data-subida-destino>
+// manda el archivo de a "bloque" bytes y, si una parte falla, pregunta el
+// offset al servidor y sigue desde ahí.
+(function () {
+  'use strict';
+
+  var REINTENTOS = 5;
+
+  function pedir(metodo, url, token, opciones) {
+    opciones = opciones || {};
+    var headers = Object.assign({ 'X-CSRFToken': token }, opciones.headers || {});
+    return fetch(url, { method: metodo, headers: headers, body: opciones.body, credentials: 'same-origin' });
+  }
+
+  function esperar(ms) {
+    return new Promise(function (resolver) { setTimeout(resolver, ms); });
+  }
+
+  async function error(respuesta) {
+    try { return (await respuesta.json()).error; } catch (e) { return respuesta.statusText; }
+  }
+
+  async function subir(archivo, destino, token, progreso) {
+    var creada = await pedir('POST', '/subidas', token, {
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ nombre: archivo.name, tamanio: archivo.size, destino: destino })
+    });
+    if (creada.status !== 201) throw new Error(await error(creada));
+    var subida = await creada.json();
+    var url = creada.headers.get('Location');
+    var offset = 0, fallos = 0;
+
+    while (true) {
+      var respuesta;
+      try {
+        respuesta = await pedir('PATCH', url, token, {
+          headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+          body: archivo.slice(offset, offset + subida.bloque)
+        });
+      } catch (e) {
+        respuesta = null;  // se cortó la conexión
+      }
+      if (respuesta && (respuesta.status === 200 || respuesta.status === 204)) {
+        offset = parseInt(respuesta.headers.get('Upload-Offset'), 10);
+        fallos = 0;
+        progreso(offset / archivo.size);
+        if (respuesta.status === 200) return respuesta.json();
+        continue;
+      }
+      if (respuesta && [400, 401, 404, 413, 415].indexOf(respuesta.status) !== -1) {
+        throw new Error(await error(respuesta));
+      }
+      if (++fallos > REINTENTOS) throw new Error('no se pudo completar la subida');
+      await esperar(500 * fallos);
+      var estado = await pedir('HEAD', url, token);
+      if (!estado.ok) throw new Error('la subida ya no existe');
+      offset = parseInt(estado.headers.get('Upload-Offset'), 10);
+    }
+  }
+
+  document.querySelectorAll('input[data-subida-destino]').forEach(function (input) {
+    var barra = document.getElementById(input.dataset.subidaProgreso);
+    var mensaje = document.getElementById(input.dataset.subidaMensaje);
+    input.addEventListener('change', async function () {
+      var archivo = input.files[0];
+      if (!archivo) return;
+      input.disabled = true;
+      mensaje.textContent = '';
+      try {
+        await subir(archivo, input.dataset.subidaDestino, input.dataset.csrf, function (p) {
+          barra.style.width = Math.round(p * 100) + '%';
+        });
+        mensaje.textContent = 'Archivo subido.';
+        if (input.dataset.subidaDestino === 'perfil') window.location.reload();
+      } catch (e) {
+        mensaje.textContent = e.message;
+      } finally {
+        input.disabled = false;
+        input.value = '';
+      }
+    });
+  });
+})();
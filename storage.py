@@ -0,0 +1,262 @@
+import os
+import errno
+import shutil
+import hashlib
+import tempfile
+
+from sqlalchemy import case, event, insert, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Archivo, Usuario, Educacion, Proyecto
+from metrics import medir, upload_bytes
+
+
+# -------------------------------
+# Almacenamiento por contenido (content-addressed)
+# Los uploads se guardan en UPLOAD_FOLDER/blobs/<aa>/<sha256><ext>.
+# El hash se calcula mientras se escribe el stream, así que nunca hay que
+# releer el archivo; si el blob ya existía el temporal se descarta.
+# -------------------------------
+BLOBS_DIR = 'blobs'
+CVS_DIR = 'cv'  # PDFs subidos por cada usuario (destino "cv" de /subidas)
+TAMANIO_BLOQUE = 64 * 1024
+
+# columnas que apuntan a archivos subidos
+COLUMNAS_ARCHIVO = {
+    Usuario: 'profile_image',
+    Educacion: 'logo',
+    Proyecto: 'imagen',
+}
+
+
+def columna_archivo(obj):
+    for modelo, columna in COLUMNAS_ARCHIVO.items():
+        if isinstance(obj, modelo):
+            return columna
+    return None
+
+
+class BlobStore:
+    def __init__(self, app=None):
+        self.root = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config['UPLOAD_FOLDER']
+        app.extensions['blob_store'] = self
+
+    @property
+    def directorio(self):
+        return os.path.join(self.root, BLOBS_DIR)
+
+    def path(self, ruta):
+        return os.path.join(self.root, ruta)
+
+    def guardar(self, file_storage):
+        """Guarda un ``FileStorage`` y devuelve su ruta relativa a UPLOAD_FOLDER."""
+        _, ext = os.path.splitext(file_storage.filename or '')
+        return self.guardar_stream(file_storage.stream, ext)
+
+    def guardar_stream(self, stream, ext=''):
+        ext = ext.lower()
+        os.makedirs(self.directorio, exist_ok=True)
+        sha = hashlib.sha256()
+
+        # cada upload escribe su propio temporal: dos subidas en paralelo
+        # (aunque sean del mismo archivo) no se pisan
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        tamanio = 0
+        try:
+            with medir('upload'), os.fdopen(fd, 'wb') as f:
+                for bloque in iter(lambda: stream.read(TAMANIO_BLOQUE), b''):
+                    sha.update(bloque)
+                    f.write(bloque)
+                    tamanio += len(bloque)
+            upload_bytes.observar(tamanio)
+            return self._archivar(tmp, sha.hexdigest(), ext)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def adoptar(self, path, ext=''):
+        """Mueve al store un archivo que ya está en disco (p. ej. una subida por partes).
+
+        Se lee una vez para el hash y después se renombra: no se copia.
+        """
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANIO_BLOQUE), b''):
+                sha.update(bloque)
+        return self._archivar(path, sha.hexdigest(), ext.lower())
+
+    def _archivar(self, path, digest, ext):
+        existente = self.buscar(digest)
+        if existente:
+            try:
+                # para limpiar-uploads pasa a ser un upload recién hecho:
+                # no se lo lleva a cuarentena antes de que se guarde la fila
+                os.utime(self.path(existente))
+            except FileNotFoundError:
+                pass  # la limpieza lo acaba de mover: se guarda esta copia
+            else:
+                os.remove(path)  # deduplicado
+                return existente
+        ruta = ruta_blob(digest, ext)
+        destino = self.path(ruta)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        mover(path, destino)
+        return ruta
+
+    def buscar(self, digest):
+        """Ruta del blob con ese hash (cualquier extensión) o None."""
+        carpeta = os.path.join(self.directorio, digest[:2])
+        try:
+            nombres = os.listdir(carpeta)
+        except FileNotFoundError:
+            return None
+        for nombre in nombres:
+            if os.path.splitext(nombre)[0] == digest:
+                return f'{BLOBS_DIR}/{digest[:2]}/{nombre}'
+        return None
+
+
+def mover(origen, destino):
+    """``os.replace`` que también funciona entre sistemas de archivos distintos.
+
+    En el mismo disco es un rename atómico; si no, se copia a un temporal
+    junto al destino y se renombra, así nunca se ve un archivo a medias.
+    """
+    try:
+        os.replace(origen, destino)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(origen, tmp)
+            os.replace(tmp, destino)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        os.remove(origen)
+
+
+def ruta_blob(digest, ext=''):
+    return f'{BLOBS_DIR}/{digest[:2]}/{digest}{ext}'
+
+
+def ruta_cv(usuario_id):
+    """Ruta (dentro de UPLOAD_FOLDER) del CV que subió ``usuario_id``."""
+    return f'{CVS_DIR}/{usuario_id}.pdf'
+
+
+def hash_de_ruta(ruta):
+    """Extrae el hash de una ruta de blob; None para archivos legacy."""
+    if not ruta or not ruta.startswith(BLOBS_DIR + '/'):
+        return None
+    digest = os.path.splitext(os.path.basename(ruta))[0]
+    return digest if len(digest) == 64 else None
+
+
+blob_store = BlobStore()
+
+
+# -------------------------------
+# Conteo de referencias
+# Antes de cada flush se mira el historial de las columnas de archivo y se
+# ajustan los contadores en la tabla ``archivo`` dentro de la misma
+# transacción.
+# -------------------------------
+@event.listens_for(Session, 'before_flush')
+def _actualizar_referencias(session, flush_context, instances):
+    deltas = {}
+
+    def sumar(ruta, n):
+        if hash_de_ruta(ruta):
+            deltas[ruta] = deltas.get(ruta, 0) + n
+
+    for obj in session.new:
+        columna = columna_archivo(obj)
+        if columna:
+            sumar(getattr(obj, columna), +1)
+
+    for obj in session.deleted:
+        columna = columna_archivo(obj)
+        if columna:
+            historial = inspect(obj).attrs[columna].history
+            anterior = historial.deleted[0] if historial.deleted else getattr(obj, columna)
+            sumar(anterior, -1)
+
+    for obj in session.dirty:
+        columna = columna_archivo(obj)
+        if not columna:
+            continue
+        historial = inspect(obj).attrs[columna].history
+        if not historial.has_changes():
+            continue
+        for ruta in historial.deleted:
+            sumar(ruta, -1)
+        for ruta in historial.added:
+            sumar(ruta, +1)
+
+    ajustar_referencias(session, deltas)
+
+
+def ajustar_referencias(session, deltas):
+    """Suma ``deltas`` ({ruta: +n/-n}) a los contadores de la tabla ``archivo``.
+
+    Lo usa el listener de arriba y las escrituras en lote, que no pasan por él.
+    La suma la hace la base (``referencias = referencias + n``) y la fila se
+    crea con un upsert: dos requests que suben el mismo archivo a la vez no
+    pisan sus contadores ni chocan con la clave primaria.
+    """
+    if not deltas:
+        return
+
+    with session.no_autoflush:
+        for ruta, delta in deltas.items():
+            digest = hash_de_ruta(ruta)
+            if delta == 0 or digest is None:
+                continue
+            path = blob_store.path(ruta) if blob_store.root else None
+            tamanio = os.path.getsize(path) if path and os.path.exists(path) else 0
+            _insertar_si_falta(session, digest, ruta, tamanio)
+            nuevas = Archivo.referencias + delta
+            session.execute(
+                update(Archivo).where(Archivo.hash == digest)
+                .values(referencias=case((nuevas < 0, 0), else_=nuevas))
+            )
+
+
+def _insertar_si_falta(session, digest, ruta, tamanio):
+    """Crea la fila de ``archivo`` con 0 referencias si todavía no existe."""
+    valores = dict(hash=digest, ruta=ruta, tamanio=tamanio, referencias=0)
+    dialecto = session.get_bind(clause=insert(Archivo)).dialect.name
+    if dialecto == 'mysql':
+        consulta = mysql_insert(Archivo).values(**valores)
+        session.execute(consulta.on_duplicate_key_update(hash=consulta.inserted.hash))
+    elif dialecto == 'postgresql':
+        session.execute(postgresql_insert(Archivo).values(**valores).on_conflict_do_nothing())
+    elif dialecto == 'sqlite':
+        session.execute(sqlite_insert(Archivo).values(**valores).on_conflict_do_nothing())
+    else:
+        _insertar_si_falta_generico(session, valores)
+
+
+def _insertar_si_falta_generico(session, valores):
+    # bases sin upsert: se mira y se inserta en un savepoint; si otro
+    # request la creó en el medio, la clave primaria choca y se sigue
+    if session.execute(select(Archivo.hash).where(Archivo.hash == valores['hash'])).first():
+        return
+    try:
+        with session.begin_nested():
+            session.execute(insert(Archivo).values(**valores))
+    except IntegrityError:
+        pass
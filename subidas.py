@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import time
+import secrets
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from flask_wtf.csrf import validate_csrf
+from wtforms import ValidationError
+
+from auth import usuario_actual
+from images import image_pipeline
+from metrics import medir, upload_bytes
+from storage import blob_store, mover, ruta_cv, TAMANIO_BLOQUE
+
+
+# -------------------------------
+# Subidas reanudables por partes: /subidas
+# Protocolo (parecido a tus.io):
+#   POST   /subidas       {"nombre", "tamanio", "destino"} -> 201 {"id", "offset", "bloque"}
+#   HEAD   /subidas/<id>  -> Upload-Offset: bytes ya recibidos (para reanudar)
+#   PATCH  /subidas/<id>  Upload-Offset: n, cuerpo = bytes desde n
+#                         -> 204, o 200 {"ruta"} cuando llega el último
+#   DELETE /subidas/<id>  cancela
+# Cada parte va de a TAMANIO_BLOQUE del request al disco: la memoria no
+# depende del tamaño del archivo y ningún request supera MAX_CONTENT_LENGTH.
+# La firma (magic bytes) se revisa apenas llegan los primeros bytes y el
+# tamaño en cada bloque: un archivo disfrazado o más grande que lo
+# declarado se corta ahí, sin esperar al final.
+# -------------------------------
+subidas = Blueprint('subidas', __name__, url_prefix='/subidas')
+
+FIRMAS = {
+    '.png': (b'\x89PNG\r\n\x1a\n',),
+    '.jpg': (b'\xff\xd8\xff',),
+    '.jpeg': (b'\xff\xd8\xff',),
+    '.gif': (b'GIF87a', b'GIF89a'),
+    '.pdf': (b'%PDF-',),
+}
+LARGO_FIRMA = max(len(f) for firmas in FIRMAS.values() for f in firmas)
+
+# destino -> (extensiones aceptadas, clave de config con el tamaño máximo)
+DESTINOS = {
+    'imagen': (('.png', '.jpg', '.jpeg', '.gif'), 'UPLOAD_MAX_IMAGE_BYTES'),
+    'perfil': (('.png', '.jpg', '.jpeg', '.gif'), 'UPLOAD_MAX_IMAGE_BYTES'),
+    'cv': (('.pdf',), 'UPLOAD_MAX_CV_BYTES'),
+}
+ID_RE = re.compile(r'^[A-Za-z0-9_-]{22}$')
+
+
+class SubidaInvalida(Exception):
+    def __init__(self, status, mensaje, offset=None):
+        super().__init__(mensaje)
+        self.status = status
+        self.mensaje = mensaje
+        self.offset = offset
+
+
+def firma_valida(ext, cabecera):
+    return any(cabecera.startswith(f) for f in FIRMAS.get(ext, ()))
+
+
+class SubidasParciales:
+    """Partes recibidas en disco: ``<id>.part`` (los bytes) y ``<id>.json`` (qué es).
+
+    El offset de una subida es el tamaño de su ``.part``: si un request se
+    corta a mitad, el cliente pregunta con HEAD y sigue desde ahí.
+    """
+
+    def __init__(self, app=None):
+        self.directorio = None
+        self.ttl = 24 * 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directorio = app.config['UPLOAD_PARTIAL_DIR']
+        self.ttl = app.config.get('UPLOAD_PARTIAL_TTL', self.ttl)
+        app.extensions['subidas'] = self
+
+    def _path(self, subida_id, ext):
+        return os.path.join(self.directorio, subida_id + ext)
+
+    def crear(self, usuario_id, nombre, tamanio, destino):
+        if destino not in DESTINOS:
+            raise SubidaInvalida(400, f'destino desconocido: {destino}')
+        if destino == 'cv' and current_app.config.get('CV_GENERADO', True):
+            # /u/<username>/cv sirve el PDF generado: el subido no lo vería nadie
+            raise SubidaInvalida(409, 'el CV se genera a partir del perfil (CV_GENERADO=1)')
+        extensiones, clave_maximo = DESTINOS[destino]
+        ext = os.path.splitext(nombre or '')[1].lower()
+        if ext not in extensiones:
+            raise SubidaInvalida(415, f'para "{destino}" se aceptan: {", ".join(extensiones)}')
+        maximo = current_app.config[clave_maximo]
+        if not isinstance(tamanio, int) or tamanio <= 0:
+            raise SubidaInvalida(400, '"tamanio" tiene que ser un entero positivo')
+        if tamanio > maximo:
+            raise SubidaInvalida(413, f'el máximo para "{destino}" es {maximo} bytes')
+
+        os.makedirs(self.directorio, exist_ok=True)
+        self.limpiar_vencidas()
+        subida_id = secrets.token_urlsafe(16)
+        meta = {'usuario_id': usuario_id, 'nombre': nombre, 'ext': ext,
+                'tamanio': tamanio, 'destino': destino, 'creada': time.time()}
+        with open(self._path(subida_id, '.json'), 'w') as f:
+            json.dump(meta, f)
+        open(self._path(subida_id, '.part'), 'wb').close()
+        return subida_id
+
+    def meta(self, subida_id, usuario_id):
+        """Metadatos de una subida del usuario, o None (no existe o es de otro)."""
+        if not ID_RE.match(subida_id):
+            return None
+        try:
+            with open(self._path(subida_id, '.json')) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta['usuario_id'] == usuario_id else None
+
+    def offset(self, subida_id):
+        try:
+            return os.path.getsize(self._path(subida_id, '.part'))
+        except FileNotFoundError:
+            return 0
+
+    def descartar(self, subida_id):
+        for ext in ('.part', '.json'):
+            try:
+                os.remove(self._path(subida_id, ext))
+            except FileNotFoundError:
+                pass
+
+    def limpiar_vencidas(self):
+        """Borra las subidas abandonadas (sin partes nuevas desde hace ``ttl``)."""
+        limite = time.time() - self.ttl
+        for nombre in os.listdir(self.directorio):
+            subida_id, ext = os.path.splitext(nombre)
+            if ext != '.json':
+                continue
+            try:
+                ultima = os.path.getmtime(self._path(subida_id, '.part'))
+            except FileNotFoundError:
+                ultima = os.path.getmtime(self._path(subida_id, '.json'))
+            if ultima < limite:
+                self.descartar(subida_id)
+
+    @contextmanager
+    def _abierta(self, subida_id):
+        # un solo PATCH a la vez por subida (entre hilos y entre procesos)
+        with open(self._path(subida_id, '.part'), 'ab') as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise SubidaInvalida(409, 'hay otra parte de esta subida en curso')
+            yield f
+
+    def escribir(self, subida_id, meta, offset, stream, largo=None):
+        """Agrega una parte que empieza en ``offset``. Devuelve el offset nuevo."""
+        tamanio, ext = meta['tamanio'], meta['ext']
+        with medir('upload'), self._abierta(subida_id) as f:
+            actual = f.tell()
+            if offset != actual:
+                raise SubidaInvalida(409, 'offset distinto al recibido', offset=actual)
+            if largo is not None and offset + largo > tamanio:
+                self.descartar(subida_id)
+                raise SubidaInvalida(413, f'la subida declaró {tamanio} bytes')
+            # la firma se revisa una sola vez, con los primeros LARGO_FIRMA bytes
+            cabecera = None
+            if actual < LARGO_FIRMA:
+                with open(self._path(subida_id, '.part'), 'rb') as previo:
+                    cabecera = previo.read(LARGO_FIRMA)
+            for bloque in iter(lambda: stream.read(TAMANIO_BLOQUE), b''):
+                actual += len(bloque)
+                if actual > tamanio:
+                    self.descartar(subida_id)
+                    raise SubidaInvalida(413, f'la subida declaró {tamanio} bytes')
+                if cabecera is not None:
+                    cabecera += bloque[:LARGO_FIRMA - len(cabecera)]
+                    if len(cabecera) >= LARGO_FIRMA or actual == tamanio:
+                        if not firma_valida(ext, cabecera):
+                            self.descartar(subida_id)
+                            raise SubidaInvalida(415, f'el contenido no es un archivo {ext}')
+                        cabecera = None
+                f.write(bloque)
+            return actual
+
+    def completar(self, subida_id, meta):
+        """Mueve el archivo completo a su destino y devuelve su ruta en UPLOAD_FOLDER."""
+        path = self._path(subida_id, '.part')
+        upload_bytes.observar(meta['tamanio'])
+        if meta['destino'] == 'cv':
+            # cada usuario reemplaza solo el suyo
+            ruta = ruta_cv(meta['usuario_id'])
+            destino = os.path.join(current_app.config['UPLOAD_FOLDER'], ruta)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            mover(path, destino)
+        else:
+            ruta = blob_store.adoptar(path, meta['ext'])
+            if meta['destino'] == 'perfil':
+                # las variantes se encolan con el commit (images.py)
+                usuario = usuario_actual()
+                usuario.profile_image = ruta
+                usuario.save()
+            else:
+                # queda para un /lote: se adelantan las variantes
+                image_pipeline.encolar(ruta)
+        self.descartar(subida_id)
+        return ruta
+
+
+subidas_parciales = SubidasParciales()
+
+
+# -------------------------------
+# Rutas
+# -------------------------------
+@subidas.before_request
+def _requerir_admin():
+    if not current_user.is_authenticated:
+        raise SubidaInvalida(401, 'hay que iniciar sesión')
+    if request.method in ('POST', 'PATCH', 'DELETE') and current_app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken'))
+        except ValidationError as e:
+            raise SubidaInvalida(400, str(e))
+
+
+@subidas.errorhandler(SubidaInvalida)
+def _error(e):
+    response = jsonify({'error': e.mensaje})
+    if e.offset is not None:
+        response.headers['Upload-Offset'] = str(e.offset)
+    return response, e.status
+
+
+def _meta_o_404(subida_id):
+    meta = subidas_parciales.meta(subida_id, current_user.id)
+    if meta is None:
+        raise SubidaInvalida(404, 'la subida no existe o ya venció')
+    return meta
+
+
+def _con_offset(response, offset):
+    response.headers['Upload-Offset'] = str(offset)
+    response.cache_control.no_store = True
+    return response
+
+
+@subidas.route('', methods=['POST'])
+def crear():
+    datos = request.get_json(silent=True) or {}
+    subida_id = subidas_parciales.crear(current_user.id, datos.get('nombre'),
+                                        datos.get('tamanio'), datos.get('destino'))
+    response = jsonify({'id': subida_id, 'offset': 0,
+                        'bloque': current_app.config['UPLOAD_CHUNK_SIZE']})
+    response.status_code = 201
+    response.headers['Location'] = f'{subidas.url_prefix}/{subida_id}'
+    return _con_offset(response, 0)
+
+
+@subidas.route('/<subida_id>', methods=['HEAD', 'GET'])
+def estado(subida_id):
+    meta = _meta_o_404(subida_id)
+    offset = subidas_parciales.offset(subida_id)
+    return _con_offset(jsonify({'offset': offset, 'tamanio': meta['tamanio']}), offset)
+
+
+@subidas.route('/<subida_id>', methods=['PATCH'])
+def agregar_parte(subida_id):
+    meta = _meta_o_404(subida_id)
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        raise SubidaInvalida(400, 'falta el header Upload-Offset')
+    largo = request.content_length
+    if largo is not None and largo > current_app.config['UPLOAD_CHUNK_SIZE']:
+        raise SubidaInvalida(413, f'cada parte puede tener hasta {current_app.config["UPLOAD_CHUNK_SIZE"]} bytes')
+
+    offset = subidas_parciales.escribir(subida_id, meta, offset, request.stream, largo)
+    if offset < meta['tamanio']:
+        return _con_offset(current_app.response_class(status=204), offset)
+    ruta = subidas_parciales.completar(subida_id, meta)
+    return _con_offset(jsonify({'ruta': ruta, 'destino': meta['destino']}), offset)
+
+
+@subidas.route('/<subida_id>', methods=['DELETE'])
+def cancelar(subida_id):
+    _meta_o_404(subida_id)
+    subidas_parciales.descartar(subida_id)
+    return current_app.response_class(status=204)
@@ -0,0 +1,75 @@
+import os
+import sys
+from itertools import count
+
+import pytest
+
+# los módulos de la app se importan como en "flask --app app"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, inicializar_db  # noqa: E402
+from config import Config  # noqa: E402
+from models import db, Usuario  # noqa: E402
+
+
+# -------------------------------
+# Una app por sesión de tests sobre SQLite en una carpeta temporal
+# Las extensiones son singletons de módulo (page_cache, image_pipeline,
+# ...): armar una app por test les registraría los callbacks varias veces.
+# Cada test crea sus propias filas y no depende de las de los demás.
+# -------------------------------
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    base = tmp_path_factory.mktemp('portfolio')
+
+    class ConfigTests(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{base / "portfolio.db"}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {}
+        UPLOAD_FOLDER = str(base / 'uploads')
+        UPLOAD_PARTIAL_DIR = str(base / 'subidas')
+        UPLOAD_QUARANTINE_DIR = str(base / 'cuarentena')
+        PAGE_CACHE_ENABLED = True
+        PAGE_CACHE_BACKEND = 'memoria'
+        PAGE_CACHE_DIR = str(base / 'page_cache')
+        CV_DIR = str(base / 'cv')
+        CV_WORKERS = 0
+        FREEZE_DIR = str(base / 'site')
+        FREEZE_AUTO = False
+        METRICS_DIR = None
+        BCRYPT_LOG_ROUNDS = 4
+
+    app = create_app(ConfigTests)
+    with app.app_context():
+        inicializar_db()
+    return app
+
+
+@pytest.fixture
+def contexto(app):
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def usuario_id(contexto):
+    return db.session.execute(db.select(Usuario.id).filter_by(username='daer')).scalar_one()
+
+
+_ips = count(1)
+
+
+@pytest.fixture
+def admin(cliente):
+    """Cliente con la sesión del usuario inicial (cada login desde otra IP, por el throttling)."""
+    respuesta = cliente.post('/login', data={'username': 'daer', 'password': '123456'},
+                             environ_base={'REMOTE_ADDR': f'10.1.0.{next(_ips)}'})
+    assert respuesta.status_code == 302
+    return cliente
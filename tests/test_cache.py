@@ -0,0 +1,79 @@
+import gzip
+
+from cache import grupo_perfil, grupo_seccion, page_cache
+from models import db, Curso, Usuario
+
+
+def _versiones(usuario_id):
+    backend = page_cache.backend
+    return (backend.get_version(grupo_perfil(usuario_id)),
+            backend.get_version(grupo_seccion('cursos', usuario_id)),
+            backend.get_version(grupo_seccion('proyectos', usuario_id)))
+
+
+def test_commit_invalida_solo_el_perfil_y_la_seccion(contexto, usuario_id):
+    otro = Usuario(username='cache-otro', password='x')
+    db.session.add(otro)
+    db.session.commit()
+
+    perfil, cursos, proyectos = _versiones(usuario_id)
+    del_otro = _versiones(otro.id)
+    db.session.add(Curso(nombre='Docker', institucion='i', usuario_id=usuario_id))
+    db.session.commit()
+
+    nuevo_perfil, nuevo_cursos, nuevo_proyectos = _versiones(usuario_id)
+    assert nuevo_perfil != perfil
+    assert nuevo_cursos != cursos
+    assert nuevo_proyectos == proyectos
+    assert _versiones(otro.id) == del_otro
+
+
+def test_rollback_no_invalida(contexto, usuario_id):
+    antes = _versiones(usuario_id)
+    db.session.add(Curso(nombre='Descartado', institucion='i', usuario_id=usuario_id))
+    db.session.flush()
+    db.session.rollback()
+    assert _versiones(usuario_id) == antes
+
+
+def test_pagina_cacheada_se_regenera_tras_editar(app, cliente, usuario_id):
+    assert 'Terraform' not in cliente.get('/u/daer').get_data(as_text=True)
+    assert 'Terraform' not in cliente.get('/u/daer').get_data(as_text=True)
+    db.session.add(Curso(nombre='Terraform', institucion='i', usuario_id=usuario_id))
+    db.session.commit()
+    assert 'Terraform' in cliente.get('/u/daer').get_data(as_text=True)
+
+
+def test_obtener_o_generar_genera_una_vez(contexto, usuario_id):
+    llamadas = []
+
+    def generar():
+        llamadas.append(1)
+        return 'html'
+
+    grupo = grupo_perfil(usuario_id)
+    assert page_cache.obtener_o_generar('prueba', generar, grupo=grupo) == 'html'
+    assert page_cache.obtener_o_generar('prueba', generar, grupo=grupo) == 'html'
+    assert len(llamadas) == 1
+    page_cache.invalidar([grupo])
+    page_cache.obtener_o_generar('prueba', generar, grupo=grupo)
+    assert len(llamadas) == 2
+
+
+def test_pagina_comprimida_se_comprime_una_vez(cliente, contexto, usuario_id, monkeypatch):
+    from compresion import respuestas_html
+    db.session.add(Curso(nombre='Comprimido', institucion='i', usuario_id=usuario_id))
+    db.session.commit()
+
+    llamadas = []
+    comprimir = respuestas_html._comprimir
+    monkeypatch.setattr(respuestas_html, '_comprimir', lambda *a: llamadas.append(a[1]) or comprimir(*a))
+    cuerpos = []
+    for _ in range(3):
+        respuesta = cliente.get('/u/daer', headers={'Accept-Encoding': 'gzip'})
+        assert respuesta.headers['Content-Encoding'] == 'gzip'
+        cuerpos.append(gzip.decompress(respuesta.get_data()))
+    assert llamadas == ['gzip']
+    assert cuerpos[0] == cuerpos[2] and 'Comprimido'.encode() in cuerpos[0]
+    sin_comprimir = cliente.get('/u/daer', headers={'Accept-Encoding': 'identity'})
+    assert sin_comprimir.get_data() == cuerpos[0]
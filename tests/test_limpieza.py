@@ -0,0 +1,57 @@
+import io
+import os
+import time
+
+from limpieza import limpieza_uploads
+from models import db, Proyecto
+from storage import blob_store
+
+VIEJO = time.time() - 30 * 24 * 3600
+
+
+def _envejecer(path):
+    os.utime(path, (VIEJO, VIEJO))
+
+
+def test_huerfano_va_a_cuarentena_y_vuelve_si_se_usa(app, contexto, usuario_id):
+    ruta = blob_store.guardar_stream(io.BytesIO(b'huerfano'), '.png')
+    original = blob_store.path(ruta)
+    _envejecer(original)
+
+    informe = limpieza_uploads.barrer()
+    assert ruta in informe.en_cuarentena
+    assert not os.path.exists(original)
+    assert os.path.isfile(os.path.join(app.config['UPLOAD_QUARANTINE_DIR'], ruta))
+
+    db.session.add(Proyecto(titulo='restaurado', imagen=ruta, usuario_id=usuario_id))
+    db.session.commit()
+    informe = limpieza_uploads.barrer()
+    assert ruta in informe.restaurados
+    assert os.path.isfile(original)
+
+
+def test_reciente_no_va_a_cuarentena(contexto):
+    ruta = blob_store.guardar_stream(io.BytesIO(b'recien subido'), '.png')
+    informe = limpieza_uploads.barrer()
+    assert ruta not in informe.en_cuarentena
+    assert os.path.isfile(blob_store.path(ruta))
+
+
+def test_simular_no_mueve(contexto):
+    ruta = blob_store.guardar_stream(io.BytesIO(b'simulado'), '.png')
+    _envejecer(blob_store.path(ruta))
+    informe = limpieza_uploads.barrer(simular=True)
+    assert ruta in informe.en_cuarentena
+    assert os.path.isfile(blob_store.path(ruta))
+
+
+def test_vencido_en_cuarentena_se_borra(app, contexto):
+    ruta = blob_store.guardar_stream(io.BytesIO(b'vencido'), '.png')
+    _envejecer(blob_store.path(ruta))
+    limpieza_uploads.barrer()
+    en_cuarentena = os.path.join(app.config['UPLOAD_QUARANTINE_DIR'], ruta)
+    _envejecer(en_cuarentena)
+
+    informe = limpieza_uploads.barrer()
+    assert ruta in informe.borrados
+    assert not os.path.exists(en_cuarentena)
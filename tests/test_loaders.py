@@ -0,0 +1,46 @@
+from loaders import cargar_perfil, contar_consultas, usuarios
+from models import db, Curso, Educacion, Experiencia, Proyecto
+
+SECCIONES = ('educacion', 'cursos', 'experiencias', 'proyectos')
+
+
+def _poblar(usuario_id, filas):
+    for i in range(filas):
+        db.session.add_all([
+            Experiencia(proyecto=f'p{i}', descripcion='d', puesto='dev', periodo='2024',
+                        logros='l', usuario_id=usuario_id),
+            Educacion(titulo=f't{i}', institucion='i', usuario_id=usuario_id),
+            Curso(nombre=f'c{i}', institucion='i', usuario_id=usuario_id),
+            Proyecto(titulo=f'p{i}', usuario_id=usuario_id),
+        ])
+    db.session.commit()
+
+
+def _consultas_del_perfil(app):
+    usuarios.olvidar('daer')
+    with app.app_context(), contar_consultas() as qc:
+        perfil = cargar_perfil('daer')
+        for seccion in SECCIONES:
+            list(perfil[seccion])
+    return qc.count
+
+
+def test_cargar_perfil_con_consultas_fijas(app, usuario_id):
+    _poblar(usuario_id, 2)
+    con_pocas = _consultas_del_perfil(app)
+    _poblar(usuario_id, 20)
+    assert _consultas_del_perfil(app) == con_pocas
+    # id del usuario, usuario y una por sección
+    assert con_pocas <= 6
+
+
+def test_secciones_sin_usar_no_consultan(app, usuario_id):
+    usuarios.olvidar('daer')
+    with app.app_context(), contar_consultas() as qc:
+        perfil = cargar_perfil('daer')
+    assert perfil['usuario'].id == usuario_id
+    assert qc.count == 2
+
+
+def test_cargar_perfil_usuario_inexistente(contexto):
+    assert cargar_perfil('no-existe') is None
@@ -0,0 +1,42 @@
+from passwords import LoginThrottle, Throttle
+
+
+def _login(cliente, username, password, ip):
+    return cliente.post('/login', data={'username': username, 'password': password},
+                        environ_base={'REMOTE_ADDR': ip})
+
+
+def test_login_correcto(cliente):
+    respuesta = _login(cliente, 'daer', '123456', '10.0.0.1')
+    assert respuesta.status_code == 302
+
+
+def test_usuario_inexistente(cliente):
+    respuesta = _login(cliente, 'nadie', '123456', '10.0.0.2')
+    assert respuesta.status_code == 200
+    assert 'incorrectos' in respuesta.get_data(as_text=True)
+
+
+def test_ataque_distribuido_a_un_usuario():
+    throttle = LoginThrottle()
+    permitidos = sum(throttle.permitir(f'10.2.{i // 250}.{i % 250}', 'Daer') for i in range(100))
+    # cada IP intenta una sola vez: lo frena el límite del usuario
+    assert permitidos == throttle.por_usuario.capacidad
+    assert not throttle.permitir('10.3.0.1', 'daer')
+    assert throttle.permitir('10.3.0.1', 'otra')
+
+
+def test_una_ip_probando_usuarios():
+    throttle = LoginThrottle()
+    permitidos = sum(throttle.permitir('10.0.0.3', f'usuario-{i}') for i in range(100))
+    assert permitidos == throttle.por_ip.capacidad
+
+
+def test_throttle_acotado():
+    throttle = Throttle(5, 5)
+    throttle.MAX_CLAVES = 100
+    for i in range(1000):
+        throttle.permitir(f'usuario-{i}')
+    assert len(throttle._buckets) <= throttle.MAX_CLAVES
+    # la clave más reciente sigue con su historial
+    assert throttle._buckets['usuario-999'].tokens < 5
@@ -0,0 +1,65 @@
+import io
+
+from sqlalchemy import func, select
+
+from models import db, Curso, Proyecto
+from storage import blob_store
+
+
+def _cursos(usuario_id):
+    return db.session.scalar(select(func.count()).select_from(Curso).where(Curso.usuario_id == usuario_id))
+
+
+def test_lote_sin_sesion(cliente):
+    assert cliente.post('/lote', json={'operaciones': []}).status_code == 401
+
+
+def test_una_operacion_invalida_no_aplica_ninguna(admin, contexto, usuario_id):
+    antes = _cursos(usuario_id)
+    respuesta = admin.post('/lote', json={'operaciones': [
+        {'op': 'crear', 'recurso': 'cursos', 'datos': {'nombre': 'Valido', 'institucion': 'i'}},
+        {'op': 'crear', 'recurso': 'cursos', 'datos': {'nombre': 'Sin institucion'}},
+        {'op': 'crear', 'recurso': 'cursos', 'datos': {'nombre': 'x', 'institucion': 'i', 'color': 'rojo'}},
+        {'op': 'eliminar', 'recurso': 'cursos', 'id': 999999},
+    ]})
+    assert respuesta.status_code == 400
+    errores = respuesta.get_json()['errores']
+    assert [e['indice'] for e in errores] == [1, 2, 3]
+    assert 'institucion' in errores[0]['campos']
+    assert errores[1]['campos'] == {'color': ['campo desconocido']}
+    assert _cursos(usuario_id) == antes
+
+
+def test_lote_valido_se_aplica_completo(admin, contexto, usuario_id):
+    antes = _cursos(usuario_id)
+    respuesta = admin.post('/lote', json={'operaciones': [
+        {'op': 'crear', 'recurso': 'cursos', 'datos': {'nombre': 'Uno', 'institucion': 'i'}},
+        {'op': 'crear', 'recurso': 'cursos', 'datos': {'nombre': 'Dos', 'institucion': 'i'}},
+    ]})
+    assert respuesta.status_code == 200
+    ids = [r['id'] for r in respuesta.get_json()['resultados']]
+    assert _cursos(usuario_id) == antes + 2
+
+    respuesta = admin.post('/lote', json={'operaciones': [
+        {'op': 'modificar', 'recurso': 'cursos', 'id': ids[0], 'datos': {'nombre': 'Uno editado'}},
+        {'op': 'eliminar', 'recurso': 'cursos', 'id': ids[1]},
+    ]})
+    assert respuesta.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Curso, ids[0]).nombre == 'Uno editado'
+    assert db.session.get(Curso, ids[1]) is None
+
+
+def test_imagen_tiene_que_venir_de_subidas(admin, contexto):
+    respuesta = admin.post('/lote', json={'operaciones': [
+        {'op': 'crear', 'recurso': 'proyectos', 'datos': {'titulo': 'p', 'imagen': '../config.py'}},
+    ]})
+    assert respuesta.status_code == 400
+    assert 'imagen' in respuesta.get_json()['errores'][0]['campos']
+
+    ruta = blob_store.guardar_stream(io.BytesIO(b'imagen del lote'), '.png')
+    respuesta = admin.post('/lote', json={'operaciones': [
+        {'op': 'crear', 'recurso': 'proyectos', 'datos': {'titulo': 'p', 'github_url': 'https://github.com/x', 'imagen': ruta}},
+    ]})
+    assert respuesta.status_code == 200
+    assert db.session.get(Proyecto, respuesta.get_json()['resultados'][0]['id']).imagen == ruta
@@ -0,0 +1,19 @@
+import pytest
+
+from metrics import metrics
+
+
+@pytest.fixture
+def con_token(monkeypatch):
+    monkeypatch.setattr(metrics, 'token', 'secreto')
+
+
+def test_metrics_con_token(cliente, con_token):
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer otro'}).status_code == 404
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer señor'}).status_code == 404
+    assert cliente.get('/metrics').status_code == 404
+
+
+def test_metrics_perfil_principal(admin):
+    assert admin.get('/metrics').status_code == 200
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _flask(db, *args):
+    # en otro proceso: la app de los tests ya tiene su base y sus singletons
+    entorno = {**os.environ, 'DATABASE_URL': f'sqlite:///{db}', 'DATABASE_REPLICA_URLS': ''}
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', *args],
+                   cwd=RAIZ, env=entorno, check=True, capture_output=True)
+
+
+def test_filas_sin_dueno_de_la_base_original(tmp_path):
+    db = tmp_path / 'original.db'
+    _flask(db, 'db', 'upgrade', '0001')
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO usuario (id, username, password) VALUES (1, 'daer', 'x')")
+        # agregar_experiencia no guardaba el dueño
+        conn.execute("INSERT INTO experiencia (id, proyecto, descripcion, puesto, periodo, logros) "
+                     "VALUES (1, 'Portfolio en Flask', 'd', 'dev', '2024', 'l')")
+
+    _flask(db, 'db', 'upgrade')
+    _flask(db, 'reindexar-busqueda')
+
+    with sqlite3.connect(db) as conn:
+        assert conn.execute('SELECT usuario_id FROM experiencia WHERE id = 1').fetchone() == (1,)
+        assert conn.execute("SELECT DISTINCT usuario_id FROM termino_indice "
+                            "WHERE tipo = 'experiencia' AND objeto_id = 1").fetchall() == [(1,)]
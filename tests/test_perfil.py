@@ -0,0 +1,24 @@
+import re
+
+import pytest
+
+
+@pytest.fixture
+def con_csrf(app):
+    app.config['WTF_CSRF_ENABLED'] = True
+    yield app
+    app.config['WTF_CSRF_ENABLED'] = False
+
+
+def test_formularios_del_dueno_con_token_csrf(admin, con_csrf):
+    assert con_csrf.config['HTML_STREAMING']
+    html = admin.get('/u/daer').get_data(as_text=True)
+    assert '&lt;input name=&#34;csrf_token&#34;' not in html
+    tokens = re.findall(r'<input name="csrf_token" type="hidden" value="([^"]+)">', html)
+    assert tokens
+
+    # el token de la página sirve para editar desde ahí
+    respuesta = admin.post('/agregar_curso', data={'csrf_token': tokens[0], 'nombre': 'Con token',
+                                                   'institucion': 'i'})
+    assert respuesta.status_code == 302
+    assert 'Con token' in admin.get('/u/daer').get_data(as_text=True)
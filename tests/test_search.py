@@ -0,0 +1,38 @@
+from loaders import contar_consultas
+from models import db, Curso, Experiencia, Usuario
+from search import _cantidad_documentos, buscar, reindexar_todo
+
+
+def test_buscar_solo_en_el_perfil(contexto, usuario_id):
+    otro = Usuario(username='otra', password='x')
+    db.session.add(otro)
+    db.session.flush()
+    db.session.add_all([
+        Curso(nombre='Kubernetes avanzado', institucion='i', usuario_id=usuario_id),
+        Curso(nombre='Kubernetes básico', institucion='i', usuario_id=otro.id),
+    ])
+    db.session.commit()
+    resultados = buscar('kubernetes', usuario_id)
+    assert [r.objeto.nombre for r in resultados] == ['Kubernetes avanzado']
+
+
+def test_cantidad_documentos_cacheada_hasta_editar(contexto, usuario_id):
+    antes = _cantidad_documentos(usuario_id)
+    with contar_consultas() as qc:
+        assert _cantidad_documentos(usuario_id) == antes
+    assert qc.count == 0
+
+    db.session.add(Curso(nombre='Redes', institucion='i', usuario_id=usuario_id))
+    db.session.commit()
+    assert _cantidad_documentos(usuario_id) == antes + 1
+
+
+def test_reindexar_saltea_filas_sin_dueno(contexto, usuario_id):
+    db.session.add_all([
+        Experiencia(proyecto='Legado COBOL', descripcion='d', puesto='p', periodo='p', logros='l'),
+        Experiencia(proyecto='Migracion COBOL', descripcion='d', puesto='p', periodo='p', logros='l',
+                    usuario_id=usuario_id),
+    ])
+    db.session.commit()
+    reindexar_todo()
+    assert [r.objeto.proyecto for r in buscar('cobol', usuario_id)] == ['Migracion COBOL']
@@ -0,0 +1,66 @@
+import io
+import os
+
+from sqlalchemy import false, select
+
+from models import db, Archivo, Proyecto
+import storage
+from storage import blob_store, hash_de_ruta
+
+
+def _blob(contenido):
+    return blob_store.guardar_stream(io.BytesIO(contenido), '.png')
+
+
+def _referencias(ruta):
+    return db.session.scalar(select(Archivo.referencias).where(Archivo.hash == hash_de_ruta(ruta)))
+
+
+def test_mismo_contenido_misma_ruta(contexto):
+    ruta = _blob(b'contenido deduplicado')
+    assert _blob(b'contenido deduplicado') == ruta
+    assert os.path.isfile(blob_store.path(ruta))
+
+
+def test_referencias_siguen_a_las_filas(contexto, usuario_id):
+    ruta = _blob(b'imagen compartida')
+    uno = Proyecto(titulo='uno', imagen=ruta, usuario_id=usuario_id)
+    dos = Proyecto(titulo='dos', imagen=ruta, usuario_id=usuario_id)
+    db.session.add_all([uno, dos])
+    db.session.commit()
+    assert _referencias(ruta) == 2
+
+    otra = _blob(b'otra imagen')
+    uno.imagen = otra
+    db.session.commit()
+    assert _referencias(ruta) == 1
+    assert _referencias(otra) == 1
+
+    db.session.delete(dos)
+    db.session.delete(uno)
+    db.session.commit()
+    assert _referencias(ruta) == 0
+    assert _referencias(otra) == 0
+
+
+def test_rollback_no_cambia_referencias(contexto, usuario_id):
+    ruta = _blob(b'imagen descartada')
+    db.session.add(Proyecto(titulo='tres', imagen=ruta, usuario_id=usuario_id))
+    db.session.flush()
+    db.session.rollback()
+    assert not _referencias(ruta)
+
+
+def test_insertar_si_falta_sin_upsert(contexto, monkeypatch):
+    ruta = _blob(b'base sin upsert')
+    valores = dict(hash=hash_de_ruta(ruta), ruta=ruta, tamanio=15, referencias=0)
+    storage._insertar_si_falta_generico(db.session, valores)
+    storage._insertar_si_falta_generico(db.session, valores)
+    assert _referencias(ruta) == 0
+
+    # otro request la creó entre el select y el insert: el choque queda en el savepoint
+    seleccionar = storage.select
+    monkeypatch.setattr(storage, 'select', lambda *c: seleccionar(*c).where(false()))
+    storage._insertar_si_falta_generico(db.session, valores)
+    db.session.commit()
+    assert _referencias(ruta) == 0
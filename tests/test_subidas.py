@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from cv import cv_pipeline
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+
+
+def _crear(cliente, nombre='foto.png', tamanio=len(PNG), destino='imagen'):
+    return cliente.post('/subidas', json={'nombre': nombre, 'tamanio': tamanio, 'destino': destino})
+
+
+def _parte(cliente, subida_id, offset, datos):
+    return cliente.patch(f'/subidas/{subida_id}', data=datos, headers={'Upload-Offset': str(offset)})
+
+
+def test_subida_en_partes(admin, app):
+    subida_id = _crear(admin).get_json()['id']
+    respuesta = _parte(admin, subida_id, 0, PNG[:40])
+    assert respuesta.status_code == 204
+    assert respuesta.headers['Upload-Offset'] == '40'
+    assert admin.head(f'/subidas/{subida_id}').headers['Upload-Offset'] == '40'
+
+    respuesta = _parte(admin, subida_id, 40, PNG[40:])
+    assert respuesta.status_code == 200
+    ruta = respuesta.get_json()['ruta']
+    assert ruta.startswith('blobs/') and ruta.endswith('.png')
+    assert os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], ruta))
+
+
+def test_offset_distinto(admin):
+    subida_id = _crear(admin).get_json()['id']
+    _parte(admin, subida_id, 0, PNG[:10])
+    respuesta = _parte(admin, subida_id, 5, PNG[5:20])
+    assert respuesta.status_code == 409
+    assert respuesta.headers['Upload-Offset'] == '10'
+
+
+def test_firma_invalida(admin):
+    subida_id = _crear(admin).get_json()['id']
+    respuesta = _parte(admin, subida_id, 0, b'<?php echo 1; ?>' + b'\x00' * 20)
+    assert respuesta.status_code == 415
+    assert admin.head(f'/subidas/{subida_id}').status_code == 404
+
+
+def test_mas_bytes_que_los_declarados(admin):
+    subida_id = _crear(admin, tamanio=20).get_json()['id']
+    respuesta = _parte(admin, subida_id, 0, PNG)
+    assert respuesta.status_code == 413
+
+
+@pytest.mark.parametrize('datos, status', [
+    ({'nombre': 'foto.png', 'tamanio': 10 ** 12, 'destino': 'imagen'}, 413),
+    ({'nombre': 'script.exe', 'tamanio': 10, 'destino': 'imagen'}, 415),
+    ({'nombre': 'foto.png', 'tamanio': -1, 'destino': 'imagen'}, 400),
+    ({'nombre': 'foto.png', 'tamanio': 10, 'destino': 'otro'}, 400),
+])
+def test_crear_valida(admin, datos, status):
+    assert admin.post('/subidas', json=datos).status_code == status
+
+
+def test_cv_generado_no_se_sube(admin):
+    assert _crear(admin, nombre='cv.pdf', tamanio=10, destino='cv').status_code == 409
+    assert 'subida-cv' not in admin.get('/dashboard').get_data(as_text=True)
+
+
+def test_cv_subido(admin, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'CV_GENERADO', False)
+    monkeypatch.setattr(cv_pipeline, 'generado', False)
+    assert 'subida-cv' in admin.get('/dashboard').get_data(as_text=True)
+    assert _crear(admin, nombre='cv.png', tamanio=10, destino='cv').status_code == 415
+    pdf = b'%PDF-1.4 subido'
+    subida_id = _crear(admin, nombre='cv.pdf', tamanio=len(pdf), destino='cv').get_json()['id']
+    assert _parte(admin, subida_id, 0, pdf).get_json()['ruta'] == 'cv/1.pdf'
+    assert admin.get('/u/daer/cv').get_data() == pdf
+
+
+def test_sin_sesion(cliente):
+    assert _crear(cliente).status_code == 401
@@ -0,0 +1,20 @@
+"""Punto de entrada WSGI para producción.
+
+    flask --app app init-db                    # una vez por despliegue
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importar este módulo solo arma la app (create_app): no migra, no hashea
+contraseñas ni crea carpetas, así que un worker nuevo arranca en lo que
+tarda el import.
+"""
+import gc
+
+from app import create_app
+
+app = create_app()
+
+# Con preload_app la app se importa una vez en el master y los workers la
+# heredan por fork. gc.freeze() saca esos objetos del recolector: si no, la
+# primera pasada del GC en cada worker escribe en sus encabezados y el
+# kernel copia las páginas que hasta ahí eran compartidas (copy-on-write).
+gc.freeze()